@@ -0,0 +1,140 @@
+"""
+Benchmark of recall@k against search latency for the index factories.
+
+Indexes synthetic clustered features with each index factory, then compares
+their search results with the exact results of a flat index, for a range of
+nprobe (IVF indexes) and efSearch (HNSW indexes) values.
+
+Run me with: PYTHONPATH=. python benchmarks/ann_recall.py
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from cbir.retrieval.indexer import Indexer
+
+STORAGE = "storage"
+INDEX = "index"
+
+
+def make_features(
+    size: int,
+    n_queries: int,
+    n_features: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Make clustered random features, as image embeddings are, and queries."""
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(size // 1000, 1), n_features)).astype(np.float32)
+
+    def sample(n: int) -> np.ndarray:
+        noise = rng.normal(scale=0.3, size=(n, n_features)).astype(np.float32)
+        return centers[rng.integers(0, len(centers), n)] + noise
+
+    return sample(size), sample(n_queries)
+
+
+def build_indexer(
+    data_path: str,
+    index_factory: str,
+    features: np.ndarray,
+) -> Tuple[Indexer, float]:
+    """Index the features with an index factory, returning the build time in seconds."""
+
+    start = time.perf_counter()
+    indexer = Indexer(
+        data_path,
+        STORAGE,
+        index_factory,
+        features.shape[1],
+        flush_max_pending=2**62,
+        index_factory=index_factory,
+    )
+    indexer.add(0, features)
+    if indexer.needs_training:
+        indexer.train()
+    return indexer, time.perf_counter() - start
+
+
+def run_searches(
+    indexer: Indexer,
+    queries: np.ndarray,
+    k: int,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Tuple[List[List[int]], float]:
+    """Search the queries one by one, returning the labels and the median latency in ms."""
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        labels, _ = indexer.search(query[np.newaxis], k, nprobe, ef_search)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(labels)
+    return results, statistics.median(latencies)
+
+
+def recall(results: List[List[int]], truth: List[List[int]]) -> float:
+    """Fraction of the exact nearest neighbours found."""
+
+    found = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return found / sum(len(t) for t in truth)
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--n-features", type=int, default=128)
+    parser.add_argument("--n-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+
+    features, queries = make_features(args.size, args.n_queries, args.n_features)
+
+    sweeps = [
+        ("Flat", [{}]),
+        (f"IVF{args.nlist},Flat", [{"nprobe": n} for n in (1, 4, 16, 64)]),
+        (f"IVF{args.nlist},PQ{args.pq_m}", [{"nprobe": n} for n in (1, 4, 16, 64)]),
+        (f"HNSW{args.hnsw_m}", [{"ef_search": n} for n in (16, 32, 64, 128)]),
+    ]
+
+    print(f"{args.size} vectors of {args.n_features} features, recall@{args.k}")
+    print(
+        f"{'index factory':>16} {'parameter':>14} {'recall':>8} "
+        f"{'latency (ms)':>13} {'memory (MB)':>12} {'build (s)':>10}"
+    )
+
+    with tempfile.TemporaryDirectory() as data_path:
+        (Path(data_path) / STORAGE).mkdir()
+        truth: List[List[int]] = []
+
+        for index_factory, parameters in sweeps:
+            indexer, build_time = build_indexer(data_path, index_factory, features)
+            memory = indexer.memory_usage() / 2**20
+
+            for params in parameters:
+                results, latency = run_searches(indexer, queries, args.k, **params)
+                if index_factory == "Flat":
+                    truth = results
+
+                parameter = " ".join(f"{key}={value}" for key, value in params.items())
+                print(
+                    f"{index_factory:>16} {parameter or '-':>14} "
+                    f"{recall(results, truth):>8.3f} {latency:>13.3f} "
+                    f"{memory:>12.1f} {build_time:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
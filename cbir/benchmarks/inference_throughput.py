@@ -0,0 +1,69 @@
+"""
+Benchmark of inference throughput under concurrent requests.
+
+Compares concurrent requests each running their own forward pass on a single
+image (as done before the inference batcher) with requests batched together
+by the inference batcher.
+
+Run me with: PYTHONPATH=. python benchmarks/inference_throughput.py
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import torch
+
+from cbir.config import Settings
+from cbir.models.batcher import InferenceBatcher
+from cbir.models.utils import load_model, run_inference
+
+
+def measure(infer: Callable[[torch.Tensor], object], concurrency: int, requests: int) -> float:
+    """Measure the throughput of concurrent requests, in images per second."""
+
+    inputs = torch.rand((1, 3, 224, 224))
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda _: infer(inputs), range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128)
+    args = parser.parse_args()
+
+    settings = Settings()
+    model = load_model(settings)
+    batcher = InferenceBatcher(
+        model,
+        settings.inference_batch_size,
+        settings.inference_max_wait / 1000,
+    )
+
+    # Forward passes are serialized, as they would compete for the same cores
+    lock = threading.Lock()
+
+    def infer_alone(inputs: torch.Tensor) -> object:
+        with lock:
+            return run_inference(model, inputs)
+
+    measure(batcher.run, 1, 2)  # Warm up
+
+    print(f"{'concurrency':>12} {'per request (img/s)':>20} {'batched (img/s)':>16}")
+    for concurrency in args.concurrency:
+        before = measure(infer_alone, concurrency, args.requests)
+        after = measure(batcher.run, concurrency, args.requests)
+        print(f"{concurrency:>12} {before:>20.1f} {after:>16.1f}")
+
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of search latency against index size.
+
+Compares loading the index from disk for every search (as done before the
+index registry) with searching an index kept in memory by the registry.
+
+Run me with: PYTHONPATH=. python benchmarks/search_latency.py
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from cbir.retrieval.indexer import Indexer
+from cbir.retrieval.registry import IndexRegistry
+
+STORAGE = "storage"
+INDEX = "index"
+
+
+def build_index(data_path: str, size: int, n_features: int) -> None:
+    """Build an index of random features on disk."""
+
+    (Path(data_path) / STORAGE).mkdir(exist_ok=True)
+    indexer = Indexer(data_path, STORAGE, INDEX, n_features)
+    rng = np.random.default_rng(0)
+    batch = 100_000
+    for start in range(0, size, batch):
+        features = rng.random((min(batch, size - start), n_features), dtype=np.float32)
+        indexer.index.add_with_ids(features, np.arange(start, start + len(features)))
+    indexer.save()
+
+
+def measure(search: Callable[[], None], rounds: int) -> List[float]:
+    """Measure the latency of a search, in milliseconds."""
+
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        search()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000]
+    )
+    parser.add_argument("--n-features", type=int, default=128)
+    parser.add_argument("--nrt-neigh", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    query = np.random.default_rng(1).random((1, args.n_features), dtype=np.float32)
+
+    print(f"{'size':>10} {'per request load (ms)':>22} {'registry (ms)':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            build_index(data_path, size, args.n_features)
+
+            def search_from_disk() -> None:
+                indexer = Indexer(data_path, STORAGE, INDEX, args.n_features)
+                indexer.search(query, args.nrt_neigh)
+
+            registry = IndexRegistry(max_memory=2**40)
+
+            def search_from_registry() -> None:
+                with registry.use(data_path, STORAGE, INDEX, args.n_features) as indexer:
+                    indexer.search(query, args.nrt_neigh)
+
+            search_from_registry()  # Load the index once
+            before = statistics.median(measure(search_from_disk, args.rounds))
+            after = statistics.median(measure(search_from_registry, args.rounds))
+            print(f"{size:>10} {before:>22.2f} {after:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
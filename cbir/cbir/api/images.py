@@ -1,6 +1,7 @@
 """Image API"""
 
 from pathlib import Path
+from typing import List
 
 from fastapi import (
     APIRouter,
@@ -10,11 +11,13 @@ from fastapi import (
     Request,
     UploadFile,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
+from cbir.api.utils.models import Images
 from cbir.api.utils.utils import get_retrieval
 from cbir.config import Settings, get_settings
-from cbir.retrieval.retrieval import ImageRetrieval
+from cbir.retrieval.retrieval import ImageRetrieval, preprocess_images
 
 router = APIRouter()
 
@@ -62,9 +65,68 @@ async def index_image(
 
     content = await image.read()
 
-    model = request.app.state.model
+    inputs = await run_in_threadpool(preprocess_images, [content])
+    features = await request.app.state.batcher.infer(inputs)
+    ids = await run_in_threadpool(retrieval.index_features, features, [image.filename])
 
-    ids = retrieval.index_image(model, content, image.filename)
+    return JSONResponse(
+        content={
+            "ids": ids,
+            "storage": storage_name,
+            "index": index_name,
+        }
+    )
+
+
+@router.post("/images/batch")
+async def index_images(
+    request: Request,
+    images: List[UploadFile],
+    storage_name: str = Query(..., alias="storage"),
+    index_name: str = Query(default="index", alias="index"),
+    retrieval: ImageRetrieval = Depends(get_retrieval),
+    settings: Settings = Depends(get_settings),
+) -> JSONResponse:
+    """
+    Index several images at once into the specified storage and index.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        images (List[UploadFile]): The image files to be indexed.
+        storage_name (str): The name of the storage where the index is stored.
+        index_name (str): The name of the index where the image features will be added.
+        retrieval (ImageRetrieval): The image retrieval object.
+        settings (DatabaseSetting): The database settings.
+
+    Returns:
+        JSONResponse: A JSON response containing the IDs of the newly indexed images.
+    """
+
+    filenames = [image.filename for image in images]
+    if any(filename is None for filename in filenames):
+        raise HTTPException(status_code=404, detail="Image filename not found!")
+
+    if len(set(filenames)) != len(filenames) or any(
+        retrieval.store.contains(filename) for filename in filenames  # type: ignore
+    ):
+        raise HTTPException(status_code=409, detail="Image filename already exist!")
+
+    if not storage_name:
+        raise HTTPException(status_code=404, detail="Storage is required")
+
+    base_path = Path(settings.data_path)
+    storage_path = base_path / storage_name
+    if not storage_path.is_dir():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Storage '{storage_name}' not found.",
+        )
+
+    contents = [await image.read() for image in images]
+
+    inputs = await run_in_threadpool(preprocess_images, contents)
+    features = await request.app.state.batcher.infer(inputs)
+    ids = await run_in_threadpool(retrieval.index_features, features, filenames)
 
     return JSONResponse(
         content={
@@ -107,3 +169,38 @@ def remove_image(
             "index": index_name,
         }
     )
+
+
+@router.post("/images/remove")
+def remove_images(
+    body: Images,
+    storage_name: str = Query(..., alias="storage"),
+    index_name: str = Query(default="index", alias="index"),
+    retrieval: ImageRetrieval = Depends(get_retrieval),
+) -> JSONResponse:
+    """
+    Remove several indexed images at once.
+
+    Args:
+        body (Images): The names of the images to be removed.
+        storage_name (str): The name of the storage where the index is stored.
+        index_name (str): The name of the index where the images are indexed.
+        retrieval (ImageRetrieval): The image retrieval object.
+
+    Returns:
+        JSONResponse: A JSON response containing the IDs of the deleted images,
+            and the names of the images that were not found.
+    """
+
+    labels = retrieval.remove_images(body.filenames)
+
+    return JSONResponse(
+        content={
+            "ids": [label for label in labels if label is not None],
+            "not_found": [
+                name for name, label in zip(body.filenames, labels) if label is None
+            ],
+            "storage": storage_name,
+            "index": index_name,
+        }
+    )
@@ -1,6 +1,7 @@
 """Search API"""
 
-from typing import List
+import asyncio
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
@@ -10,10 +11,17 @@ from fastapi import (
     Request,
     UploadFile,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
+from redis import Redis  # type: ignore
 
 from cbir.api.utils.utils import get_retrievals
-from cbir.retrieval.retrieval import ImageRetrieval
+from cbir.retrieval.retrieval import (
+    ImageRetrieval,
+    merge_similarities,
+    preprocess_images,
+)
+from cbir.retrieval.utils import get_redis
 
 router = APIRouter()
 
@@ -23,9 +31,12 @@ async def retrieve_image(
     request: Request,
     image: UploadFile,
     nrt_neigh: int = Query(...),
+    nprobe: Optional[int] = Query(default=None, gt=0),
+    ef_search: Optional[int] = Query(default=None, gt=0),
     storage_names: List[str] = Query(..., alias="storage"),
     index_name: str = Query(default="index", alias="index"),
     retrievals: List[ImageRetrieval] = Depends(get_retrievals),
+    redis: Redis = Depends(get_redis),
 ) -> JSONResponse:
     """
     Search for similar images from the index.
@@ -34,9 +45,12 @@ async def retrieve_image(
         request (Request): The incoming HTTP request.
         image (UploadFile): The query image.
         nrt_neigh (int): The number of nearest neighbors to retrieve.
+        nprobe (Optional[int]): Number of inverted lists visited (IVF indexes).
+        ef_search (Optional[int]): Size of the search queue (HNSW indexes).
         storage_names (List[str]): The list of storage names.
         index_name (str): The name of the index where the image features will be added.
         retrievals (List[ImageRetrieval]): The image retrieval object.
+        redis (Redis): An instance of the Redis client.
 
     Returns:
         JSONResponse: A JSON containing the list of similarities.
@@ -45,15 +59,26 @@ async def retrieve_image(
     if not storage_names:
         raise HTTPException(status_code=404, detail="Storage is required")
 
-    model = request.app.state.model
     content = await image.read()
 
-    similarities = [
-        result
-        for retrieval in retrievals
-        for result in retrieval.search(model, content, nrt_neigh)
-    ]
-    similarities = sorted(similarities, key=lambda x: x[1])[:nrt_neigh]
+    # The query is embedded once, then searched in all indexes in parallel.
+    # The features of images searched before are reused.
+    embeddings = request.app.state.embeddings
+    key = embeddings.key(content)
+    features = await run_in_threadpool(embeddings.get, key, redis)
+    if features is None:
+        inputs = await run_in_threadpool(preprocess_images, [content])
+        features = await request.app.state.batcher.infer(inputs)
+        await run_in_threadpool(embeddings.set, key, features, redis)
+    results = await asyncio.gather(
+        *(
+            run_in_threadpool(
+                retrieval.search_features, features, nrt_neigh, nprobe, ef_search
+            )
+            for retrieval in retrievals
+        )
+    )
+    similarities = merge_similarities(results, nrt_neigh)
 
     return JSONResponse(
         content={
@@ -2,12 +2,19 @@
 
 import shutil
 from pathlib import Path
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import contextmanager_in_threadpool, run_in_threadpool
 from fastapi.responses import JSONResponse
 
 from cbir.api.utils.models import Storage
 from cbir.config import Settings, get_settings
+from cbir.retrieval.factory import (
+    build_index,
+    read_index_factory,
+    write_index_factory,
+)
 
 router = APIRouter()
 
@@ -38,6 +45,7 @@ def get_storages(settings: Settings = Depends(get_settings)) -> JSONResponse:
 
 @router.post("/storages")
 async def create_storage(
+    request: Request,
     body: Storage,
     settings: Settings = Depends(get_settings),
 ) -> JSONResponse:
@@ -45,6 +53,7 @@ async def create_storage(
     Create a new storage.
 
     Args:
+        request (Request): The incoming HTTP request.
         body (Storage): The body of the request.
         settings (Settings): The database settings.
 
@@ -61,8 +70,15 @@ async def create_storage(
             detail=f"Storage with name '{body.name}' already exists.",
         )
 
+    index_factory = body.index_factory or settings.index_factory
+    try:
+        build_index(index_factory, request.app.state.model.n_features)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
     try:
         storage_path.mkdir()
+        write_index_factory(str(storage_path), index_factory)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -85,7 +101,7 @@ async def get_storage(
         settings (Settings): The database settings.
 
     Returns:
-        JSONResponse: A JSON response containing the name of the storage.
+        JSONResponse: A JSON response containing the name and index factory of the storage.
     """
 
     base_path = Path(settings.data_path)
@@ -97,11 +113,76 @@ async def get_storage(
             detail=f"Storage with name '{name}' not found.",
         )
 
-    return JSONResponse(content={"name": name})
+    return JSONResponse(
+        content={"name": name, "index_factory": read_index_factory(str(storage_path))}
+    )
+
+
+@router.post("/storages/{name}/train")
+async def train_storage(
+    request: Request,
+    name: str,
+    index_name: str = Query(default="index", alias="index"),
+    index_factory: Optional[str] = Query(default=None),
+    settings: Settings = Depends(get_settings),
+) -> JSONResponse:
+    """
+    Train an index of a storage with the vectors it contains. Indexes that need
+    training (e.g. IVF) keep their vectors in a flat index until then.
+
+    Giving an index factory migrates an existing flat index to another type of
+    index, which becomes the index factory of the storage.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        name (str): The name of the storage.
+        index_name (str): The name of the index to train.
+        index_factory (Optional[str]): The FAISS factory string of the trained index.
+        settings (Settings): The database settings.
+
+    Returns:
+        JSONResponse: A JSON response containing the number of vectors in the trained index.
+    """
+
+    storage_path = Path(settings.data_path) / name
+
+    if not storage_path.is_dir():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Storage with name '{name}' not found.",
+        )
+
+    # Loading the index, or saving the evicted ones, must not block the event loop
+    async with contextmanager_in_threadpool(
+        request.app.state.indexes.use(
+            settings.data_path,
+            name,
+            index_name,
+            request.app.state.model.n_features,
+            settings.device.type == "cuda",
+        )
+    ) as indexer:
+        try:
+            size = await run_in_threadpool(indexer.train, index_factory)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    if index_factory is not None:
+        write_index_factory(str(storage_path), index_factory)
+
+    return JSONResponse(
+        content={
+            "storage": name,
+            "index": index_name,
+            "index_factory": indexer.index_factory,
+            "size": size,
+        }
+    )
 
 
 @router.delete("/storages/{name}")
 async def delete_storage(
+    request: Request,
     name: str,
     settings: Settings = Depends(get_settings),
 ) -> JSONResponse:
@@ -109,6 +190,7 @@ async def delete_storage(
     Delete a specific storage and its content.
 
     Args:
+        request (Request): The incoming HTTP request.
         name (str): The name of the storage to delete.
         settings (Settings): The database settings.
 
@@ -125,6 +207,9 @@ async def delete_storage(
             detail=f"Storage with name '{name}' not found.",
         )
 
+    # Discarding pending changes waits for the running saves of the indexes
+    await run_in_threadpool(request.app.state.indexes.unload, settings.data_path, name)
+
     try:
         shutil.rmtree(storage_path)
     except Exception as e:
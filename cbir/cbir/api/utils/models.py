@@ -1,6 +1,8 @@
 """DTO Models"""
 
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
 
 
 class Storage(BaseModel):
@@ -9,3 +11,12 @@ class Storage(BaseModel):
     """
 
     name: str
+    index_factory: Optional[str] = None
+
+
+class Images(BaseModel):
+    """
+    Images model.
+    """
+
+    filenames: List[str] = Field(..., min_length=1)
@@ -1,6 +1,7 @@
 """Utility functions for dependency injection."""
 
-from typing import List
+from contextlib import ExitStack
+from typing import Iterator, List
 from fastapi import Depends, Query, Request
 from redis import Redis  # type: ignore
 
@@ -54,25 +55,26 @@ def get_indexer(
     storage_name: str = Query(..., alias="storage"),
     index_name: str = Query(default="index", alias="index"),
     settings: Settings = Depends(get_settings),
-) -> Indexer:
+) -> Iterator[Indexer]:
     """
-    Instantiate an Indexer object.
+    Get an Indexer object from the index registry of the app.
 
     Args:
         storage_name (str): The name of the storage.
         index_name (str): The name of the index.
         settings (Settings): The app settings.
 
-    Returns:
-        Indexer: An instance of the Indexer.
+    Yields:
+        Indexer: The loaded Indexer, kept in memory while the request uses it.
     """
-    return Indexer(
+    with request.app.state.indexes.use(
         settings.data_path,
         storage_name,
         index_name,
         request.app.state.model.n_features,
         settings.device.type == "cuda",
-    )
+    ) as indexer:
+        yield indexer
 
 
 def get_indexers(
@@ -80,29 +82,33 @@ def get_indexers(
     storage_names: List[str] = Query(..., alias="storage"),
     index_name: str = Query(default="index", alias="index"),
     settings: Settings = Depends(get_settings),
-) -> List[Indexer]:
+) -> Iterator[List[Indexer]]:
     """
-    Instantiate a list of Indexer objects based on the provided storage names.
+    Get a list of Indexer objects from the index registry of the app, based on
+    the provided storage names.
 
     Args:
         storage_names (List[str]): The names of the storages.
         index_name (str): The name of the index.
         settings (Settings): The app settings.
 
-    Returns:
-        List[Indexer]: A list of Indexer instances.
+    Yields:
+        List[Indexer]: A list of loaded Indexer, kept in memory while the request uses them.
     """
     device = settings.device.type == "cuda"
-    return [
-        Indexer(
-            settings.data_path,
-            storage_name,
-            index_name,
-            request.app.state.model.n_features,
-            device,
-        )
-        for storage_name in storage_names
-    ]
+    with ExitStack() as stack:
+        yield [
+            stack.enter_context(
+                request.app.state.indexes.use(
+                    settings.data_path,
+                    storage_name,
+                    index_name,
+                    request.app.state.model.n_features,
+                    device,
+                )
+            )
+            for storage_name in storage_names
+        ]
 
 
 def get_retrieval(
@@ -1,14 +1,36 @@
 """Content Based Image Retrieval API"""
 
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
 from cbir import __version__
 from cbir.api import images, searches, storages
 from cbir.config import get_settings
-from cbir.models.utils import load_model
+from cbir.models.batcher import InferenceBatcher
+from cbir.models.utils import get_model_hash, load_model
+from cbir.retrieval.cache import EmbeddingCache
+from cbir.retrieval.registry import IndexRegistry
+
+log = logging.getLogger("cbir.app")
+
+
+async def run_periodically(func: Callable[[], object], interval: int) -> None:
+    """
+    Periodically run a blocking function, e.g. to save the modified indexes.
+    A failed run is logged, and the function is run again at the next period.
+    """
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(func)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Periodic task %s failed", getattr(func, "__name__", func))
 
 
 @asynccontextmanager
@@ -16,10 +38,45 @@ async def lifespan(local_app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifespan of the app."""
 
     # Initialisation
-    local_app.state.model = load_model(get_settings())
+    settings = get_settings()
+    local_app.state.model = load_model(settings)
+    local_app.state.batcher = InferenceBatcher(
+        local_app.state.model,
+        settings.inference_batch_size,
+        settings.inference_max_wait / 1000,
+    )
+    local_app.state.embeddings = EmbeddingCache(
+        get_model_hash(settings),
+        settings.embedding_cache_size,
+        settings.embedding_cache_ttl if settings.embedding_cache_redis else None,
+    )
+    local_app.state.indexes = IndexRegistry(
+        settings.index_max_memory * 1024 * 1024,
+        settings.index_flush_max_pending,
+    )
+    tasks = [
+        asyncio.create_task(
+            run_periodically(
+                local_app.state.indexes.flush, settings.index_flush_interval
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                local_app.state.indexes.compact, settings.index_compaction_interval
+            )
+        ),
+    ]
 
     yield
 
+    # Shutdown
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    local_app.state.indexes.flush()
+    local_app.state.batcher.close()
+
 
 PREFIX = get_settings().api_base_path
 
@@ -27,6 +27,11 @@ class Settings(BaseSettings):
     # Faiss index
     filename: str = "db"
     data_path: str = "/data"
+    index_factory: str = "Flat"  # FAISS factory string of new storages, e.g. "IVF1024,PQ64"
+    index_max_memory: int = 4096  # Memory budget for the loaded indexes, in MB
+    index_flush_interval: int = 30  # Time between saves of modified indexes, in seconds
+    index_flush_max_pending: int = 10000  # Number of unsaved changes triggering a save
+    index_compaction_interval: int = 3600  # Time between removals of deleted vectors, in seconds
 
     # Database
     host: str = "localhost"
@@ -37,6 +42,11 @@ class Settings(BaseSettings):
     device: torch.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     extractor: str = "resnet"
     weights: str = "/app/weights/resnet"
+    inference_batch_size: int = 32  # Maximum number of images in a forward pass
+    inference_max_wait: float = 5  # Time waiting for more images to batch, in ms
+    embedding_cache_size: int = 1024  # Number of query features kept in memory
+    embedding_cache_ttl: int = 0  # Time to live of query features in Redis, in s (0: forever)
+    embedding_cache_redis: bool = False  # Whether query features are also kept in Redis
 
 
 def get_settings() -> Settings:
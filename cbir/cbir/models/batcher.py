@@ -0,0 +1,174 @@
+"""Micro-batching of the inference requests."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from cbir.models.model import Model
+from cbir.models.utils import run_inference
+
+_Request = Tuple[torch.Tensor, Future]
+
+
+class InferenceBatcher:
+    """
+    Run the inference requests of concurrent callers in batches.
+
+    A background worker collects the submitted inputs until the batch is full
+    or the oldest input has waited long enough, then runs a single forward pass
+    and resolves the future of each request with its own outputs. Inputs of a
+    request are never split across batches, and requests cancelled while queued
+    are dropped.
+    """
+
+    def __init__(self, model: Model, max_batch_size: int, max_wait: float) -> None:
+        """
+        Inference batcher initialisation.
+
+        Args:
+            model (Model): The model to run.
+            max_batch_size (int): The maximum number of inputs in a batch.
+            max_wait (float): The maximum time waiting for more inputs, in seconds.
+        """
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue: queue.Queue[Optional[_Request]] = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run,
+            name="inference-batcher",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def submit(self, inputs: torch.Tensor) -> Future:
+        """
+        Submit inputs for inference.
+
+        Args:
+            inputs (torch.Tensor): The preprocessed inputs, with shape (n, C, H, W).
+
+        Returns:
+            Future: A future resolved with the outputs, as a np.ndarray of shape
+                (n, n_features).
+        """
+
+        future: Future = Future()
+        self._queue.put((inputs, future))
+        return future
+
+    def run(self, inputs: torch.Tensor) -> np.ndarray:
+        """
+        Run the inference on the inputs, batched with other requests.
+
+        Args:
+            inputs (torch.Tensor): The preprocessed inputs, with shape (n, C, H, W).
+
+        Returns:
+            np.ndarray: The outputs, with shape (n, n_features).
+        """
+
+        return self.submit(inputs).result()
+
+    async def infer(self, inputs: torch.Tensor) -> np.ndarray:
+        """
+        Run the inference on the inputs, batched with other requests, without
+        blocking the event loop.
+
+        Args:
+            inputs (torch.Tensor): The preprocessed inputs, with shape (n, C, H, W).
+
+        Returns:
+            np.ndarray: The outputs, with shape (n, n_features).
+        """
+
+        return await asyncio.wrap_future(self.submit(inputs))
+
+    def close(self) -> None:
+        """Stop the worker once the submitted requests are processed."""
+
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], Optional[_Request]]:
+        """
+        Collect requests into a batch, starting with the given one, which must
+        be running already.
+
+        Returns:
+            Tuple[List[_Request], Optional[_Request]]: The batch, and the request
+                that did not fit in it, if any.
+        """
+
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            # Once the deadline has passed, only the requests already queued
+            # (e.g. during the previous forward pass) are added
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    request = self._queue.get(timeout=timeout)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is None:
+                # Closed, stop once this batch is processed
+                self._queue.put(None)
+                return batch, None
+
+            if size + len(request[0]) > self.max_batch_size:
+                return batch, request
+
+            if not request[1].set_running_or_notify_cancel():
+                continue
+
+            batch.append(request)
+            size += len(request[0])
+
+        return batch, None
+
+    def _run(self) -> None:
+        """Process the submitted requests until closed."""
+
+        pending: Optional[_Request] = None
+        while True:
+            request = pending or self._queue.get()
+            pending = None
+            if request is None:
+                return
+            if not request[1].set_running_or_notify_cancel():
+                # Cancelled by its caller while queued
+                continue
+
+            batch, pending = self._collect(request)
+            futures = [future for _, future in batch]
+
+            try:
+                outputs = run_inference(
+                    self.model,
+                    torch.cat([inputs for inputs, _ in batch]),
+                )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            start = 0
+            for inputs, future in batch:
+                if not future.done():
+                    future.set_result(outputs[start : start + len(inputs)])
+                start += len(inputs)
@@ -1,5 +1,7 @@
 """Utilities functions for the model."""
 
+import hashlib
+import json
 import os
 from contextlib import nullcontext
 
@@ -38,9 +40,68 @@ def load_model(settings: Settings) -> Model:
 
     model.to(settings.device)
 
+    # Inference only: embeddings must not depend on the other images of a batch
+    model.eval()
+
     return model
 
 
+def get_weights_digest(path: str) -> str:
+    """
+    Get the SHA-256 digest of the content of a weights file.
+
+    Reading large checkpoints is slow, so the digest is kept in a sidecar file,
+    reused as long as the weights file has the same path, size, modification
+    and status change times. Copies preserving the modification time still
+    change the status change time, so the digest is then computed again.
+    """
+
+    stat = os.stat(path)
+    identity = [
+        os.path.abspath(path),
+        stat.st_size,
+        stat.st_mtime_ns,
+        stat.st_ctime_ns,
+    ]
+    sidecar = f"{path}.sha256"
+
+    try:
+        with open(sidecar, encoding="utf-8") as file:
+            cached = json.load(file)
+        if cached["weights"] == identity:
+            return cached["sha256"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(2**20):
+            digest.update(chunk)
+
+    try:
+        with open(sidecar, "w", encoding="utf-8") as file:
+            json.dump({"weights": identity, "sha256": digest.hexdigest()}, file)
+    except OSError:
+        # Read-only weights directory, the digest is computed at each startup
+        pass
+
+    return digest.hexdigest()
+
+
+def get_model_hash(settings: Settings) -> str:
+    """
+    Get the fingerprint of the model given by the settings, which changes with
+    the extractor or its weights.
+    """
+
+    digest = hashlib.sha256(settings.extractor.encode())
+
+    if os.path.exists(settings.weights):
+        digest.update(get_weights_digest(settings.weights).encode())
+
+    return f"{settings.extractor}:{digest.hexdigest()[:16]}"
+
+
 def resnet_forward(model: Model, inputs: torch.Tensor) -> torch.Tensor:
     """Forward pass for Resnet model."""
 
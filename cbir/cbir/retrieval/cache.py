@@ -0,0 +1,128 @@
+"""Cache of the features of query images."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from redis import Redis, RedisError  # type: ignore
+
+
+class EmbeddingCache:
+    """
+    Cache of image features, keyed by the content of the images.
+
+    The keys include the fingerprint of the model, so that features computed
+    by another extractor or other weights are never reused. Features are kept
+    in an in-memory LRU cache and, optionally, in Redis to be shared between
+    workers and restarts.
+    """
+
+    def __init__(
+        self,
+        model_hash: str,
+        max_size: int,
+        redis_ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Embedding cache initialisation.
+
+        Args:
+            model_hash (str): The fingerprint of the model computing the features.
+            max_size (int): The maximum number of features kept in memory.
+            redis_ttl (Optional[int]): Time to live of the features in Redis, in
+                seconds. Features are not kept in Redis if None.
+        """
+
+        self.prefix = f"embedding:{model_hash}"
+        self.max_size = max_size
+        self.redis_ttl = redis_ttl
+
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, image: bytes) -> str:
+        """
+        Get the key of the features of an image.
+
+        Args:
+            image (bytes): The encoded image.
+
+        Returns:
+            str: The cache key.
+        """
+
+        return f"{self.prefix}:{hashlib.sha256(image).hexdigest()}"
+
+    def get(self, key: str, redis: Optional[Redis] = None) -> Optional[np.ndarray]:
+        """
+        Get the cached features of an image.
+
+        Args:
+            key (str): The cache key of the image.
+            redis (Optional[Redis]): The Redis client.
+
+        Returns:
+            Optional[np.ndarray]: The features, with shape (1, n_features), or
+                None if they are not cached.
+        """
+
+        with self._lock:
+            features = self._entries.get(key)
+            if features is not None:
+                self._entries.move_to_end(key)
+                return features
+
+        if redis is None or self.redis_ttl is None:
+            return None
+
+        try:
+            value = redis.get(key)
+        except RedisError:
+            return None
+
+        if value is None:
+            return None
+
+        features = np.frombuffer(value, dtype=np.float32).reshape(1, -1)  # type: ignore
+        self._remember(key, features)
+        return features
+
+    def set(self, key: str, features: np.ndarray, redis: Optional[Redis] = None) -> None:
+        """
+        Cache the features of an image.
+
+        Args:
+            key (str): The cache key of the image.
+            features (np.ndarray): The features, with shape (1, n_features).
+            redis (Optional[Redis]): The Redis client.
+        """
+
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        self._remember(key, features)
+
+        if redis is None or self.redis_ttl is None:
+            return
+
+        try:
+            redis.set(key, features.tobytes(), ex=self.redis_ttl or None)
+        except RedisError:
+            # The cache is an optimisation, searches work without it
+            pass
+
+    def _remember(self, key: str, features: np.ndarray) -> None:
+        """Keep features in memory, evicting the least recently used ones."""
+
+        if self.max_size <= 0:
+            return
+
+        features.flags.writeable = False
+        with self._lock:
+            self._entries[key] = features
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
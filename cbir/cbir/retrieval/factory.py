@@ -0,0 +1,192 @@
+"""FAISS index factories, selected per storage."""
+
+import json
+import os
+from typing import Optional
+
+import faiss
+
+DEFAULT_INDEX_FACTORY = "Flat"
+STORAGE_CONFIG = "config.json"
+
+
+def build_index(index_factory: str, n_features: int) -> faiss.Index:
+    """
+    Build an empty index with IDs from a FAISS factory string.
+
+    Exact search ("Flat"), inverted files with exact or product quantized
+    vectors ("IVF<nlist>,Flat", "IVF<nlist>,PQ<m>") and HNSW graphs ("HNSW<M>")
+    are supported.
+
+    Args:
+        index_factory (str): The FAISS factory string.
+        n_features (int): Number of features in the index.
+
+    Returns:
+        faiss.Index: The empty index.
+
+    Raises:
+        ValueError: If the factory string is invalid for this number of features.
+    """
+
+    # Inverted files support IDs natively, other indexes need a mapping
+    description = index_factory
+    if not index_factory.startswith("IVF"):
+        description = f"IDMap,{index_factory}"
+
+    try:
+        return faiss.index_factory(n_features, description, faiss.METRIC_L2)
+    except RuntimeError as e:
+        raise ValueError(f"Invalid index factory '{index_factory}'.") from e
+
+
+def min_training_size(index: faiss.Index) -> int:
+    """
+    Get the minimum number of vectors needed to train an index.
+
+    Args:
+        index (faiss.Index): The index.
+
+    Returns:
+        int: The minimum number of training vectors, 0 if no training is needed.
+    """
+
+    if index.is_trained:
+        return 0
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return index.d
+
+    size = ivf.nlist
+    if isinstance(ivf, faiss.IndexIVFPQ):
+        size = max(size, ivf.pq.ksub)
+
+    return size
+
+
+def search_parameters(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    selector: Optional[faiss.IDSelector] = None,
+) -> Optional[faiss.SearchParameters]:
+    """
+    Get the search parameters applicable to an index.
+
+    Args:
+        index (faiss.Index): The index.
+        nprobe (Optional[int]): Number of inverted lists visited (IVF indexes).
+        ef_search (Optional[int]): Size of the search queue (HNSW indexes).
+        selector (Optional[faiss.IDSelector]): The IDs that can be returned.
+
+    Returns:
+        Optional[faiss.SearchParameters]: The search parameters, if any apply.
+    """
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and (nprobe or selector):
+        return faiss.SearchParametersIVF(nprobe=nprobe or ivf.nprobe, sel=selector)
+
+    if isinstance(index, faiss.IndexIDMap):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW) and (ef_search or selector):
+            return faiss.SearchParametersHNSW(
+                efSearch=ef_search or inner.hnsw.efSearch, sel=selector
+            )
+
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+
+    return None
+
+
+def vector_size(index: faiss.Index, n_features: int) -> int:
+    """
+    Estimate the memory used by each vector of an index.
+
+    Args:
+        index (faiss.Index): The index.
+        n_features (int): Number of features in the index.
+
+    Returns:
+        int: The estimated memory usage of a vector and its ID, in bytes.
+    """
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return ivf.code_size + 8
+
+    size = n_features * 4 + 8
+    if isinstance(index, faiss.IndexIDMap):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            # Links of the base layer, which hold most of the graph
+            size += inner.hnsw.nb_neighbors(0) * 4
+
+    return size
+
+
+def is_flat(index: faiss.Index) -> bool:
+    """
+    Check whether an index does exact search over uncompressed vectors.
+
+    Args:
+        index (faiss.Index): The index.
+
+    Returns:
+        bool: Whether the index is a flat index with IDs.
+    """
+
+    return isinstance(index, faiss.IndexIDMap) and isinstance(
+        faiss.downcast_index(index.index), faiss.IndexFlat
+    )
+
+
+def is_hnsw(index: faiss.Index) -> bool:
+    """
+    Check whether an index is an HNSW graph with IDs.
+
+    Args:
+        index (faiss.Index): The index.
+
+    Returns:
+        bool: Whether the index is an HNSW index with IDs.
+    """
+
+    return isinstance(index, faiss.IndexIDMap) and isinstance(
+        faiss.downcast_index(index.index), faiss.IndexHNSW
+    )
+
+
+def read_index_factory(storage_path: str) -> str:
+    """
+    Get the index factory of a storage.
+
+    Args:
+        storage_path (str): The path to the storage.
+
+    Returns:
+        str: The index factory string.
+    """
+
+    config_path = os.path.join(storage_path, STORAGE_CONFIG)
+    if not os.path.isfile(config_path):
+        return DEFAULT_INDEX_FACTORY
+
+    with open(config_path, encoding="utf-8") as file:
+        return json.load(file).get("index_factory", DEFAULT_INDEX_FACTORY)
+
+
+def write_index_factory(storage_path: str, index_factory: str) -> None:
+    """
+    Set the index factory of a storage, used for the indexes it creates.
+
+    Args:
+        storage_path (str): The path to the storage.
+        index_factory (str): The index factory string.
+    """
+
+    config_path = os.path.join(storage_path, STORAGE_CONFIG)
+    with open(config_path, "w", encoding="utf-8") as file:
+        json.dump({"index_factory": index_factory}, file)
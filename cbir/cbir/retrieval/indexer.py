@@ -1,14 +1,42 @@
 """Indexer class for indexing images and their features."""
 
 import os
-from typing import List, Tuple
+import threading
+from typing import Iterable, List, Optional, Tuple
 
 import faiss
 import numpy as np
 
+from cbir.retrieval.factory import (
+    DEFAULT_INDEX_FACTORY,
+    build_index,
+    is_flat,
+    is_hnsw,
+    min_training_size,
+    read_index_factory,
+    search_parameters,
+    vector_size,
+)
+from cbir.retrieval.lock import ReadWriteLock
+
 
 class Indexer:
-    """Indexer class for indexing images and their features."""
+    """
+    Indexer class for indexing images and their features.
+
+    Searches can run concurrently, while additions and removals are serialized.
+
+    Changes are saved to disk once `flush_max_pending` changes are pending, or
+    when `flush()` is called. By default, every change is saved immediately.
+
+    The type of index is given by the FAISS factory string of the storage.
+    Indexes that need training (e.g. IVF) are flat until `train()` is called,
+    once enough vectors have been added.
+
+    Vectors are removed from flat indexes right away. In other indexes, where
+    removal is expensive or unsupported (HNSW), removed vectors are marked as
+    deleted and excluded from searches until `compact()` is called.
+    """
 
     def __init__(
         self,
@@ -17,6 +45,8 @@ class Indexer:
         index_name: str,
         n_features: int,
         gpu: bool = False,
+        flush_max_pending: int = 0,
+        index_factory: Optional[str] = None,
     ) -> None:
         """
         Indexer initialisation.
@@ -27,28 +57,127 @@ class Indexer:
             storage_name (str): The name of the storage.
             index_name (str): The name of the index.
             gpu (bool): Whether to use GPU for indexing or not.
+            flush_max_pending (int): Number of unsaved changes triggering a save.
+            index_factory (Optional[str]): The FAISS factory string, defaults to
+                the index factory of the storage.
         """
 
         self.n_features = n_features
         self.gpu = gpu
+        self.lock = ReadWriteLock()
+
+        self.flush_max_pending = flush_max_pending
+        self.pending = 0
+        self._save_lock = threading.Lock()
 
-        self.index_path = os.path.join(data_path, storage_name, index_name)
+        storage_path = os.path.join(data_path, storage_name)
+        self.index_path = os.path.join(storage_path, index_name)
+        self.deleted_path = f"{self.index_path}.deleted"
+        self.index_factory = index_factory or read_index_factory(storage_path)
+
+        self.deleted: np.ndarray = np.empty(0, dtype=np.int64)
+        self._deleted_selector: Optional[faiss.IDSelector] = None
+        if os.path.isfile(self.deleted_path):
+            self._set_deleted(np.load(self.deleted_path))
 
         if os.path.isfile(self.index_path):
-            self.index = faiss.read_index(self.index_path)
+            index = faiss.read_index(self.index_path)
         else:
-            self.index = faiss.IndexFlatL2(n_features)
-            self.index = faiss.IndexIDMap(self.index)
+            index = build_index(self.index_factory, n_features)
+            if not index.is_trained:
+                # Vectors are staged in a flat index until training
+                index = build_index(DEFAULT_INDEX_FACTORY, n_features)
+
+        # Whether the vectors are staged in a flat index, waiting for training
+        self.needs_training = self.index_factory != DEFAULT_INDEX_FACTORY and is_flat(
+            index
+        )
 
-        if self.gpu:
+        self.index = self._to_device(index)
+
+    def _to_device(self, index: faiss.Index) -> faiss.Index:
+        """Move an index to the GPU if enabled and supported by its type."""
+
+        if not self.gpu:
+            return index
+
+        try:
             self.resources = faiss.StandardGpuResources()
-            self.index = faiss.index_cpu_to_gpu(self.resources, 0, self.index)
+            return faiss.index_cpu_to_gpu(self.resources, 0, index)
+        except (AttributeError, RuntimeError):
+            # Not built with GPU support, or no GPU implementation (e.g. HNSW)
+            self.gpu = False
+            return index
+
+    def _cpu_index(self) -> faiss.Index:
+        """Get the index, copied to the CPU if it is on the GPU."""
+
+        return faiss.index_gpu_to_cpu(self.index) if self.gpu else self.index
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory used by the index.
+
+        Returns:
+            int: The estimated memory usage, in bytes (vectors and their IDs).
+        """
+
+        return self.index.ntotal * vector_size(self.index, self.n_features)
 
     def save(self) -> None:
-        """Save the index to a file."""
+        """
+        Save the index to a file. The file is replaced atomically, so that a
+        crash while saving never leaves a truncated index.
+
+        The IDs marked as deleted are saved to a sidecar file before the index,
+        and the sidecar is removed after it. A crash in between can only leave
+        deleted IDs that are no longer in the index, which is harmless, and
+        never removed vectors that are not marked as deleted.
+        """
+
+        with self._save_lock:
+            if len(self.deleted) > 0:
+                with open(f"{self.deleted_path}.tmp", "wb") as file:
+                    np.save(file, self.deleted)
+                os.replace(f"{self.deleted_path}.tmp", self.deleted_path)
+
+            index = self._cpu_index()
+            tmp_path = f"{self.index_path}.tmp"
+            faiss.write_index(index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+
+            if len(self.deleted) == 0 and os.path.isfile(self.deleted_path):
+                os.remove(self.deleted_path)
+
+            self.pending = 0
+
+    def flush(self) -> bool:
+        """
+        Save the index if it has unsaved changes.
+
+        Returns:
+            bool: Whether the index has been saved.
+        """
+
+        with self.lock.read():
+            # The storage may have been deleted since the changes
+            if self.pending == 0 or not os.path.isdir(os.path.dirname(self.index_path)):
+                return False
+            self.save()
+            return True
 
-        index = faiss.index_gpu_to_cpu(self.index) if self.gpu else self.index
-        faiss.write_index(index, self.index_path)
+    def discard(self) -> None:
+        """Forget the unsaved changes, e.g. when the storage is deleted."""
+
+        with self.lock.write():
+            self.pending = 0
+
+    def _changed(self, n_changes: int) -> None:
+        """Record changes, saving the index if too many are pending."""
+
+        self.pending += n_changes
+        if self.pending >= self.flush_max_pending:
+            self.save()
 
     def add(self, last_id: int, images: np.ndarray) -> List[int]:
         """
@@ -63,30 +192,129 @@ class Indexer:
         """
 
         ids = np.arange(last_id, last_id + images.shape[0])
-        self.index.add_with_ids(images, ids)
-        self.save()
+        with self.lock.write():
+            self.index.add_with_ids(images, ids)
+            self._changed(len(ids))
 
         return ids.tolist()
 
-    def remove(self, label: int) -> None:
+    def remove(self, labels: Iterable[int]) -> None:
         """
-        Remove an image from the given index.
+        Remove images from the index, at once.
 
         Args:
-            label (int): The ID of the image to be removed.
+            labels (Iterable[int]): The IDs of the images to be removed.
+        """
+
+        ids = np.unique(np.fromiter(labels, dtype=np.int64))
+        if len(ids) == 0:
+            return
+
+        with self.lock.write():
+            index = self._cpu_index()
+            if is_flat(index):
+                index.remove_ids(faiss.IDSelectorBatch(ids))
+                self.index = self._to_device(index)
+            else:
+                self._set_deleted(np.union1d(self.deleted, ids))
+
+            self._changed(len(ids))
+
+    def _set_deleted(self, deleted: np.ndarray) -> None:
+        """Set the IDs marked as deleted, and the selector excluding them from searches."""
+
+        self.deleted = deleted
+        self._deleted_selector = None
+        if len(deleted) > 0:
+            self._deleted_selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(deleted))
+
+    def compact(self) -> int:
+        """
+        Remove the vectors marked as deleted from the index.
+
+        Returns:
+            int: The number of removed vectors.
         """
 
-        id_selector = faiss.IDSelectorRange(label, label + 1)
+        with self.lock.write():
+            if len(self.deleted) == 0:
+                return 0
+
+            index = self._cpu_index()
+            if is_hnsw(index):
+                # HNSW graphs do not support removal, the graph is rebuilt
+                vectors = faiss.downcast_index(index.index).storage.reconstruct_n(
+                    0, index.ntotal
+                )
+                ids = faiss.vector_to_array(index.id_map)
+                kept = ~np.isin(ids, self.deleted)
+
+                index = build_index(self.index_factory, self.n_features)
+                index.add_with_ids(vectors[kept], ids[kept])
+                n_removed = int(np.count_nonzero(~kept))
+            else:
+                n_removed = index.remove_ids(faiss.IDSelectorBatch(self.deleted))
+
+            self.index = self._to_device(index)
+            self._set_deleted(np.empty(0, dtype=np.int64))
+            self.save()
+
+        return n_removed
+
+    def train(self, index_factory: Optional[str] = None) -> int:
+        """
+        Train the index with the vectors it contains, and move them to it.
+
+        This is also the migration path of existing flat indexes to another
+        type of index.
+
+        Args:
+            index_factory (Optional[str]): The FAISS factory string of the
+                trained index, defaults to the index factory of the storage.
+
+        Returns:
+            int: The number of vectors in the trained index.
+
+        Raises:
+            ValueError: If the index is not flat, or has too few vectors.
+        """
+
+        index_factory = index_factory or self.index_factory
+        trained = build_index(index_factory, self.n_features)
+
+        with self.lock.write():
+            index = self._cpu_index()
+            if not is_flat(index):
+                raise ValueError("Only flat indexes can be trained.")
+
+            n_vectors = index.ntotal
+            min_size = min_training_size(trained)
+            if n_vectors < min_size:
+                raise ValueError(
+                    f"Training '{index_factory}' needs at least {min_size} vectors, "
+                    f"the index has {n_vectors}."
+                )
+
+            vectors = faiss.downcast_index(index.index).reconstruct_n(0, n_vectors)
+            ids = faiss.vector_to_array(index.id_map)
+
+            if not trained.is_trained:
+                trained.train(vectors)
+            trained.add_with_ids(vectors, ids)
 
-        index = faiss.index_gpu_to_cpu(self.index) if self.gpu else self.index
-        index.remove_ids(id_selector)
+            self.index = self._to_device(trained)
+            self.index_factory = index_factory
+            self.needs_training = False
+            self.save()
 
-        self.save()
+        return n_vectors
 
     def search(
         self,
         image: np.ndarray,
         nrt_neigh: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
     ) -> Tuple[List[str], List[float]]:
         """
         Search similar images given a query image.
@@ -94,12 +322,18 @@ class Indexer:
         Args:
             image (np.array): The query image.
             nrt_neigh (int): The number of nearest neighbours to search.
+            nprobe (Optional[int]): Number of inverted lists visited (IVF indexes).
+            ef_search (Optional[int]): Size of the search queue (HNSW indexes).
 
         Returns:
             Tuple[List[str], List[float]]: the list of image IDs and their distances
         """
 
-        distances, labels = self.index.search(image, nrt_neigh)
+        with self.lock.read():
+            params = search_parameters(
+                self.index, nprobe, ef_search, self._deleted_selector
+            )
+            distances, labels = self.index.search(image, nrt_neigh, params=params)
         distances, labels = distances.squeeze().tolist(), labels.squeeze().tolist()
 
         if nrt_neigh == 1:
@@ -0,0 +1,198 @@
+"""Registry of the indexes loaded in memory."""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from cbir.retrieval.indexer import Indexer
+
+
+class _Entry:
+    """An index loaded in the registry."""
+
+    def __init__(self, indexer: Indexer) -> None:
+        self.indexer = indexer
+        self.users = 0
+
+
+class IndexRegistry:
+    """
+    Registry of the indexes loaded in memory, shared by all requests.
+
+    Indexes are loaded lazily, on first use, and kept in memory. When the
+    estimated memory used by the loaded indexes exceeds the budget, the
+    least recently used indexes that are not in use are unloaded, after
+    having saved their pending changes. Saving happens outside of the
+    registry lock; an index used again meanwhile is taken back as is.
+    """
+
+    def __init__(self, max_memory: int, flush_max_pending: int = 0) -> None:
+        """
+        Index registry initialisation.
+
+        Args:
+            max_memory (int): The memory budget for the loaded indexes, in bytes.
+            flush_max_pending (int): Number of unsaved changes triggering the
+                save of an index.
+        """
+
+        self.max_memory = max_memory
+        self.flush_max_pending = flush_max_pending
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Evicted indexes whose pending changes are being saved
+        self._unloading: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def use(
+        self,
+        data_path: str,
+        storage_name: str,
+        index_name: str,
+        n_features: int,
+        gpu: bool = False,
+    ) -> Iterator[Indexer]:
+        """
+        Use an index, loading it if needed. It is not unloaded while in use.
+
+        Args:
+            data_path (str): Path to the base storage.
+            storage_name (str): The name of the storage.
+            index_name (str): The name of the index.
+            n_features (int): Number of features in the index.
+            gpu (bool): Whether to use GPU for indexing or not.
+
+        Yields:
+            Indexer: The loaded index.
+        """
+
+        key = os.path.join(data_path, storage_name, index_name)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Its changes may not be saved yet, do not load it from disk
+                entry = self._unloading.pop(key, None)
+                if entry is not None:
+                    self._entries[key] = entry
+            if entry is not None:
+                entry.users += 1
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            # Loading can be slow, do not block the other indexes meanwhile
+            indexer = Indexer(
+                data_path,
+                storage_name,
+                index_name,
+                n_features,
+                gpu,
+                self.flush_max_pending,
+            )
+            with self._lock:
+                entry = self._entries.setdefault(key, _Entry(indexer))
+                entry.users += 1
+                self._entries.move_to_end(key)
+
+        try:
+            yield entry.indexer
+        finally:
+            with self._lock:
+                entry.users -= 1
+                evicted = self._evict()
+            self._unload_evicted(evicted)
+
+    def unload(self, data_path: str, storage_name: str) -> None:
+        """
+        Unload all the indexes of a storage, when the storage is deleted.
+        Their pending changes are discarded, not saved.
+
+        Args:
+            data_path (str): Path to the base storage.
+            storage_name (str): The name of the storage.
+        """
+
+        prefix = os.path.join(data_path, storage_name, "")
+        with self._lock:
+            entries = [
+                entries.pop(key)
+                for entries in (self._entries, self._unloading)
+                for key in [key for key in entries if key.startswith(prefix)]
+            ]
+
+        for entry in entries:
+            entry.indexer.discard()
+
+    def flush(self) -> int:
+        """
+        Save the pending changes of all the loaded indexes.
+
+        Returns:
+            int: The number of saved indexes.
+        """
+
+        with self._lock:
+            indexers = [entry.indexer for entry in self._entries.values()]
+        return sum(indexer.flush() for indexer in indexers)
+
+    def compact(self) -> int:
+        """
+        Remove the vectors marked as deleted from all the loaded indexes.
+
+        Returns:
+            int: The number of removed vectors.
+        """
+
+        with self._lock:
+            indexers = [entry.indexer for entry in self._entries.values()]
+        return sum(indexer.compact() for indexer in indexers)
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated memory used by the loaded indexes.
+
+        Returns:
+            int: The estimated memory usage, in bytes.
+        """
+
+        with self._lock:
+            return sum(e.indexer.memory_usage() for e in self._entries.values())
+
+    def _evict(self) -> List[Tuple[str, _Entry]]:
+        """
+        Remove least recently used indexes not in use, to fit in the budget.
+        Must be called with the registry lock held.
+
+        Returns:
+            List[Tuple[str, _Entry]]: The evicted indexes, whose pending changes
+                must be saved with `_unload_evicted()` once the lock is released.
+        """
+
+        evicted = []
+        usage = sum(e.indexer.memory_usage() for e in self._entries.values())
+        for key, entry in list(self._entries.items()):
+            if usage <= self.max_memory:
+                break
+            if entry.users == 0:
+                usage -= entry.indexer.memory_usage()
+                del self._entries[key]
+                self._unloading[key] = entry
+                evicted.append((key, entry))
+        return evicted
+
+    def _unload_evicted(self, evicted: List[Tuple[str, _Entry]]) -> None:
+        """Save the pending changes of evicted indexes, then forget them."""
+
+        for key, entry in evicted:
+            # Saving can be slow, do not block the other indexes meanwhile
+            entry.indexer.flush()
+            with self._lock:
+                if self._unloading.get(key) is entry:
+                    del self._unloading[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
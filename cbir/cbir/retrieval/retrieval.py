@@ -1,18 +1,66 @@
 """Image retrieval methods."""
 
+import heapq
 from io import BytesIO
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
 import torch
 from PIL import Image
 from torchvision import transforms
 
-from cbir.models.model import Model
-from cbir.models.utils import run_inference
 from cbir.retrieval.indexer import Indexer
 from cbir.retrieval.store import Store
 
 
+features_extraction = transforms.Compose(
+    [
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ]
+)
+
+
+def preprocess_images(images: List[bytes]) -> torch.Tensor:
+    """
+    Decode images and transform them into model inputs.
+
+    Args:
+        images (List[bytes]): The encoded images.
+
+    Returns:
+        torch.Tensor: The inputs, with shape (n_images, 3, 224, 224).
+    """
+
+    return torch.stack(
+        [features_extraction(Image.open(BytesIO(image)).convert("RGB")) for image in images]
+    )
+
+
+def merge_similarities(
+    similarities: Iterable[List[Tuple[str, float]]],
+    nrt_neigh: int,
+) -> List[Tuple[str, float]]:
+    """
+    Merge the similarities found in several indexes.
+
+    Args:
+        similarities (Iterable[List[Tuple[str, float]]]): The filename and distance
+            pairs found in each index.
+        nrt_neigh (int): The number of nearest neighbours to keep.
+
+    Returns:
+        List[Tuple[str, float]]: The nearest filename and distance pairs, sorted by distance.
+    """
+
+    return heapq.nsmallest(
+        nrt_neigh,
+        (result for results in similarities for result in results),
+        key=lambda x: x[1],
+    )
+
+
 class ImageRetrieval:
     """Image retrieval class."""
 
@@ -27,44 +75,26 @@ class ImageRetrieval:
         self.store = store
         self.indexer = indexer
 
-    def index_image(self, model: Model, image: bytes, filename: str) -> List[int]:
+    def index_features(self, features: np.ndarray, filenames: List[str]) -> List[int]:
         """
-        Index an image.
+        Index images given their features.
 
         Args:
-            model (Model): The model to extract features.
-            image (bytes): The image to be indexed.
-            filename (str): The name of the image.
+            features (np.ndarray): The features of the images.
+            filenames (List[str]): The names of the images.
 
         Returns:
-            List[int]: The IDs of the indexed images.
+            List[int]: The IDs of the indexed images, in the same order.
         """
 
-        features_extraction = transforms.Compose(
-            [
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(
-                    mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]
-                ),
-            ]
-        )
-
-        # Create a dataset of one image
-        inputs = features_extraction(Image.open(BytesIO(image)).convert("RGB"))
-        inputs = torch.unsqueeze(inputs, dim=0)
-
-        outputs = run_inference(model, inputs)
+        first_id = self.store.allocate(len(filenames))
+        ids = self.indexer.add(first_id, features)
 
-        last_id = self.store.last()
-        ids = self.indexer.add(last_id, outputs)
-
-        for tag in ids:
-            label = str(tag)
-            self.store.set(filename, label)
-            self.store.set(label, filename)
-
-        self.store.set("last_id", str(ids[-1] + 1))
+        mapping = {}
+        for tag, filename in zip(ids, filenames):
+            mapping[filename] = str(tag)
+            mapping[str(tag)] = filename
+        self.store.set_many(mapping)
 
         return ids
 
@@ -79,48 +109,53 @@ class ImageRetrieval:
             Optional[int]: The ID of the removed image or None if it does not exist.
         """
 
-        label = int(self.store.get(name) or "-1")
+        return self.remove_images([name])[0]
 
-        self.indexer.remove(label)
-        self.store.remove(name)
+    def remove_images(self, names: List[str]) -> List[Optional[int]]:
+        """
+        Remove several images at once.
 
-        return label
+        Args:
+            names (List[str]): The names of the images to be removed.
+
+        Returns:
+            List[Optional[int]]: The IDs of the removed images, in the same order,
+                None for the images that do not exist.
+        """
 
-    def search(
+        labels = [
+            int(label) if label is not None else None
+            for label in self.store.get_many(names)
+        ]
+        removed = [label for label in labels if label is not None]
+
+        self.indexer.remove(removed)
+        self.store.remove(*names, *(str(label) for label in removed))
+
+        return labels
+
+    def search_features(
         self,
-        model: Model,
-        image: bytes,
+        features: np.ndarray,
         nrt_neigh: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
     ) -> List[Tuple[str, float]]:
         """
-        Search for similar images.
+        Search for similar images given the features of a query image.
 
         Args:
-            model (Model): The model to extract features.
-            image (bytes): The query image.
+            features (np.ndarray): The features of the query image.
             nrt_neigh (int): The number of nearest neighbours to search.
+            nprobe (Optional[int]): Number of inverted lists visited (IVF indexes).
+            ef_search (Optional[int]): Size of the search queue (HNSW indexes).
 
         Returns:
             List[Tuple[str, float]]: The list of filename and distance pairs.
         """
 
-        features_extraction = transforms.Compose(
-            [
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(
-                    mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]
-                ),
-            ]
-        )
-
-        # Create a dataset of one image
-        inputs = features_extraction(Image.open(BytesIO(image)).convert("RGB"))
-        inputs = torch.unsqueeze(inputs, dim=0)
-
-        outputs = run_inference(model, inputs)
-
-        labels, distances = self.indexer.search(outputs, nrt_neigh)
-        filenames = [self.store.get(str(label)) or "" for label in labels]
+        labels, distances = self.indexer.search(features, nrt_neigh, nprobe, ef_search)
+        filenames = self.store.get_many([str(label) for label in labels])
+        filenames = [filename or "" for filename in filenames]
 
         return list(zip(filenames, distances))
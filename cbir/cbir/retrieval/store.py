@@ -1,6 +1,6 @@
 """Store module"""
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 from redis import Redis  # type: ignore
 
@@ -42,6 +42,26 @@ class Store:
         value = self.redis.get(f"{self.prefix}:{key}")
         return value.decode("UTF-8") if value is not None else None  # type: ignore
 
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        Retrieves the values associated with the given keys in a single round-trip.
+
+        Args:
+            keys (List[str]): The keys whose values are to be retrieved.
+
+        Returns:
+            List[Optional[str]]: The values for the given keys, None for the keys
+                that do not exist.
+        """
+        if not keys:
+            return []
+
+        values = self.redis.mget([f"{self.prefix}:{key}" for key in keys])
+        return [
+            value.decode("UTF-8") if value is not None else None  # type: ignore
+            for value in values  # type: ignore
+        ]
+
     def set(self, key: str, value: str) -> None:
         """
         Sets the value for the specified key in the Redis database.
@@ -52,6 +72,28 @@ class Store:
         """
         self.redis.set(f"{self.prefix}:{key}", value)
 
+    def set_many(self, mapping: Dict[str, str]) -> None:
+        """
+        Sets the values for several keys in a single round-trip.
+
+        Args:
+            mapping (Dict[str, str]): The values to be set, by key.
+        """
+        if mapping:
+            self.redis.mset({f"{self.prefix}:{k}": v for k, v in mapping.items()})
+
+    def allocate(self, count: int) -> int:
+        """
+        Atomically reserves consecutive IDs, safe under concurrent indexing.
+
+        Args:
+            count (int): The number of IDs to reserve.
+
+        Returns:
+            int: The first reserved ID.
+        """
+        return int(self.redis.incrby(f"{self.prefix}:last_id", count)) - count  # type: ignore
+
     def last(self) -> int:
         """
         Retrieves the value of the key "last_id".
@@ -73,11 +115,13 @@ class Store:
         """
         return self.get(key) is not None
 
-    def remove(self, key: str) -> None:
+    def remove(self, *keys: str) -> None:
         """
-        Deletes the value associated with the specified key from the Redis database.
+        Deletes the values associated with the specified keys from the Redis database.
 
         Args:
-            key (str): The key to be deleted.
+            keys (str): The keys to be deleted.
         """
-        self.redis.delete(f"{self.prefix}:{key}")
+        if not keys:
+            return
+        self.redis.delete(*(f"{self.prefix}:{key}" for key in keys))
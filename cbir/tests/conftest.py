@@ -11,6 +11,10 @@ from redis import Redis  # type: ignore
 
 from cbir import app as main
 from cbir import config
+from cbir.models.batcher import InferenceBatcher
+from cbir.models.utils import get_model_hash
+from cbir.retrieval.cache import EmbeddingCache
+from cbir.retrieval.registry import IndexRegistry
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -71,6 +75,18 @@ def app(test_directory: str) -> FastAPI:
     )
 
     main.app.state.model = main.load_model(get_settings(test_directory))
+    main.app.state.batcher = InferenceBatcher(
+        main.app.state.model,
+        get_settings(test_directory).inference_batch_size,
+        get_settings(test_directory).inference_max_wait / 1000,
+    )
+    main.app.state.embeddings = EmbeddingCache(
+        get_model_hash(get_settings(test_directory)),
+        get_settings(test_directory).embedding_cache_size,
+    )
+    main.app.state.indexes = IndexRegistry(
+        get_settings(test_directory).index_max_memory * 1024 * 1024
+    )
 
     return main.app
 
@@ -0,0 +1,110 @@
+"""Inference batcher tests"""
+
+import asyncio
+import threading
+from typing import List
+
+import numpy as np
+import pytest
+import torch
+
+from cbir.models import batcher as batcher_module
+from cbir.models.batcher import InferenceBatcher
+
+
+def test_batcher_groups_concurrent_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that concurrent requests are run in batches, and each request gets its outputs.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): The monkeypatch fixture.
+    """
+
+    batch_sizes: List[int] = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_inference(_, inputs: torch.Tensor) -> np.ndarray:
+        started.set()
+        release.wait()
+        batch_sizes.append(len(inputs))
+        return inputs.flatten(1).numpy() * 2
+
+    monkeypatch.setattr(batcher_module, "run_inference", run_inference)
+    batcher = InferenceBatcher(None, max_batch_size=4, max_wait=0)  # type: ignore
+
+    # The first request is run alone, the others queue up meanwhile
+    first = batcher.submit(torch.zeros((1, 1)))
+    started.wait()
+    futures = [batcher.submit(torch.full((1, 1), float(i))) for i in range(5)]
+    release.set()
+
+    assert first.result().tolist() == [[0]]
+    assert [future.result().tolist() for future in futures] == [
+        [[2 * i]] for i in range(5)
+    ]
+    assert batch_sizes == [1, 4, 1]
+
+    batcher.close()
+
+
+def test_batcher_propagates_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that inference errors are raised to the requests of the batch.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): The monkeypatch fixture.
+    """
+
+    def run_inference(*_) -> np.ndarray:
+        raise ValueError("Unsupported extractor")
+
+    monkeypatch.setattr(batcher_module, "run_inference", run_inference)
+    batcher = InferenceBatcher(None, max_batch_size=4, max_wait=0.001)  # type: ignore
+
+    with pytest.raises(ValueError):
+        batcher.run(torch.zeros((2, 1)))
+
+    batcher.close()
+
+
+def test_batcher_drops_cancelled_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that a request cancelled by its caller while queued is dropped, and
+    that later requests are still processed.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): The monkeypatch fixture.
+    """
+
+    batch_sizes: List[int] = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_inference(_, inputs: torch.Tensor) -> np.ndarray:
+        started.set()
+        release.wait()
+        batch_sizes.append(len(inputs))
+        return inputs.flatten(1).numpy()
+
+    monkeypatch.setattr(batcher_module, "run_inference", run_inference)
+    batcher = InferenceBatcher(None, max_batch_size=4, max_wait=0)  # type: ignore
+
+    async def main() -> np.ndarray:
+        first = batcher.submit(torch.zeros((1, 1)))
+        started.wait()
+
+        cancelled = asyncio.ensure_future(batcher.infer(torch.ones((2, 1))))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        release.set()
+        assert first.result().tolist() == [[0]]
+        return await asyncio.wait_for(batcher.infer(torch.full((1, 1), 3.0)), timeout=5)
+
+    assert asyncio.run(main()).tolist() == [[3]]
+    assert batch_sizes == [1, 1]
+
+    batcher.close()
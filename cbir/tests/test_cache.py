@@ -0,0 +1,95 @@
+"""Embedding cache tests"""
+
+import os
+import time
+
+import numpy as np
+from redis import Redis  # type: ignore
+
+from cbir.config import Settings
+from cbir.models.utils import get_model_hash
+from cbir.retrieval.cache import EmbeddingCache
+
+
+def test_embedding_cache_lru() -> None:
+    """Test that the least recently used features are evicted from memory."""
+
+    cache = EmbeddingCache("resnet:abc", max_size=2)
+    keys = [cache.key(bytes([i])) for i in range(3)]
+
+    cache.set(keys[0], np.zeros((1, 4), dtype=np.float32))
+    cache.set(keys[1], np.ones((1, 4), dtype=np.float32))
+    assert cache.get(keys[0]) is not None
+
+    cache.set(keys[2], np.ones((1, 4), dtype=np.float32))
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).tolist() == [[0, 0, 0, 0]]  # type: ignore
+
+
+def test_embedding_cache_key_includes_model() -> None:
+    """Test that features computed by another model are not reused."""
+
+    image = b"image"
+    assert EmbeddingCache("resnet:abc", 1).key(image) != EmbeddingCache(
+        "resnet:def", 1
+    ).key(image)
+    assert EmbeddingCache("resnet:abc", 1).key(image) == EmbeddingCache(
+        "resnet:abc", 1
+    ).key(image)
+
+
+def test_model_hash(test_directory: str) -> None:
+    """
+    Test that the model fingerprint changes with the extractor or its weights.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    weights = os.path.join(test_directory, "weights")
+    with open(weights, "wb") as file:
+        file.write(b"weights")
+
+    resnet = Settings(extractor="resnet", weights=weights)
+    model_hash = get_model_hash(resnet)
+    assert model_hash == get_model_hash(resnet)
+    assert model_hash != get_model_hash(Settings(extractor="hoptim", weights=weights))
+
+    assert os.path.exists(f"{weights}.sha256")
+
+    # Other weights of the same size, copied with their modification time
+    stat = os.stat(weights)
+    time.sleep(0.05)  # Status change times have a coarse resolution
+    with open(weights, "wb") as file:
+        file.write(b"WEIGHTS")
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    new_hash = get_model_hash(resnet)
+    assert new_hash != model_hash
+
+    # Same weights, touched
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert get_model_hash(resnet) == new_hash
+
+
+def test_embedding_cache_redis(redis_client: Redis) -> None:
+    """
+    Test that features are shared through Redis, when enabled.
+
+    Args:
+        redis_client (Redis): A Redis client instance.
+    """
+
+    features = np.arange(4, dtype=np.float32).reshape(1, 4)
+
+    cache = EmbeddingCache("resnet:abc", max_size=8, redis_ttl=60)
+    key = cache.key(b"image")
+    cache.set(key, features, redis_client)
+
+    other = EmbeddingCache("resnet:abc", max_size=8, redis_ttl=60)
+    assert other.get(key) is None
+    assert other.get(key, redis_client).tolist() == features.tolist()  # type: ignore
+    assert len(other) == 1
+
+    disabled = EmbeddingCache("resnet:abc", max_size=8)
+    assert disabled.get(key, redis_client) is None
@@ -0,0 +1,192 @@
+"""Indexer tests"""
+
+import os
+
+import faiss
+import numpy as np
+import pytest
+
+from cbir.retrieval.factory import read_index_factory, write_index_factory
+from cbir.retrieval.indexer import Indexer
+
+
+def _features(n_vectors: int, n_features: int = 8) -> np.ndarray:
+    """Random features to index."""
+
+    return np.random.default_rng(0).random((n_vectors, n_features), dtype=np.float32)
+
+
+def test_indexer_default_factory(test_directory: str) -> None:
+    """
+    Test that storages without configuration have exact flat indexes.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    indexer = Indexer(test_directory, "storage", "index", 8)
+
+    assert read_index_factory(os.path.join(test_directory, "storage")) == "Flat"
+    assert not indexer.needs_training
+    assert indexer.memory_usage() == 0
+
+    indexer.add(0, _features(10))
+    assert indexer.memory_usage() == 10 * (8 * 4 + 8)
+
+
+def test_indexer_train_ivf(test_directory: str) -> None:
+    """
+    Test that IVF indexes stage vectors in a flat index until trained.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    storage_path = os.path.join(test_directory, "storage")
+    os.mkdir(storage_path)
+    write_index_factory(storage_path, "IVF4,Flat")
+
+    features = _features(200)
+    indexer = Indexer(test_directory, "storage", "index", 8)
+    assert indexer.needs_training
+
+    indexer.add(0, features[:2])
+    with pytest.raises(ValueError):
+        indexer.train()
+
+    indexer.add(2, features[2:])
+    assert indexer.train() == 200
+    assert not indexer.needs_training
+
+    # Visiting all the lists gives exact results, with the original IDs
+    labels, distances = indexer.search(features[10:11], 1, nprobe=4)
+    assert labels == [10]
+    assert distances[0] == pytest.approx(0)
+
+    with pytest.raises(ValueError):
+        indexer.train()
+
+    loaded = Indexer(test_directory, "storage", "index", 8)
+    assert not loaded.needs_training
+    assert loaded.index.ntotal == 200
+
+
+def test_indexer_migrate_to_hnsw(test_directory: str) -> None:
+    """
+    Test the migration of an existing flat index to an HNSW index.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    features = _features(100)
+    indexer = Indexer(test_directory, "storage", "index", 8)
+    indexer.add(5, features)
+
+    assert indexer.train("HNSW8") == 100
+    assert indexer.index_factory == "HNSW8"
+    assert indexer.memory_usage() > 100 * (8 * 4 + 8)
+
+    labels, _ = indexer.search(features[:1], 3, ef_search=64)
+    assert labels[0] == 5
+
+
+def test_indexer_bulk_remove(test_directory: str) -> None:
+    """
+    Test that several vectors are removed from a flat index at once.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    features = _features(10)
+    indexer = Indexer(test_directory, "storage", "index", 8)
+    indexer.add(0, features)
+
+    indexer.remove([1, 3, 3, 42])
+    assert indexer.index.ntotal == 8
+    assert len(indexer.deleted) == 0
+    assert 3 not in indexer.search(features[3:4], 10)[0]
+
+
+@pytest.mark.parametrize("index_factory", ["HNSW8", "IVF4,Flat"])
+def test_indexer_remove_and_compact(test_directory: str, index_factory: str) -> None:
+    """
+    Test that vectors removed from approximate indexes are excluded from searches,
+    until they are removed by compaction.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+        index_factory (str): The FAISS factory string.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    features = _features(200)
+    indexer = Indexer(test_directory, "storage", "index", 8)
+    indexer.add(0, features)
+    indexer.train(index_factory)
+
+    indexer.remove([0, 1])
+    assert indexer.index.ntotal == 200
+    labels, _ = indexer.search(features[:1], 5, nprobe=4)
+    assert 0 not in labels
+    assert len(labels) == 5
+
+    # Deleted vectors are kept excluded after a reload
+    indexer.save()
+    loaded = Indexer(test_directory, "storage", "index", 8)
+    assert loaded.deleted.tolist() == [0, 1]
+
+    assert loaded.compact() == 2
+    assert loaded.index.ntotal == 198
+    assert loaded.compact() == 0
+    assert 0 not in loaded.search(features[:1], 5, nprobe=4)[0]
+    assert not os.path.exists(loaded.deleted_path)
+
+
+def test_indexer_deleted_saved_before_index(
+    test_directory: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a crash while saving the index never loses vectors marked as deleted.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+        monkeypatch (pytest.MonkeyPatch): The monkeypatch fixture.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    features = _features(200)
+    indexer = Indexer(test_directory, "storage", "index", 8)
+    indexer.add(0, features)
+    indexer.train("HNSW8")
+    indexer.save()
+
+    def crash(*_) -> None:
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(faiss, "write_index", crash)
+    with pytest.raises(OSError):
+        indexer.remove([0, 1])
+
+    loaded = Indexer(test_directory, "storage", "index", 8)
+    assert loaded.index.ntotal == 200
+    assert loaded.deleted.tolist() == [0, 1]
+
+
+def test_indexer_invalid_factory(test_directory: str) -> None:
+    """
+    Test that invalid index factories are rejected.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    indexer = Indexer(test_directory, "storage", "index", 8)
+
+    with pytest.raises(ValueError):
+        indexer.train("IVF4,PQ3")
@@ -0,0 +1,236 @@
+"""Index registry tests"""
+
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cbir.app import run_periodically
+from cbir.retrieval.indexer import Indexer
+from cbir.retrieval.lock import ReadWriteLock
+from cbir.retrieval.registry import IndexRegistry
+
+
+def test_registry_keeps_index_loaded(test_directory: str) -> None:
+    """
+    Test that an index is loaded once and shared between uses.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    registry = IndexRegistry(max_memory=2**30)
+
+    with registry.use(test_directory, "storage", "index", 4) as indexer:
+        indexer.index.add_with_ids(np.ones((1, 4), dtype=np.float32), np.array([0]))
+
+    with registry.use(test_directory, "storage", "index", 4) as other:
+        assert other is indexer
+        assert other.index.ntotal == 1
+
+    assert len(registry) == 1
+
+
+def test_registry_eviction(test_directory: str) -> None:
+    """
+    Test that least recently used indexes are unloaded to fit in the memory budget,
+    but never while in use.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    features = np.ones((10, 4), dtype=np.float32)
+    registry = IndexRegistry(max_memory=300)
+
+    with registry.use(test_directory, "storage", "a", 4) as a:
+        a.index.add_with_ids(features, np.arange(10))
+    with registry.use(test_directory, "storage", "b", 4) as b:
+        b.index.add_with_ids(features, np.arange(10))
+
+    assert len(registry) == 1
+    with registry.use(test_directory, "storage", "a", 4) as indexer:
+        assert indexer is not a
+        indexer.index.add_with_ids(features, np.arange(20, 30))
+        with registry.use(test_directory, "storage", "b", 4) as indexer_b:
+            assert indexer_b is b
+        # Index "a" is in use
+        assert len(registry) == 1
+
+
+def test_registry_unload(test_directory: str) -> None:
+    """
+    Test unloading the indexes of a storage.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    registry = IndexRegistry(max_memory=2**30)
+    for storage in ("storage", "storage2"):
+        with registry.use(test_directory, storage, "index", 4):
+            pass
+
+    registry.unload(test_directory, "storage")
+    assert len(registry) == 1
+
+
+def test_read_write_lock() -> None:
+    """Test that readers share the lock while a writer holds it alone."""
+
+    lock = ReadWriteLock()
+    events = []
+
+    def read() -> None:
+        with lock.read():
+            events.append("read")
+            time.sleep(0.05)
+
+    def write() -> None:
+        with lock.write():
+            events.append("write start")
+            time.sleep(0.05)
+            events.append("write end")
+
+    threads = [threading.Thread(target=f) for f in (read, read, write, read)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    start = events.index("write start")
+    assert events[start + 1] == "write end"
+    assert events.count("read") == 3
+
+
+def test_indexer_write_behind(test_directory: str) -> None:
+    """
+    Test that changes are saved once enough are pending or on flush.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    features = np.ones((2, 4), dtype=np.float32)
+    indexer = Indexer(test_directory, "storage", "index", 4, flush_max_pending=3)
+
+    indexer.add(0, features)
+    assert not os.path.exists(indexer.index_path)
+    assert indexer.pending == 2
+
+    indexer.add(2, features)
+    assert os.path.exists(indexer.index_path)
+    assert indexer.pending == 0
+
+    indexer.remove([0])
+    assert indexer.flush()
+    assert not indexer.flush()
+    assert Indexer(test_directory, "storage", "index", 4).index.ntotal == 3
+
+
+def test_registry_flush_on_eviction(test_directory: str) -> None:
+    """
+    Test that pending changes are saved when an index is unloaded.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    registry = IndexRegistry(max_memory=0, flush_max_pending=1000)
+
+    with registry.use(test_directory, "storage", "index", 4) as indexer:
+        indexer.add(0, np.ones((2, 4), dtype=np.float32))
+        assert indexer.pending == 2
+
+    assert len(registry) == 0
+    assert indexer.pending == 0
+
+
+def test_registry_flush_outside_lock(test_directory: str, monkeypatch) -> None:
+    """
+    Test that saving an evicted index does not block the other indexes, and
+    that an index used again while being saved is taken back.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+        monkeypatch: The pytest monkeypatch fixture.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    registry = IndexRegistry(max_memory=0, flush_max_pending=1000)
+    flushing = threading.Event()
+    release = threading.Event()
+    flush = Indexer.flush
+
+    def slow_flush(self: Indexer) -> bool:
+        if not flushing.is_set():  # only the first save is slow
+            flushing.set()
+            release.wait(5)
+        return flush(self)
+
+    monkeypatch.setattr(Indexer, "flush", slow_flush)
+
+    def use_a() -> None:
+        with registry.use(test_directory, "storage", "a", 4) as indexer:
+            indexer.add(0, np.ones((2, 4), dtype=np.float32))
+
+    thread = threading.Thread(target=use_a)
+    thread.start()
+    assert flushing.wait(5)
+
+    with registry.use(test_directory, "storage", "b", 4):
+        pass
+    with registry.use(test_directory, "storage", "a", 4) as indexer:
+        assert indexer.index.ntotal == 2
+
+    release.set()
+    thread.join()
+    assert len(registry) == 0
+
+
+def test_registry_unload_discards_pending(test_directory: str) -> None:
+    """
+    Test that unloading the indexes of a storage discards their pending changes.
+
+    Args:
+        test_directory (str): The path to the temporary directory.
+    """
+
+    os.mkdir(os.path.join(test_directory, "storage"))
+    registry = IndexRegistry(max_memory=2**30, flush_max_pending=1000)
+
+    with registry.use(test_directory, "storage", "index", 4) as indexer:
+        indexer.add(0, np.ones((2, 4), dtype=np.float32))
+
+    registry.unload(test_directory, "storage")
+    assert indexer.pending == 0
+    assert not indexer.flush()
+    assert not os.path.exists(indexer.index_path)
+
+
+def test_periodic_task_survives_errors() -> None:
+    """Test that a failed periodic run does not stop the next ones."""
+
+    runs = []
+
+    def flush() -> None:
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise OSError("No space left on device")
+
+    async def run() -> None:
+        task = asyncio.create_task(run_periodically(flush, 0))
+        while len(runs) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert len(runs) >= 3
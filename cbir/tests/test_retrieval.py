@@ -145,3 +145,83 @@ def test_remove_image(client: TestClient) -> None:
         "storage": storage_name,
         "index": index_name,
     }
+
+
+def test_index_images_batch(client: TestClient) -> None:
+    """
+    Test 'POST /api/images/batch' endpoint.
+
+    Args:
+        client: A test client instance used to send requests to the application.
+    """
+
+    storage_name = "test_storage"
+    index_name = "test_index"
+
+    response = client.post("/api/storages", json={"name": storage_name})
+    assert response.status_code == 200
+
+    with open("tests/data/image.png", "rb") as image:
+        content = image.read()
+
+    response = client.post(
+        "/api/images/batch",
+        files=[
+            ("images", ("image1.png", content)),
+            ("images", ("image2.png", content)),
+        ],
+        params={"storage": storage_name, "index": index_name},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "ids": [0, 1],
+        "storage": storage_name,
+        "index": index_name,
+    }
+
+
+def test_remove_images(client: TestClient) -> None:
+    """
+    Test 'POST /api/images/remove' endpoint.
+
+    Args:
+        client: A test client instance used to send requests to the application.
+    """
+
+    storage_name = "test_storage"
+    index_name = "test_index"
+
+    response = client.post("/api/storages", json={"name": storage_name})
+    assert response.status_code == 200
+
+    with open("tests/data/image.png", "rb") as image:
+        content = image.read()
+
+    response = client.post(
+        "/api/images/batch",
+        files=[("images", (f"image{i}.png", content)) for i in range(3)],
+        params={"storage": storage_name, "index": index_name},
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/api/images/remove",
+        json={"filenames": ["image0.png", "unknown.png", "image2.png"]},
+        params={"storage": storage_name, "index": index_name},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "ids": [0, 2],
+        "not_found": ["unknown.png"],
+        "storage": storage_name,
+        "index": index_name,
+    }
+
+    response = client.post(
+        "/api/images/remove",
+        json={"filenames": []},
+        params={"storage": storage_name, "index": index_name},
+    )
+    assert response.status_code == 422
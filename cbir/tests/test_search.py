@@ -2,6 +2,8 @@
 
 from fastapi.testclient import TestClient
 
+from cbir.retrieval.retrieval import merge_similarities
+
 
 def test_search_one_image(client: TestClient) -> None:
     """
@@ -113,3 +115,14 @@ def test_search_images(client: TestClient) -> None:
     assert response.status_code == 200
     assert "similarities" in data
     assert isinstance(data["similarities"], list)
+
+
+def test_merge_similarities() -> None:
+    """Test the top-k merge of the similarities found in several indexes."""
+
+    similarities = merge_similarities(
+        [[("a", 0.1), ("b", 0.5)], [], [("c", 0.2), ("d", 0.3)]],
+        nrt_neigh=3,
+    )
+
+    assert similarities == [("a", 0.1), ("c", 0.2), ("d", 0.3)]
@@ -1,7 +1,15 @@
 """Storage tests"""
 
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from cbir.retrieval.indexer import Indexer
+
 
 def test_get_storages(client: TestClient) -> None:
     """
@@ -68,7 +76,7 @@ def test_get_storage(client: TestClient) -> None:
 
     response = client.get(f"/api/storages/{storage_name}")
     assert response.status_code == 200
-    assert response.json() == {"name": storage_name}
+    assert response.json() == {"name": storage_name, "index_factory": "Flat"}
 
 
 def test_get_storage_not_found(client: TestClient) -> None:
@@ -123,3 +131,50 @@ def test_delete_storage_not_found(client: TestClient) -> None:
     assert response.json() == {
         "detail": f"Storage with name '{storage_name}' not found."
     }
+
+
+def test_storage_indexes_outside_event_loop(app: FastAPI, client: TestClient) -> None:
+    """
+    Test that training and deleting a storage load, save and unload its
+    indexes outside of the event loop, as they may wait for other requests.
+
+    Args:
+        app (FastAPI): The FastAPI application instance to be tested.
+        client: A test client instance used to send requests to the application.
+    """
+
+    def in_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    indexes = app.state.indexes
+    calls = []
+    use, unload = indexes.use, indexes.unload
+
+    @contextmanager
+    def checked_use(*args: Any) -> Iterator[Indexer]:
+        calls.append(("use", in_event_loop()))
+        with use(*args) as indexer:
+            yield indexer
+        calls.append(("release", in_event_loop()))
+
+    def checked_unload(*args: Any) -> None:
+        calls.append(("unload", in_event_loop()))
+        unload(*args)
+
+    indexes.use, indexes.unload = checked_use, checked_unload
+
+    storage_name = "test_storage"
+    response = client.post("/api/storages", json={"name": storage_name})
+    assert response.status_code == 200
+
+    response = client.post(f"/api/storages/{storage_name}/train")
+    assert response.status_code == 200
+
+    response = client.delete(f"/api/storages/{storage_name}")
+    assert response.status_code == 200
+
+    assert calls == [("use", False), ("release", False), ("unload", False)]
@@ -0,0 +1,43 @@
+"""Store tests"""
+
+from redis import Redis  # type: ignore
+
+from cbir.retrieval.store import Store
+
+
+def test_store_many(redis_client: Redis) -> None:
+    """
+    Test that several values are set, retrieved and deleted at once.
+
+    Args:
+        redis_client (Redis): A Redis client instance.
+    """
+
+    store = Store("storage", redis_client)
+    store.set_many({"0": "a.png", "a.png": "0", "1": "b.png", "b.png": "1"})
+
+    assert store.get_many(["1", "2", "0"]) == ["b.png", None, "a.png"]
+    assert store.get_many([]) == []
+
+    store.remove()
+    store.remove("a.png", "0")
+    assert not store.contains("a.png")
+    assert store.get_many(["0", "1"]) == [None, "b.png"]
+
+
+def test_store_allocate(redis_client: Redis) -> None:
+    """
+    Test that consecutive IDs are reserved without overlap.
+
+    Args:
+        redis_client (Redis): A Redis client instance.
+    """
+
+    store = Store("storage", redis_client)
+
+    assert store.allocate(3) == 0
+    assert store.allocate(1) == 3
+    assert store.last() == 4
+
+    # IDs of other indexes are independent
+    assert Store("storage", redis_client, "other").allocate(2) == 0
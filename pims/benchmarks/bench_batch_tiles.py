@@ -0,0 +1,95 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from unittest import mock
+
+import numpy as np
+from fastapi.testclient import TestClient
+from pyvips import Image as VIPSImage
+
+from pims.config import get_settings
+
+DISPLAY = {"channels": [0, 1, 2], "min_intensities": [10], "max_intensities": [240]}
+
+
+def make_image(root: str, width: int, height: int) -> str:
+    """Write a synthetic pyramidal RGB TIFF, as an imported image."""
+    upload = os.path.join(root, "upload-bench")
+    processed = os.path.join(upload, "processed")
+    os.makedirs(processed, exist_ok=True)
+
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    upload_path = os.path.join(upload, "image.tif")
+    VIPSImage.new_from_array(arr).tiffsave(
+        upload_path, pyramid=True, tile=True, tile_width=256, tile_height=256,
+        compression="jpeg"
+    )
+    for stem in ("original", "visualisation"):
+        os.symlink(upload_path, os.path.join(processed, f"{stem}.PYRTIFF"))
+    return "upload-bench/image.tif"
+
+
+def bench_single(client, filepath, tiles):
+    start = time.perf_counter()
+    for tile in tiles:
+        response = client.post(
+            f"/image/{filepath}/normalized-tile.webp", json={"tile": tile, **DISPLAY}
+        )
+        assert response.status_code == 200
+    return len(tiles) / (time.perf_counter() - start)
+
+
+def bench_batch(client, filepath, tiles):
+    start = time.perf_counter()
+    response = client.post(
+        f"/image/{filepath}/normalized-tiles.webp", json={"tiles": tiles, **DISPLAY}
+    )
+    assert response.status_code == 200
+    return len(tiles) / (time.perf_counter() - start)
+
+
+# Run me with: CONFIG_FILE=/path/to/config.env python benchmarks/bench_batch_tiles.py
+if __name__ == '__main__':
+    parser = ArgumentParser(prog="Benchmark tiles of a viewport (tiles/sec), one by one or in a batch.")
+    parser.add_argument('--width', type=int, default=8192)
+    parser.add_argument('--height', type=int, default=8192)
+    parser.add_argument('--tiles', type=int, default=32)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as root, \
+            mock.patch.object(get_settings(), "root", root):
+        from pims import application as main
+
+        filepath = make_image(root, params.width, params.height)
+        # Startup events are not run, so that the response cache is disabled
+        client = TestClient(main.app)
+        # Zoom in the pyramid with at least the requested number of tiles
+        info = client.get(f"/image/{filepath}/info/normalized-pyramid").json()
+        tier = next(t for t in info["tiers"] if t["n_tiles"] >= params.tiles)
+        tiles = [{"zoom": tier["zoom"], "ti": ti} for ti in range(params.tiles)]
+        print(f"{params.tiles} tiles at zoom {tier['zoom']} of a "
+              f"{params.width}x{params.height} image (response cache disabled)")
+
+        single = bench_single(client, filepath, tiles)
+        print(f"  Before (one request per tile): {single:.1f} tiles/sec")
+
+        batch = bench_batch(client, filepath, tiles)
+        print(f"  After (one batch request, {get_settings().n_threads_batch_tiles} "
+              f"tiles at once): {batch:.1f} tiles/sec")
+        print(f"  Speedup: x{batch / single:.2f}")
@@ -0,0 +1,104 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import sys
+import time
+from argparse import ArgumentParser
+from unittest import mock
+
+import numpy as np
+from pyvips import Image as VIPSImage
+
+from pims.api.utils.mimetype import OutputExtension
+from pims.api.utils.models import ChannelReduction, GenericReduction
+from pims.cache.lut import LookUpTableCache
+from pims.processing import image_response
+from pims.processing.colormaps import ALL_COLORMAPS, combine_stacked_lut
+from pims.processing.image_response import ProcessedView
+from pims.processing.pixels import ImagePixels
+
+COLORMAPS = ["RED", "GREEN", "BLUE", "CYAN", "MAGENTA", "YELLOW"]
+
+
+class FakeImage:
+    def __init__(self, bitdepth: int):
+        self.max_value = 2 ** bitdepth - 1
+
+
+class BenchView(ProcessedView):
+    """A tile response whose raw pixels are already in memory, as numpy array."""
+    def __init__(self, pixels: np.ndarray, bitdepth: int):
+        n_channels = pixels.shape[2]
+        super().__init__(
+            FakeImage(bitdepth), list(range(n_channels)), [0], [0],
+            OutputExtension.PNG, pixels.shape[1], pixels.shape[0], 8,
+            ChannelReduction.ADD, GenericReduction.MAX, GenericReduction.MAX,
+            gammas=[0.8] * n_channels, filters=[],
+            colormaps=[ALL_COLORMAPS[COLORMAPS[c % len(COLORMAPS)]] for c in range(n_channels)],
+            min_intensities=[100] * n_channels,
+            max_intensities=[2 ** bitdepth - 100] * n_channels,
+            log=False, threshold=None
+        )
+        self.pixels = pixels
+
+    def raw_view(self, c, z, t):
+        return self.pixels
+
+
+def process_before(view: BenchView) -> ImagePixels:
+    """LUT processing as done before: LUT computed for every tile and applied by libvips."""
+    lut = combine_stacked_lut(view._math_lut(), view._colormap_lut())  # noqa
+    pixels = ImagePixels(view.raw_view(*view.raw_view_planes()))
+    pixels.transition_to(VIPSImage)
+    return pixels.apply_lut_stack(lut, view.c_reduction, view.is_rgb)
+
+
+def process_after(view: BenchView) -> ImagePixels:
+    pixels = ImagePixels(view.raw_view(*view.raw_view_planes()))
+    return pixels.apply_lut_stack(view.lut(), view.c_reduction, view.is_rgb)
+
+
+def bench(views, process_func):
+    start = time.perf_counter()
+    for view in views:
+        process_func(view).np_array()
+    return len(views) / (time.perf_counter() - start)
+
+
+# Run me with: CONFIG_FILE=/path/to/config.env python benchmarks/bench_lut_tiles.py
+if __name__ == '__main__':
+    parser = ArgumentParser(prog="Benchmark LUT processing (tiles/sec) of multichannel tiles.")
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--bitdepth', type=int, default=16)
+    parser.add_argument('--tile-size', type=int, default=256)
+    parser.add_argument('--tiles', type=int, default=100)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    rng = np.random.default_rng(0)
+    views = [
+        BenchView(rng.integers(
+            0, 2 ** params.bitdepth,
+            size=(params.tile_size, params.tile_size, params.channels), dtype=np.uint16
+        ), params.bitdepth) for _ in range(params.tiles)
+    ]
+    print(f"{params.tiles} tiles of {params.tile_size}x{params.tile_size}, "
+          f"{params.channels} channels, {params.bitdepth} bits")
+
+    before = bench(views, process_before)
+    print(f"  Before (LUT computed per tile, applied by libvips): {before:.1f} tiles/sec")
+
+    cache = LookUpTableCache(32 * 1024 * 1024)
+    with mock.patch.object(image_response, "get_lut_cache", lambda: cache):
+        after = bench(views, process_after)
+    print(f"  After (cached LUT, applied on numpy pixels): {after:.1f} tiles/sec")
+    print(f"  Speedup: x{after / before:.2f}")
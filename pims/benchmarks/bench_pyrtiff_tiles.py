@@ -0,0 +1,96 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import pyvips
+from pyvips import Image as VIPSImage
+
+from pims.files.file import Path
+from pims.formats.common.tiff import PyrTiffFormat
+
+
+def make_pyramidal_tiff(path: str, width: int, height: int, tile_size: int = 256):
+    """Write a synthetic multi-level pyramidal TIFF, as produced by PIMS conversions."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:height, 0:width]
+    arr = np.stack([(xx // 7) % 256, (yy // 5) % 256, ((xx + yy) // 11) % 256], axis=-1)
+    arr = (arr + rng.integers(0, 20, size=arr.shape)).astype(np.uint8)
+    VIPSImage.new_from_array(arr, interpretation="srgb").tiffsave(
+        path, pyramid=True, tile=True, tile_width=tile_size, tile_height=tile_size,
+        bigtiff=True, compression="lzw"
+    )
+
+
+def all_tiles(format):
+    for tier in format.pyramid.tiers:
+        for ti in range(tier.max_ti):
+            yield tier.get_ti_tile(ti)
+
+
+def read_tile_per_call_tiffload(format, tile):
+    """Tile read as done before loaders were cached in the format."""
+    page = tile.tier.data.get('page_index')
+    tiff_page = VIPSImage.tiffload(str(format.path), page=page)
+    return tiff_page.extract_area(tile.left, tile.top, tile.width, tile.height)
+
+
+def read_tile_cached_loader(format, tile):
+    return format.reader.read_tile(tile)
+
+
+def bench(format, read_func, rounds):
+    tiles = list(all_tiles(format))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for tile in tiles:
+            read_func(format, tile).write_to_memory()
+    return len(tiles) * rounds / (time.perf_counter() - start)
+
+
+# Run me with: CONFIG_FILE=/path/to/config.env python benchmarks/bench_pyrtiff_tiles.py
+if __name__ == '__main__':
+    parser = ArgumentParser(prog="Benchmark tile reads (tiles/sec) on a pyramidal TIFF.")
+    parser.add_argument('--path', help="A pyramidal TIFF. If not set, a synthetic one is generated.")
+    parser.add_argument('--width', type=int, default=8192)
+    parser.add_argument('--height', type=int, default=6144)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--vips-cache-max', type=int, default=100,
+                        help="Maximum number of operations in libvips cache (PIMS default: 100). "
+                             "The benchmark is also run with a disabled cache, which is what "
+                             "happens when the shared cache is under pressure in production.")
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = params.path
+        if path is None:
+            path = f"{tmp}/synthetic.tif"
+            make_pyramidal_tiff(path, params.width, params.height)
+
+        fmt = PyrTiffFormat(Path(path))
+        print(f"{path}: {fmt.main_imd.width}x{fmt.main_imd.height}, "
+              f"{fmt.pyramid.n_levels} levels, "
+              f"{sum(tier.max_ti for tier in fmt.pyramid.tiers)} tiles")
+
+        for cache_max in (params.vips_cache_max, 0):
+            pyvips.cache_set_max(cache_max)
+            before = bench(fmt, read_tile_per_call_tiffload, params.rounds)
+            after = bench(fmt, read_tile_cached_loader, params.rounds)
+            print(f"libvips operation cache max = {cache_max}")
+            print(f"  Before (tiffload per tile): {before:.1f} tiles/sec")
+            print(f"  After (cached page loader): {after:.1f} tiles/sec")
+            print(f"  Speedup: x{after / before:.2f}")
@@ -0,0 +1,122 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from unittest import mock
+
+import numpy as np
+import orjson
+from pyvips import Image as VIPSImage
+
+from pims.config import get_settings
+from pims.files.file import Path
+from pims.formats.common import virtual
+from pims.formats.common.virtual import VirtualStackFormat
+from pims.formats.utils.factories import SpatialReadableFormatFactory
+from pims.processing.adapters import convert_to
+from pims.utils.vips import bandjoin
+
+
+def make_virtual_stack(root: str, n_channels: int, width: int, height: int) -> str:
+    """
+    Write a synthetic virtual stack, whose channels are pyramidal TIFF files
+    as produced by PIMS conversions.
+    """
+    rng = np.random.default_rng(0)
+    planes = dict()
+    for c in range(n_channels):
+        processed = os.path.join(root, f"upload-bench-{c}", "processed")
+        os.makedirs(processed, exist_ok=True)
+        arr = rng.integers(0, 255, size=(height, width), dtype=np.uint8)
+        VIPSImage.new_from_array(arr).tiffsave(
+            os.path.join(processed, "visualisation.PYRTIFF"), pyramid=True, tile=True,
+            tile_width=256, tile_height=256, compression="lzw"
+        )
+        planes[f"C{c}_Z0_T0"] = {
+            "location": f"upload-bench-{c}/processed/visualisation.PYRTIFF"
+        }
+
+    stack = {
+        "schema": "virtual/stack",
+        "image": {
+            "width": width, "height": height, "depth": 1, "duration": 1,
+            "n_concrete_channels": n_channels, "n_samples": 1, "pixel_type": "uint8"
+        },
+        "channels": [{"index": c, "color": None} for c in range(n_channels)],
+        "planes": planes
+    }
+    processed = os.path.join(root, "upload-bench", "processed")
+    os.makedirs(processed, exist_ok=True)
+    path = os.path.join(processed, "visualisation.VIRTUALSTACK")
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(stack))
+    return path
+
+
+def read_tile_matching_members(format, tile):
+    """Tile read as done before member formats were cached in the stack."""
+    bands = []
+    for c in range(format.main_imd.n_channels):
+        location = format.planes_info.get(c, 0, 0, "location")
+        member = SpatialReadableFormatFactory(match_on_ext=True).match(
+            Path(get_settings().root, location).get_spatial()
+        )
+        bands.append(convert_to(member.reader.read_window(tile, tile.width, tile.height), VIPSImage))
+    return bandjoin(bands)
+
+
+def read_tile_cached_members(format, tile):
+    return format.reader.read_tile(tile, z=0, t=0)
+
+
+def bench(format, read_func, n_tiles):
+    tiles = [format.normalized_pyramid.base.get_ti_tile(ti) for ti in range(n_tiles)]
+    start = time.perf_counter()
+    for tile in tiles:
+        read_func(format, tile).write_to_memory()
+    return n_tiles / (time.perf_counter() - start)
+
+
+# Run me with: CONFIG_FILE=/path/to/config.env python benchmarks/bench_virtual_stack_tiles.py
+if __name__ == '__main__':
+    parser = ArgumentParser(prog="Benchmark tile reads (tiles/sec) on a virtual stack.")
+    parser.add_argument('--channels', type=int, default=40)
+    parser.add_argument('--width', type=int, default=2048)
+    parser.add_argument('--height', type=int, default=2048)
+    parser.add_argument('--tiles', type=int, default=32)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as root, \
+            mock.patch.object(get_settings(), "root", root):
+        fmt = VirtualStackFormat(Path(
+            make_virtual_stack(root, params.channels, params.width, params.height)
+        ))
+        n_tiles = min(params.tiles, fmt.normalized_pyramid.base.max_ti)
+        print(f"Virtual stack: {params.channels} channels of {params.width}x{params.height}")
+
+        before = bench(fmt, read_tile_matching_members, n_tiles)
+        print(f"  Before (members matched for every tile): {before:.1f} tiles/sec")
+
+        with mock.patch.object(virtual, "get_members_executor", lambda: None):
+            sequential = bench(fmt, read_tile_cached_members, n_tiles)
+        print(f"  After, sequential reads (cached members): {sequential:.1f} tiles/sec")
+
+        # Members are already matched, as after the first tiles of a session
+        concurrent = bench(fmt, read_tile_cached_members, n_tiles)
+        print(f"  After, concurrent reads ({get_settings().n_threads_virtual_stack} threads): "
+              f"{concurrent:.1f} tiles/sec")
+        print(f"  Speedup: x{concurrent / before:.2f}")
@@ -1,7 +1,11 @@
+from typing import Dict
+
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
 from pims import __version__
+from pims.cache.pool import get_format_pool
+from pims.cache.redis import PIMSCache
 from pims.config import ReadableSettings, get_settings
 
 router = APIRouter(prefix=get_settings().api_base_path)
@@ -18,3 +22,44 @@ async def show_status() -> ServerInfo:
     PIMS Server status.
     """
     return ServerInfo(version=__version__, settings=get_settings())
+
+
+class CacheNamespaceStats(BaseModel):
+    memory_hits: int = Field(..., description="Number of hits in the worker in-process cache")
+    backend_hits: int = Field(..., description="Number of hits in the shared cache")
+    misses: int = Field(..., description="Number of cache misses")
+    coalesced: int = Field(..., description="Number of misses served by a computation of another request")
+    memory_entries: int = Field(..., description="Number of entries in the worker in-process cache")
+    memory_size: int = Field(..., description="Size in bytes of entries in the worker in-process cache")
+
+
+class FormatPoolStats(BaseModel):
+    size: int = Field(..., description="Number of pooled opened image formats")
+    max_size: int
+    in_use: int = Field(..., description="Number of pooled formats currently used by requests")
+    hits: int
+    misses: int
+    evictions: int
+
+
+class CacheStats(BaseModel):
+    enabled: bool = Field(..., description="Whether the cache is enabled")
+    memory_max_size: int = Field(..., description="Maximum size in bytes of the worker in-process cache")
+    memory_size: int = Field(..., description="Size in bytes of the worker in-process cache")
+    namespaces: Dict[str, CacheNamespaceStats]
+    format_pool: FormatPoolStats
+
+
+@router.get("/info/cache", tags=["Server"])
+async def show_cache_stats() -> CacheStats:
+    """
+    Cache statistics of the PIMS worker handling the request.
+    """
+    memory = PIMSCache.get_memory_cache()
+    return CacheStats(
+        enabled=PIMSCache.is_enabled(),
+        memory_max_size=memory.max_size,
+        memory_size=memory.size,
+        namespaces={str(k): v for k, v in PIMSCache.stats().items()},
+        format_pool=get_format_pool().stats()
+    )
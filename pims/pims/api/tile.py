@@ -11,11 +11,14 @@
 #  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
-from typing import Optional
+import asyncio
+import uuid
+from typing import List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Path as PathParam, Query
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import Response, StreamingResponse
 
 from pims.api.exceptions import BadRequestException, check_representation_existence
 from pims.api.utils.header import ImageRequestHeaders, SafeMode, add_image_size_limit_header
@@ -30,7 +33,8 @@ from pims.api.utils.mimetype import (
 from pims.api.utils.models import (
     ChannelReduction, Colorspace, ImageOpsDisplayQueryParams,
     PlaneSelectionQueryParams, TargetLevel, TargetZoom, TargetZoomTileCoordinates,
-    TargetZoomTileIndex, TierIndexType, TileIndex, TileRequest, TileX, TileY
+    TargetZoomTileIndex, TierIndexType, TileIndex, TileRequest, TileX, TileY,
+    TilesRequest
 )
 from pims.api.utils.output_parameter import (
     check_tilecoord_validity, check_tileindex_validity,
@@ -43,10 +47,11 @@ from pims.api.utils.processing_parameter import (
 )
 from pims.cache import cache_image_response
 from pims.config import Settings, get_settings
-from pims.files.file import Path
+from pims.files.file import Image, Path
 from pims.filters import FILTERS
 from pims.processing.colormaps import ALL_COLORMAPS
 from pims.processing.image_response import TileResponse, WindowResponse
+from pims.processing.region import Tile
 from pims.utils.iterables import check_array_size_parameters, ensure_list
 
 router = APIRouter(prefix=get_settings().api_base_path)
@@ -54,6 +59,55 @@ tile_tags = ['Tiles']
 norm_tile_tags = ['Normalized tiles']
 
 
+# Batch routes are declared first, as `tile{extension:path}` would match `tiles.png`.
+@router.post('/image/{filepath:path}/tiles{extension:path}', tags=tile_tags)
+async def show_tiles_with_body(
+    request: Request,
+    body: TilesRequest,
+    path: Path = Depends(imagepath_parameter),
+    extension: OutputExtension = Depends(extension_path_parameter),
+    headers: ImageRequestHeaders = Depends(),
+    config: Settings = Depends(get_settings)
+):
+    """
+    Get many 8-bit tiles of an image at once, processed with the same channels, focal
+    planes, timepoints and display parameters. The tiles are returned in the requested
+    order, as the parts of a `multipart/mixed` response. Each part has a `Content-ID`
+    header with the index of the tile in the request.
+
+    **By default**, all image channels are used and when the image is multidimensional, the
+     tiles are extracted from the median focal plane at first timepoint.
+    """
+    return await _show_tiles(
+        request, path, **body.model_dump(serialize_as_any=True), normalized=False,
+        extension=extension, headers=headers, config=config
+    )
+
+
+@router.post('/image/{filepath:path}/normalized-tiles{extension:path}', tags=norm_tile_tags)
+async def show_normalized_tiles_with_body(
+    request: Request,
+    body: TilesRequest,
+    path: Path = Depends(imagepath_parameter),
+    extension: OutputExtension = Depends(extension_path_parameter),
+    headers: ImageRequestHeaders = Depends(),
+    config: Settings = Depends(get_settings)
+):
+    """
+    Get many 8-bit normalized tiles of an image at once, processed with the same channels,
+    focal planes, timepoints and display parameters. The tiles are returned in the requested
+    order, as the parts of a `multipart/mixed` response. Each part has a `Content-ID`
+    header with the index of the tile in the request.
+
+    **By default**, all image channels are used and when the image is multidimensional, the
+     tiles are extracted from the median focal plane at first timepoint.
+    """
+    return await _show_tiles(
+        request, path, **body.model_dump(serialize_as_any=True), normalized=True,
+        extension=extension, headers=headers, config=config
+    )
+
+
 @router.post('/image/{filepath:path}/tile{extension:path}', tags=tile_tags)
 async def show_tile_with_body(
     request: Request, response: Response,
@@ -110,7 +164,46 @@ async def show_normalized_tile_with_body(
     )
 
 
-@cache_image_response()
+def _get_tile_region(in_image: Image, normalized: bool, tile: dict) -> Tuple[Tile, bool]:
+    """
+    Get the region of a tile, given by zoom or level and by index or coordinates.
+    The tile has to be read as a window if the image pyramid is not normalized.
+    """
+    if not normalized or in_image.is_pyramid_normalized:
+        pyramid = in_image.pyramid
+        is_window = False
+    else:
+        pyramid = in_image.normalized_pyramid
+        is_window = True
+
+    if 'zoom' in tile:
+        reference_tier_index = tile['zoom']
+        tier_index_type = TierIndexType.ZOOM
+    else:
+        reference_tier_index = tile['level']
+        tier_index_type = TierIndexType.LEVEL
+
+    if 'ti' in tile:
+        check_tileindex_validity(
+            pyramid, tile['ti'],
+            reference_tier_index, tier_index_type
+        )
+        tile_region = pyramid.get_tier_at(
+            reference_tier_index, tier_index_type
+        ).get_ti_tile(tile['ti'])
+    else:
+        check_tilecoord_validity(
+            pyramid, tile['tx'], tile['ty'],
+            reference_tier_index, tier_index_type
+        )
+        tile_region = pyramid.get_tier_at(
+            reference_tier_index, tier_index_type
+        ).get_txty_tile(tile['tx'], tile['ty'])
+
+    return tile_region, is_window
+
+
+@cache_image_response(ignored_variable_parameters=['threaded'])
 async def _show_tile(
     request: Request, response: Response,  # required for @cache  # noqa
     path: Path,
@@ -119,41 +212,13 @@ async def _show_tile(
     channels, z_slices, timepoints,
     min_intensities, max_intensities, filters, gammas, threshold, log,
     extension, headers, config,
-    colormaps=None, c_reduction=ChannelReduction.ADD, z_reduction=None, t_reduction=None
+    colormaps=None, c_reduction=ChannelReduction.ADD, z_reduction=None, t_reduction=None,
+    threaded=False
 ):
     with await path.get_cached_spatial() as in_image:
         check_representation_existence(in_image)
 
-        if not normalized or in_image.is_pyramid_normalized:
-            pyramid = in_image.pyramid
-            is_window = False
-        else:
-            pyramid = in_image.normalized_pyramid
-            is_window = True
-
-        if 'zoom' in tile:
-            reference_tier_index = tile['zoom']
-            tier_index_type = TierIndexType.ZOOM
-        else:
-            reference_tier_index = tile['level']
-            tier_index_type = TierIndexType.LEVEL
-
-        if 'ti' in tile:
-            check_tileindex_validity(
-                pyramid, tile['ti'],
-                reference_tier_index, tier_index_type
-            )
-            tile_region = pyramid.get_tier_at(
-                reference_tier_index, tier_index_type
-            ).get_ti_tile(tile['ti'])
-        else:
-            check_tilecoord_validity(
-                pyramid, tile['tx'], tile['ty'],
-                reference_tier_index, tier_index_type
-            )
-            tile_region = pyramid.get_tier_at(
-                reference_tier_index, tier_index_type
-            ).get_txty_tile(tile['tx'], tile['ty'])
+        tile_region, is_window = _get_tile_region(in_image, normalized, tile)
 
         out_format, mimetype = get_output_format(extension, headers.accept, VISUALISATION_MIMETYPES)
         req_size = tile_region.width, tile_region.height
@@ -215,11 +280,107 @@ async def _show_tile(
                 threshold
             )
 
-        return tile.http_response(
-            mimetype,
-            extra_headers=add_image_size_limit_header(dict(), *req_size, *out_size)
+        extra_headers = add_image_size_limit_header(dict(), *req_size, *out_size)
+        if threaded:
+            return await run_in_threadpool(
+                tile.http_response, mimetype, extra_headers=extra_headers
+            )
+        return tile.http_response(mimetype, extra_headers=extra_headers)
+
+
+def _multipart_part(boundary: str, index: int, tile: Response) -> bytes:
+    part_headers = [
+        (k.decode('latin-1'), v.decode('latin-1'))
+        for k, v in tile.raw_headers if k != b'content-length'
+    ]
+    part_headers += [('content-length', str(len(tile.body))), ('content-id', str(index))]
+    head = ''.join(f"{k}: {v}\r\n" for k, v in part_headers)
+    return f"--{boundary}\r\n{head}\r\n".encode('latin-1') + tile.body + b"\r\n"
+
+
+async def _show_tiles(
+    request: Request,
+    path: Path,
+    normalized: bool,
+    tiles: List[dict],
+    extension, headers, config,
+    **params
+):
+    if len(tiles) > config.max_tiles_per_batch:
+        raise BadRequestException(
+            detail=f"At most {config.max_tiles_per_batch} tiles can be requested at once."
         )
 
+    # The image is kept open until all tiles are rendered. With the format
+    # pool enabled, every tile then reuses the same opened format; otherwise,
+    # each tile opens the image again.
+    in_image = await path.get_cached_spatial()
+    try:
+        check_representation_existence(in_image)
+        for tile in tiles:
+            _get_tile_region(in_image, normalized, tile)
+    except BaseException:
+        if in_image is not None:
+            in_image.close()
+        raise
+
+    semaphore = asyncio.Semaphore(max(1, config.n_threads_batch_tiles))
+    aborted = False
+
+    async def _render(tile: dict) -> Optional[Response]:
+        async with semaphore:
+            if aborted:
+                return None
+            # Each tile is cached as if it was requested alone.
+            return await _show_tile(
+                None, None, path, normalized, tile, **params,
+                extension=extension, headers=headers, config=config, threaded=True
+            )
+
+    renders = [asyncio.ensure_future(_render(tile)) for tile in tiles]
+
+    def _abort():
+        # Started renders are not cancelled: they may be shared with other
+        # requests for the same tiles, and their reads run in threads anyway.
+        # Tiles not started yet are skipped, and the image is closed once the
+        # started ones are finished.
+        nonlocal aborted
+        aborted = True
+        pending = len(renders)
+
+        def _done(render: asyncio.Future):
+            nonlocal pending
+            if not render.cancelled():
+                render.exception()
+            pending -= 1
+            if pending == 0:
+                in_image.close()
+
+        for render in renders:
+            render.add_done_callback(_done)
+
+    try:
+        # Errors common to all tiles (processing parameters) are raised before
+        # the response starts.
+        await renders[0]
+    except BaseException:
+        _abort()
+        raise
+
+    boundary = uuid.uuid4().hex
+
+    async def _stream():
+        try:
+            for index, render in enumerate(renders):
+                yield _multipart_part(boundary, index, await render)
+            yield f"--{boundary}--\r\n".encode('latin-1')
+        finally:
+            _abort()
+
+    return StreamingResponse(
+        _stream(), media_type=f"multipart/mixed; boundary={boundary}"
+    )
+
 
 def zoom_query_parameter(
     zoom: int = PathParam(...)
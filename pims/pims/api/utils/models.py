@@ -695,6 +695,15 @@ class TileRequest(ImageInDisplay):
                 TargetLevelTileIndex, TargetLevelTileCoordinates]
 
 
+class TilesRequest(ImageInDisplay):
+    tiles: List[Union[TargetZoomTileIndex, TargetZoomTileCoordinates,
+                      TargetLevelTileIndex, TargetLevelTileCoordinates]] = Field(
+        ..., min_length=1,
+        description='The tiles to get, all processed with the same parameters. '
+                    'Tiles are returned in the same order.'
+    )
+
+
 class AssociatedName(str, Enum):
     """
     The type of associated image.
@@ -19,6 +19,7 @@ from redis.exceptions import ConnectionError, TimeoutError
 
 from pims.utils.background_task import add_background_task
 from pims.cache import startup_cache
+from pims.cache.pool import get_format_pool
 from pims.config import get_settings
 from pims.api.exceptions import add_problem_exception_handler
 from pims.api import (
@@ -64,6 +65,9 @@ async def startup():
     if not shapely_speedups:
         logger.warning("Shapely is running without speedups.")
 
+    if get_settings().warm_cache_after_import and not get_settings().task_queue_enabled:
+        logger.warning("Cache warming after import requires the task queue, which is disabled.")
+
     # Caching
     if not get_settings().cache_enabled:
         logger.warning("Cache is disabled by configuration.")
@@ -87,6 +91,7 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown() -> None:
     await shutdown_cache()
+    get_format_pool().clear()
 
 
 def _log(request_, response_, duration_):
@@ -0,0 +1,93 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+
+from pims.config import get_settings
+
+
+class LookUpTableCache:
+    """
+    An in-process LRU cache of stacked lookup tables, bounded by the total
+    size of the tables in bytes.
+
+    Keys must describe every parameter the table is computed from. Cached
+    tables are shared by all requests, so they are made read-only.
+
+    The cache is thread-safe.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(
+        self, key: Hashable, func: Callable[[], Optional[np.ndarray]]
+    ) -> Optional[np.ndarray]:
+        """
+        Get the lookup table cached at some key, computing it with `func`
+        if it is missing. A table larger than the cache is never kept.
+        """
+        if not self.enabled:
+            return func()
+
+        with self._lock:
+            lut = self._entries.get(key)
+            if lut is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return lut
+            self.misses += 1
+
+        # Computed outside the lock: concurrent misses on the same key only
+        # compute the same table twice.
+        lut = func()
+        if lut is None or lut.nbytes > self.max_size:
+            return lut
+
+        lut.flags.writeable = False
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = lut
+                self.size += lut.nbytes
+
+                while self.size > self.max_size:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= evicted.nbytes
+        return lut
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@lru_cache()
+def get_lut_cache() -> LookUpTableCache:
+    return LookUpTableCache(get_settings().lut_cache_max_size * 1024 * 1024)
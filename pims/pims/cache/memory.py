@@ -0,0 +1,116 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+# An entry larger than this fraction of the memory budget is not kept in
+# memory, so that a few large responses cannot flush all hot tiles.
+MAX_ENTRY_FRACTION = 8
+
+
+class _MemoryEntry:
+    __slots__ = ('value', 'namespace', 'expire_at')
+
+    def __init__(self, value: bytes, namespace: Optional[str], expire_at: Optional[float]):
+        self.value = value
+        self.namespace = namespace
+        self.expire_at = expire_at
+
+
+class MemoryCache:
+    """
+    An in-process LRU cache of encoded values, bounded by the total size of
+    the values in bytes. It is meant to be used in front of a shared cache
+    backend, with the same keys and encoded values.
+
+    The cache is thread-safe.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+
+        self._entries: OrderedDict[str, _MemoryEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        """
+        Get the value cached at some key, with its remaining time to live in
+        seconds (-1 if the value never expires), following Redis conventions.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return -2, None
+
+            if entry.expire_at is None:
+                ttl = -1
+            else:
+                ttl = int(entry.expire_at - time.monotonic())
+                if ttl <= 0:
+                    self._remove(key)
+                    return -2, None
+
+            self._entries.move_to_end(key)
+            return ttl, entry.value
+
+    def set(
+        self, key: str, value: bytes, expire: Optional[int] = None,
+        namespace: Optional[str] = None
+    ):
+        if not self.enabled or len(value) > self.max_size // MAX_ENTRY_FRACTION:
+            return
+
+        expire_at = time.monotonic() + expire if expire and expire > 0 else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _MemoryEntry(value, namespace, expire_at)
+            self.size += len(value)
+
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self, namespace: Optional[str] = None, key: Optional[str] = None):
+        with self._lock:
+            if key is not None:
+                if key in self._entries:
+                    self._remove(key)
+            elif namespace is not None:
+                for k in [k for k, e in self._entries.items() if e.namespace == namespace]:
+                    self._remove(k)
+            else:
+                self._entries.clear()
+                self.size = 0
+
+    def stats(self) -> Dict[str, dict]:
+        """Number of entries and their total size, by namespace."""
+        stats = defaultdict(lambda: {"entries": 0, "size": 0})
+        with self._lock:
+            for entry in self._entries.values():
+                stats[entry.namespace]["entries"] += 1
+                stats[entry.namespace]["size"] += len(entry.value)
+        return dict(stats)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.size -= len(entry.value)
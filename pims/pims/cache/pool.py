@@ -0,0 +1,222 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from pims.config import get_settings
+
+if TYPE_CHECKING:
+    from pims.formats import AbstractFormat
+
+log = logging.getLogger("pims.app")
+
+
+def _mtime(format: AbstractFormat) -> Optional[int]:
+    try:
+        return os.stat(format.path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+class _PoolEntry:
+    __slots__ = ('key', 'format', 'mtime', 'last_used', 'refcount', 'evicted')
+
+    def __init__(self, key: str, format: AbstractFormat, mtime: int):
+        self.key = key
+        self.format = format
+        self.mtime = mtime
+        self.last_used = time.monotonic()
+        self.refcount = 0
+        self.evicted = False
+
+
+class FormatPool:
+    """
+    A bounded LRU pool of opened image formats, so that file handles and
+    parsed headers (`_tf`, `_vips`, ...) cached in a format survive across
+    requests.
+
+    Entries are keyed by the representation path and are only valid as long
+    as the file modification time is unchanged. A format acquired from the
+    pool must be given back with `release()`. An entry is never closed while
+    it is in use, even if it has been evicted in the meantime.
+
+    The pool is thread-safe.
+    """
+    def __init__(self, max_size: int, idle_ttl: float):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self._in_use: Dict[int, _PoolEntry] = dict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def acquire(self, key: str) -> Optional[AbstractFormat]:
+        """
+        Get the opened format pooled at some key, if any and still valid.
+        """
+        if not self.enabled:
+            return None
+
+        to_close = []
+        with self._lock:
+            to_close += self._prune()
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime != _mtime(entry.format):
+                to_close += self._evict(entry)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                self._use(entry)
+
+        self._close(to_close)
+        return entry.format if entry is not None else None
+
+    def add(self, key: str, format: AbstractFormat) -> bool:
+        """
+        Add an opened format to the pool. On success, the format is
+        considered as acquired by the caller.
+
+        Returns
+        -------
+        pooled
+            Whether the format has been added to the pool. If not, the caller
+            keeps the ownership of the format and must close it as usual.
+        """
+        if not self.enabled:
+            return False
+
+        mtime = _mtime(format)
+        if mtime is None:
+            return False
+
+        to_close = []
+        with self._lock:
+            if key in self._entries:
+                return False
+
+            entry = _PoolEntry(key, format, mtime)
+            self._entries[key] = entry
+            self._use(entry)
+
+            to_close += self._prune()
+            idle = [e for e in self._entries.values() if e.refcount == 0]
+            n_overflow = len(self._entries) - self.max_size
+            for e in idle[:max(n_overflow, 0)]:
+                to_close += self._evict(e)
+
+        self._close(to_close)
+        return True
+
+    def release(self, format: AbstractFormat):
+        """
+        Give back a format previously acquired from the pool.
+        """
+        to_close = []
+        with self._lock:
+            entry = self._in_use.get(id(format))
+            if entry is None:
+                return
+
+            entry.refcount -= 1
+            entry.last_used = time.monotonic()
+            if entry.refcount == 0:
+                del self._in_use[id(format)]
+                if entry.evicted:
+                    to_close.append(entry.format)
+
+        self._close(to_close)
+
+    def clear(self):
+        """
+        Evict all entries. Entries in use are closed when released.
+        """
+        to_close = []
+        with self._lock:
+            for entry in list(self._entries.values()):
+                to_close += self._evict(entry)
+
+        self._close(to_close)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _use(self, entry: _PoolEntry):
+        entry.refcount += 1
+        entry.last_used = time.monotonic()
+        self._in_use[id(entry.format)] = entry
+
+    def _evict(self, entry: _PoolEntry) -> List[AbstractFormat]:
+        del self._entries[entry.key]
+        entry.evicted = True
+        self.evictions += 1
+        if entry.refcount == 0:
+            return [entry.format]
+        return []
+
+    def _prune(self) -> List[AbstractFormat]:
+        """Evict idle entries unused for more than the idle TTL."""
+        now = time.monotonic()
+        expired = [
+            e for e in self._entries.values()
+            if e.refcount == 0 and now - e.last_used > self.idle_ttl
+        ]
+        to_close = []
+        for entry in expired:
+            to_close += self._evict(entry)
+        return to_close
+
+    @staticmethod
+    def _close(formats: List[AbstractFormat]):
+        for format in formats:
+            try:
+                format.close()
+            except Exception:  # noqa
+                log.warning(f"Can't close pooled format {format}")
+
+
+@lru_cache()
+def get_format_pool() -> FormatPool:
+    settings = get_settings()
+    return FormatPool(settings.format_pool_max_size, settings.format_pool_idle_ttl)
@@ -11,14 +11,19 @@
 #  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
+import asyncio
 import gc
 import hashlib
 import inspect
+import json
 import logging
 import pickle
+import struct
+import time
+from collections import Counter, defaultdict
 from enum import Enum
 from functools import partial, wraps
-from typing import Any, Callable, List, Optional, Tuple, Type
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
 
 from fastapi_utils.tasks import repeat_every
 from redis import asyncio as aioredis
@@ -27,8 +32,9 @@ from starlette.responses import Response
 from pims.api.utils.mimetype import VISUALISATION_MIMETYPES, get_output_format
 from pims.config import get_settings
 from pims.utils.background_task import add_background_task
-from pims.utils.concurrency import exec_func_async
+from pims.utils.concurrency import SingleFlight, exec_func_async
 
+from .memory import MemoryCache
 from .. import __version__
 
 # Note: Parts of this implementation are inspired from
@@ -45,6 +51,10 @@ CACHE_KEY_NAMESPACE_IMAGE_RESPONSE = "pims-img"
 CACHE_KEY_NAMESPACE_RESPONSE = "pims-resp"
 
 MANAGE_CACHE_INTERVAL = 60 * 5 # in seconds
+# Part of cache keys, to be changed when the format of cached values changes
+CACHE_VALUE_FORMAT = 2
+# Interval in seconds between checks while waiting for another worker computing a value
+COALESCING_POLL_INTERVAL = 0.05
 
 
 log = logging.getLogger("pims.app")
@@ -86,7 +96,7 @@ def all_kwargs_key_builder(
         if excluded in copy_kwargs:
             copy_kwargs.pop(excluded)
 
-    hashable = f"{func.__module__}:{func.__name__}" \
+    hashable = f"{CACHE_VALUE_FORMAT}:{func.__module__}:{func.__name__}" \
                f"{_hashable_dict(copy_kwargs, ':')}"
     hashed = stable_hash(hashable.encode())
     cache_key = f"{namespace}:{hashed}"
@@ -138,6 +148,58 @@ class PickleCodec(Codec):
         return pickle.loads(value)
 
 
+class ResponseCodec(Codec):
+    """
+    Encode a response as its status code, headers and raw body, so that
+    cache hits do not have to unpickle a whole response object. Values
+    that are not responses are pickled.
+    """
+    _RESPONSE = b'R'
+    _PICKLE = b'P'
+
+    @classmethod
+    def encode(cls, value: Any):
+        if not isinstance(value, Response):
+            return cls._PICKLE + pickle.dumps(value)
+
+        meta = json.dumps({
+            "status_code": value.status_code,
+            "headers": [
+                (k.decode('latin-1'), v.decode('latin-1'))
+                for k, v in value.raw_headers if k != b'content-length'
+            ]
+        }).encode()
+        return cls._RESPONSE + struct.pack('>I', len(meta)) + meta + value.body
+
+    @classmethod
+    def decode(cls, value: Any):
+        if value[:1] == cls._PICKLE:
+            return pickle.loads(value[1:])
+
+        (meta_length,) = struct.unpack_from('>I', value, 1)
+        meta = json.loads(value[5:5 + meta_length])
+        response = Response(
+            content=value[5 + meta_length:], status_code=meta["status_code"]
+        )
+        response.raw_headers += [
+            (k.encode('latin-1'), v.encode('latin-1')) for k, v in meta["headers"]
+        ]
+        return response
+
+
+# Cached values are prefixed by the (fixed length) hash of the encoded value,
+# used as ETag, so that it is not recomputed at every cache hit.
+ETAG_LENGTH = 32
+
+
+def _pack(encoded: bytes) -> bytes:
+    return stable_hash(encoded).encode() + encoded
+
+
+def _unpack(value: bytes) -> Tuple[str, bytes]:
+    return value[:ETAG_LENGTH].decode(), value[ETAG_LENGTH:]
+
+
 class RedisBackend:
     def __init__(self, redis_url: str):
         self.redis = aioredis.from_url(redis_url, socket_connect_timeout=10)
@@ -164,6 +226,14 @@ class RedisBackend:
         elif key:
             return await self.redis.delete(key)
 
+    async def acquire_lock(self, key: str, expire: int, namespace: str = None) -> bool:
+        key = f"{namespace}:{key}" if namespace else key
+        return bool(await self.redis.set(f"{key}:lock", 1, nx=True, ex=expire))
+
+    async def release_lock(self, key: str, namespace: str = None):
+        key = f"{namespace}:{key}" if namespace else key
+        return await self.redis.delete(f"{key}:lock")
+
     async def exists(self, key: str, namespace: str = None) -> bool:
         key = f"{namespace}:{key}" if namespace else key
         return await self.redis.exists(key)
@@ -180,15 +250,24 @@ class PIMSCache:
     _default_codec = None
     _default_key_builder = None
     _disabled_namespaces = None
+    _memory = MemoryCache(0)
+    _stats: Dict[str, Counter] = defaultdict(Counter)
+    _single_flight = SingleFlight()
+    _coalescing_lock_timeout = 0
+    # Saves of computed values, referenced until they are done
+    _saving: Set[asyncio.Task] = set()
 
     @classmethod
     async def init(
-        cls, backend, default_expire: int = None, disabled_namespaces: List[str] = None
+        cls, backend, default_expire: int = None, disabled_namespaces: List[str] = None,
+        memory_max_size: int = 0, coalescing_lock_timeout: int = 0
     ):
         if cls._init:
             return
         cls._init = True
         cls._backend = backend
+        cls._memory = MemoryCache(memory_max_size)
+        cls._coalescing_lock_timeout = coalescing_lock_timeout
         cls._default_expire = default_expire
         cls._default_codec = PickleCodec
         cls._default_key_builder = all_kwargs_key_builder
@@ -234,8 +313,133 @@ class PIMSCache:
     def is_disabled_namespace(cls, namespace):
         return  namespace in cls._disabled_namespaces
 
+    @classmethod
+    async def get_with_ttl(cls, key: str, namespace: str = None) -> Tuple[int, Optional[bytes]]:
+        """
+        Get a value and its TTL from the in-process cache, or from the
+        backend on in-process cache miss. `namespace` is only used for
+        statistics, as keys are already namespaced by key builders.
+        """
+        ttl, value = cls._memory.get_with_ttl(key)
+        if value is not None:
+            cls._stats[namespace]["memory_hits"] += 1
+            return ttl, value
+
+        ttl, value = await cls.get_backend().get_with_ttl(key)
+        if value is None:
+            cls._stats[namespace]["misses"] += 1
+        else:
+            cls._stats[namespace]["backend_hits"] += 1
+            cls._memory.set(key, value, ttl, namespace)
+        return ttl, value
+
+    @classmethod
+    async def set(cls, key: str, value: bytes, expire: int = None, namespace: str = None):
+        cls._memory.set(key, value, expire, namespace)
+        return await cls.get_backend().set(key, value, expire)
+
+    @classmethod
+    async def coalesce(
+        cls, key: str, func: Callable, expire: int = None, namespace: str = None
+    ) -> Tuple[Any, bytes, Optional[asyncio.Task]]:
+        """
+        Compute a missing value with `func` once per key: concurrent callers
+        in this worker wait for the same computation. If enabled, workers
+        also coordinate through a lock in the backend, and a worker waits
+        for the value computed by another one (up to the lock timeout)
+        before computing it itself.
+
+        `func` must return the computed data and its packed version to cache.
+        The computed value is then cached, and the lock released, in a task
+        of its own: it is saved even if all the callers are cancelled.
+
+        Returns
+        -------
+        data
+            The computed data, only if computed by this caller.
+        cached
+            The packed value.
+        saving
+            The task saving the value, only if computed by this caller.
+        """
+        async def _compute():
+            if cls._coalescing_lock_timeout > 0:
+                cached_ = await cls._acquire_lock_or_wait(key, namespace)
+                if cached_ is not None:
+                    return None, cached_, None
+            try:
+                data_, cached_ = await func()
+            except BaseException:
+                await cls.release_lock(key)
+                raise
+
+            saving_ = asyncio.ensure_future(cls._save(key, cached_, expire, namespace))
+            cls._saving.add(saving_)
+            saving_.add_done_callback(cls._saving.discard)
+            return data_, cached_, saving_
+
+        (data, cached, saving), shared = await cls._single_flight.do(key, _compute)
+        if shared or saving is None:
+            cls._stats[namespace]["coalesced"] += 1
+            return None, cached, None
+        return data, cached, saving
+
+    @classmethod
+    async def _save(cls, key: str, value: bytes, expire: int = None, namespace: str = None):
+        try:
+            await cls.set(key, value, expire, namespace)
+        except Exception as e:
+            log.warning(f"Failed to cache {key}: {e}")
+        finally:
+            await cls.release_lock(key)
+
+    @classmethod
+    async def _acquire_lock_or_wait(cls, key: str, namespace: str = None) -> Optional[bytes]:
+        backend = cls.get_backend()
+        timeout = cls._coalescing_lock_timeout
+        deadline = time.monotonic() + timeout
+        while not await backend.acquire_lock(key, timeout):
+            await asyncio.sleep(COALESCING_POLL_INTERVAL)
+            ttl, cached = await backend.get_with_ttl(key)
+            if cached is not None:
+                cls._memory.set(key, cached, ttl, namespace)
+                return cached
+            if time.monotonic() > deadline:
+                break
+        return None
+
+    @classmethod
+    async def release_lock(cls, key: str):
+        if cls._coalescing_lock_timeout > 0:
+            await cls.get_backend().release_lock(key)
+
+    @classmethod
+    def stats(cls) -> Dict[str, dict]:
+        """
+        Cache statistics by namespace: hits in each cache tier, misses and
+        in-process cache usage.
+        """
+        memory = cls._memory.stats()
+        stats = dict()
+        for namespace in set(cls._stats.keys()) | set(memory.keys()):
+            counter = cls._stats.get(namespace, Counter())
+            stats[namespace] = {
+                "memory_hits": counter["memory_hits"],
+                "backend_hits": counter["backend_hits"],
+                "misses": counter["misses"],
+                "coalesced": counter["coalesced"],
+                "memory_entries": memory.get(namespace, {}).get("entries", 0),
+                "memory_size": memory.get(namespace, {}).get("size", 0)
+            }
+        return stats
+
+    @classmethod
+    def get_memory_cache(cls) -> MemoryCache:
+        return cls._memory
+
     @classmethod
     async def clear(cls, namespace: str = None, key: str = None):
+        cls._memory.clear(namespace, key)
         return await cls._backend.clear(namespace, key)
 
 
@@ -252,7 +456,9 @@ async def startup_cache(pims_version):
     disabled_namespaces = [k for k, v in namespaces.items() if v is False]
 
     await PIMSCache.init(
-        RedisBackend(settings.cache_url), disabled_namespaces=disabled_namespaces
+        RedisBackend(settings.cache_url), disabled_namespaces=disabled_namespaces,
+        memory_max_size=settings.cache_memory_max_size * 1024 * 1024,
+        coalescing_lock_timeout=settings.cache_coalescing_lock_timeout
     )
 
     # Flush the cache if persistent and PIMS version has changed.
@@ -345,33 +551,45 @@ def cache_data(
             key_builder = key_builder or PIMSCache.get_default_key_builder()
             cache_key = key_builder(func, all_kwargs, ignored_variable_parameters, namespace)
 
-            backend = PIMSCache.get_backend()
-            ttl, encoded = await backend.get_with_ttl(cache_key)
+            ttl, cached = await PIMSCache.get_with_ttl(cache_key, namespace)
+            computed, saving = False, None
+            if cached is None:
+                async def _compute():
+                    data_ = await exec_func_async(func, *args, **kwargs)
+                    return data_, _pack(codec.encode(data_))
+
+                # Identical concurrent misses are computed once, and saved
+                # even if this request is cancelled
+                data, cached, saving = await PIMSCache.coalesce(
+                    cache_key, _compute, expire, namespace
+                )
+                computed = saving is not None
+                ttl = expire
+
+            async def _saved(saving_):
+                await asyncio.shield(saving_)
+
             # ------- NON REQUEST DATA -------
             if not request:
                 # CACHE HIT
-                if encoded is not None:
-                    return codec.decode(encoded)
+                if not computed:
+                    return codec.decode(_unpack(cached)[1])
 
                 # CACHE MISS
-                data = await exec_func_async(func, *args, **kwargs)
-                encoded = codec.encode(data)
-                await backend.set(
-                    cache_key, encoded,
-                    expire or PIMSCache.get_default_expire()
-                )
+                await _saved(saving)
                 return data
 
             # ------- REQUEST DATA ------
             if_none_match = request.headers.get(HEADER_IF_NONE_MATCH.lower())
             # CACHE HIT
-            if encoded is not None:
+            if not computed:
+                etag, encoded = _unpack(cached)
                 if response:
                     cache_control_builder = \
                         cache_control_builder or default_cache_control_builder
                     response.headers[HEADER_CACHE_CONTROL] = \
                         cache_control_builder(ttl=ttl)
-                    etag = f"W/{stable_hash(encoded)}"
+                    etag = f"W/{etag}"
                     response.headers[HEADER_ETAG] = etag
                     response.headers[HEADER_PIMS_CACHE] = "HIT"
                     if if_none_match == etag:
@@ -388,21 +606,15 @@ def cache_data(
                 return decoded
 
             # CACHE MISS
-            data = await exec_func_async(func, *args, **kwargs)
-            encoded = codec.encode(data)
-
-            async def _save(cache_key_, data_, expire_):
-                await backend.set(cache_key_, data_, expire_)
-
             if response:
                 cache_control_builder = \
                     cache_control_builder or default_cache_control_builder
                 response.headers[HEADER_CACHE_CONTROL] = \
                     cache_control_builder(ttl=expire)
-                etag = f"W/{stable_hash(encoded)}"
+                etag = f"W/{_unpack(cached)[0]}"
                 response.headers[HEADER_ETAG] = etag
                 response.headers[HEADER_PIMS_CACHE] = "MISS"
-                add_background_task(response, _save, cache_key, encoded, expire)
+                add_background_task(response, _saved, saving)
                 if isinstance(data, Response):
                     data.headers[HEADER_CACHE_CONTROL] = \
                         response.headers.get(HEADER_CACHE_CONTROL)
@@ -412,7 +624,7 @@ def cache_data(
                         response.headers.get(HEADER_PIMS_CACHE)
                     data.background = response.background
             else:
-                await _save(cache_key, encoded, expire)
+                await _saved(saving)
 
             return data
 
@@ -443,7 +655,7 @@ def cache_image_response(
     key_builder = partial(
         _image_response_key_builder, supported_mimetypes=supported_mimetypes
     )
-    codec = PickleCodec
+    codec = ResponseCodec
     return cache_data(
         expire, ignored_variable_parameters, codec, key_builder,
         image_response_cache_control_builder,
@@ -459,7 +671,7 @@ def cache_response(
         ignored_variable_parameters = []
     ignored_variable_parameters += ['config', 'request', 'response']
 
-    codec = PickleCodec
+    codec = ResponseCodec
     return cache_data(
         expire, ignored_variable_parameters, codec,
         cache_control_builder=image_response_cache_control_builder,
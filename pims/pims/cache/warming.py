@@ -0,0 +1,176 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import asyncio
+import inspect
+import logging
+from functools import lru_cache
+from typing import Awaitable, List
+
+from redis.exceptions import ConnectionError as CacheConnectionError, TimeoutError as CacheTimeoutError
+
+from pims import __version__
+from pims.api.thumb import _show_thumb
+from pims.api.tile import _show_tile
+from pims.api.utils.header import DEFAULT_SAFE_MODE, ImageRequestHeaders
+from pims.api.utils.mimetype import OutputExtension
+from pims.api.utils.models import (
+    ImageOpsDisplayQueryParams, ImageOutDisplayQueryParams, PlaneSelectionQueryParams
+)
+from pims.cache.redis import CACHE_KEY_NAMESPACE_IMAGE_RESPONSE, PIMSCache, startup_cache
+from pims.config import get_settings
+from pims.files.file import Image, Path
+
+log = logging.getLogger("pims.app")
+
+# Thumbnail lengths requested by Cytomine web UI (image lists and details)
+WARM_THUMB_LENGTHS = (128, 256)
+
+
+def default_query_params(dependency) -> dict:
+    """
+    The parameters of a query parameter dependency, as resolved by FastAPI
+    for a request without these query parameters.
+    """
+    params = {
+        name: param.default.default
+        for name, param in inspect.signature(dependency).parameters.items()
+    }
+    return dependency(**params).dict()
+
+
+def reference_plane_params(in_image: Image) -> dict:
+    """
+    The plane selection parameters, as resolved by FastAPI, of the requests
+    sent by Cytomine for the reference slice of an image: its median channel,
+    focal plane and timepoint.
+    """
+    params = default_query_params(PlaneSelectionQueryParams)
+    if in_image.n_concrete_channels > 1:
+        # Channels given in query are parsed as strings
+        params['channels'] = [str(in_image.n_concrete_channels // 2)]
+    params['z_slices'] = in_image.depth // 2
+    params['timepoints'] = in_image.duration // 2
+    return params
+
+
+def output_extension(format: str) -> OutputExtension:
+    return OutputExtension(f".{format.lstrip('.')}")
+
+
+def default_request_headers() -> ImageRequestHeaders:
+    return ImageRequestHeaders(accept=None, safe_mode=DEFAULT_SAFE_MODE)
+
+
+async def warm_image_cache(filepath: str) -> int:
+    """
+    Render thumbnails and the tiles of the top tiers of the normalized pyramid
+    of an image, with default display parameters, into the image response cache.
+
+    Responses are rendered by the cached API functions with the parameters
+    Cytomine sends for the reference slice of the image, so that they are
+    cached with the same keys as its requests.
+
+    Parameters
+    ----------
+    filepath
+        The image path, relative to server root, as used in API requests.
+
+    Returns
+    -------
+    n_warmed
+        The number of image responses rendered or already in cache.
+    """
+    settings = get_settings()
+    if not settings.cache_enabled:
+        return 0
+
+    try:
+        await startup_cache(__version__)
+    except (ConnectionError, CacheConnectionError, CacheTimeoutError) as e:
+        log.warning(f"Impossible to connect to cache, cache warming for {filepath} is skipped: {e}")
+        return 0
+
+    if not PIMSCache.is_enabled() or \
+            PIMSCache.is_disabled_namespace(CACHE_KEY_NAMESPACE_IMAGE_RESPONSE):
+        log.warning(f"Cache is not available, cache warming for {filepath} is skipped.")
+        return 0
+
+    path = Path.from_filepath(filepath)
+    ops = default_query_params(ImageOpsDisplayQueryParams)
+    headers = default_request_headers()
+    thumb_extension = output_extension(settings.warm_cache_thumb_format)
+    tile_extension = output_extension(settings.warm_cache_tile_format)
+    semaphore = asyncio.Semaphore(max(1, settings.n_threads_warm_cache))
+
+    async def _warm(response: Awaitable):
+        async with semaphore:
+            return await response
+
+    # The image is kept open until all responses are rendered.
+    in_image = await path.get_cached_spatial()
+    if in_image is None:
+        log.warning(f"No spatial representation for {filepath}, cache warming is skipped.")
+        return 0
+
+    with in_image:
+        planes = reference_plane_params(in_image)
+        pyramid = in_image.normalized_pyramid
+        n_zooms = min(settings.warm_cache_n_zooms, pyramid.n_zooms)
+
+        responses: List[Awaitable] = []
+        for length in WARM_THUMB_LENGTHS:
+            output = default_query_params(ImageOutDisplayQueryParams)
+            output['length'] = length
+            responses.append(_show_thumb(
+                None, None, path=path, **output, **planes, **ops,
+                use_precomputed=True, extension=thumb_extension,
+                headers=headers, config=settings
+            ))
+
+        for zoom in range(n_zooms):
+            tier = pyramid.get_tier_at_zoom(zoom)
+            for ty in range(tier.max_ty):
+                for tx in range(tier.max_tx):
+                    # Tiles are requested by (tx, ty) by Cytomine viewer.
+                    responses.append(_show_tile(
+                        None, None, path, True, dict(zoom=zoom, tx=tx, ty=ty), **planes, **ops,
+                        extension=tile_extension, headers=headers, config=settings,
+                        threaded=True
+                    ))
+
+        results = await asyncio.gather(
+            *[_warm(response) for response in responses], return_exceptions=True
+        )
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for error in errors[:1]:
+        log.warning(f"Some image responses for {filepath} cannot be cached: {error!r}")
+    n_warmed = len(results) - len(errors)
+    log.info(
+        f"Cache warmed for {filepath}: {n_warmed} image responses "
+        f"(thumbnails and {n_zooms} pyramid tiers)"
+    )
+    return n_warmed
+
+
+@lru_cache()
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    # The cache backend connections are bound to the event loop which opened them,
+    # so that a worker process always uses the same loop.
+    return asyncio.new_event_loop()
+
+
+def run_warm_image_cache(filepath: str) -> int:
+    """Warm the image response cache from synchronous code, such as a task worker."""
+    return _get_event_loop().run_until_complete(warm_image_cache(filepath))
@@ -46,14 +46,42 @@ class ReadableSettings(BaseSettings):
     cache_image_responses: bool = True
     # Must be TRUE in production.
     cache_responses: bool = True
+    # Maximum memory in MB used by each worker to keep hot cached values in front of the shared cache (0 disables it)
+    cache_memory_max_size: int = 64
+    # Maximum time in seconds a worker waits for another worker computing the same missing cached value.
+    # Identical misses are always computed once per worker; 0 disables the coordination between workers.
+    cache_coalescing_lock_timeout: int = 0
     # The max-age to set in HTTP Cache-Control for cached image responses.
     image_response_cache_control_max_age: int = 60 * 60 * 24
 
     task_queue_enabled: bool = True
     task_queue_url: str = "rabbitmq:5672"
+    # Render thumbnails and top tiers of the normalized pyramid into the response cache after a
+    # successful import, as requested by Cytomine for the reference slice. It requires the task queue.
+    warm_cache_after_import: bool = False
+    # Output format of thumbnails rendered when warming the cache (webp or jpg for Cytomine web UI)
+    warm_cache_thumb_format: str = "webp"
+    # Output format of tiles rendered when warming the cache (jpg for Cytomine viewer)
+    warm_cache_tile_format: str = "jpg"
+    # Number of normalized pyramid tiers rendered when warming the cache, from zoom 0.
+    # Tiles are only hit by requests with default display parameters, which Cytomine viewer
+    # does not send once channel settings are loaded.
+    warm_cache_n_zooms: int = 0
+    # Number of thumbnails and tiles rendered concurrently when warming the cache
+    n_threads_warm_cache: int = 4
 
     max_pixels_complete_histogram: int = 1024 * 1024
     max_length_complete_histogram: int = 1024
+    # Number of threads reading the image to build a complete histogram of a large image
+    n_threads_complete_histogram: int = 4
+    # Number of threads reading the files of a virtual stack concurrently (1 reads them sequentially)
+    n_threads_virtual_stack: int = 8
+    # Maximum memory in MB used by each worker to keep computed lookup tables (0 disables it)
+    lut_cache_max_size: int = 32
+    # Maximum number of tiles requested at once with the tile batch endpoints
+    max_tiles_per_batch: int = 64
+    # Number of tiles of a batch rendered concurrently
+    n_threads_batch_tiles: int = 8
 
     # Maximum number of operations to cache
     vips_cache_max_items: int = 100
@@ -61,6 +89,15 @@ class ReadableSettings(BaseSettings):
     vips_cache_max_memory: int = 50
     # Maximum number of files to hold open
     vips_cache_max_files: int = 100
+    # Maximum number of decoded tiles to cache per opened OpenSlide level (0 disables the cache)
+    openslide_tile_cache_max_tiles: int = 64
+    # Maximum memory in MB used by each worker to keep decoded DICOM frames, shared by all opened DICOM files (0 disables the cache)
+    dicom_frame_cache_max_size: int = 256
+
+    # Maximum number of opened image formats to keep per worker (0 disables the pool)
+    format_pool_max_size: int = 32
+    # Time in seconds after which an unused opened image format is closed
+    format_pool_idle_ttl: int = 60 * 5
 
     auto_delete_multi_file_format_archive: bool = True
     auto_delete_collection_archive: bool = True
@@ -24,9 +24,11 @@ import numpy as np
 from pint import Quantity
 
 from pims.api.exceptions import NoMatchingFormatProblem
+from pims.api.utils.mimetype import OutputExtension
 from pims.api.utils.models import HistogramType
 from pims.cache import cached_property
 
+from pims.cache.pool import get_format_pool
 from pims.cache.redis import PIMSCache, PickleCodec, CACHE_KEY_NAMESPACE_IMAGE_FORMAT_METADATA, stable_hash
 from pims.config import get_settings
 from pims.formats import AbstractFormat
@@ -292,15 +294,29 @@ class Path(PlatformPath, _Path, SafelyCopiable):
         if representation not in (FileRole.ORIGINAL, FileRole.SPATIAL):
             raise ValueError(f"Cached representation {representation} is not supported.")
 
-        if not PIMSCache.is_enabled() or PIMSCache.is_disabled_namespace(CACHE_KEY_NAMESPACE_IMAGE_FORMAT_METADATA):
-            return await self.get_representation(representation)
-
         processed_root = self.processed_root()
         if not processed_root.exists():
             return None
 
         stem = ORIGINAL_STEM if representation == FileRole.ORIGINAL else SPATIAL_STEM
         stem_path = str(processed_root / Path(stem))
+
+        format_pool = get_format_pool()
+        pooled_format = format_pool.acquire(stem_path)
+        if pooled_format is not None:
+            return Image(pooled_format.path, format=pooled_format, pooled=True)
+
+        image = await self._get_metadata_cached_representation(representation, stem_path)
+        if image is not None and format_pool.add(stem_path, image.format):
+            image._pooled = True
+        return image
+
+    async def _get_metadata_cached_representation(
+        self, representation: FileRole, stem_path: str
+    ) -> Union[Image, None]:
+        if not PIMSCache.is_enabled() or PIMSCache.is_disabled_namespace(CACHE_KEY_NAMESPACE_IMAGE_FORMAT_METADATA):
+            return await self.get_representation(representation)
+
         cache_key = stable_hash(stem_path.encode())
         cached = await PIMSCache.get_backend().get(cache_key, namespace=CACHE_KEY_NAMESPACE_IMAGE_FORMAT_METADATA)
         if cached is not None:
@@ -437,9 +453,11 @@ class Image(Path):
     """
     def __init__(
         self, *pathsegments,
-        factory: FormatFactory = None, format: AbstractFormat = None
+        factory: FormatFactory = None, format: AbstractFormat = None,
+        pooled: bool = False
     ):
         super().__init__(*pathsegments)
+        self._pooled = pooled
 
         _format = factory.match(Path(self)) if factory else format
         if _format is None:
@@ -654,6 +672,36 @@ class Image(Path):
             # Implement tile extraction from window ?
             raise e
 
+    def raw_tile(
+        self, tile: Tile, out_format: OutputExtension,
+        c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None,
+        t: Optional[int] = None
+    ) -> Optional[bytes]:
+        """
+        Get a tile as it is encoded in the image file, if this encoding
+        matches the asked output format.
+
+        Parameters
+        ----------
+        tile
+            A 2D region at a given downsample (linked to a pyramid tier)
+        out_format
+            The asked output format
+        c
+            The asked channel index(es).
+            If not set, all channels are considered.
+        z
+            The asked z-slice index.
+        t
+            The asked timepoint index.
+
+        Returns
+        -------
+        raw_tile
+            The encoded tile, or None if it is not available as is.
+        """
+        return self._format.reader.read_raw_tile(tile, out_format, c=c, z=z, t=t)
+
     def window(
         self, region: Region, out_width: int, out_height: int,
         c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None,
@@ -915,8 +963,12 @@ class Image(Path):
 
     def close(self):
         if hasattr(self, '_format') and self._format is not None:
-            self._format.close()
-            self._format._path = None
+            if self._pooled:
+                # The format is shared with other requests: give it back to the pool.
+                get_format_pool().release(self._format)
+            else:
+                self._format.close()
+                self._format._path = None
             del self._format
 
     def __del__(self):
@@ -13,14 +13,18 @@
 #  * limitations under the License.
 
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 import pyvips
 from pint import Quantity
 from pydicom import FileDataset, dcmread
 from pydicom.multival import MultiValue
+from pydicom.pixels import get_decoder
 from pydicom.uid import ImplicitVRLittleEndian
 from pyvips import GValue
 from shapely.affinity import affine_transform
@@ -28,6 +32,7 @@ from shapely.errors import ShapelyError
 from shapely.wkt import loads as wkt_loads
 
 from pims.cache import cached_property
+from pims.config import get_settings
 from pims.formats.utils.abstract import (
     AbstractFormat, CachedDataPath
 )
@@ -219,46 +224,105 @@ class DicomParser(AbstractParser):
         return parsed_annots
 
 
+class DicomFrameCache:
+    """
+    A thread-safe LRU cache of decoded frames, bounded by the total size of
+    frames in bytes. It is shared by all the DICOM files opened in a worker,
+    frames being cached at a (path, index) key. The most recently used frame
+    is always kept, even if it is larger than the cache size.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._frames: OrderedDict[Tuple[str, int], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(
+        self, key: Tuple[str, int], decode: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        if not self.enabled:
+            return decode()
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return frame
+
+        frame = decode()
+        with self._lock:
+            if key not in self._frames:
+                self._frames[key] = frame
+                self.size += frame.nbytes
+            while self.size > self.max_size and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self.size -= evicted.nbytes
+        return frame
+
+    def discard(self, path: str):
+        """Remove the frames of a file, e.g. when it is closed."""
+        with self._lock:
+            for key in [key for key in self._frames if key[0] == path]:
+                self.size -= self._frames.pop(key).nbytes
+
+    def __len__(self):
+        return len(self._frames)
+
+
+@lru_cache()
+def get_dicom_frame_cache() -> DicomFrameCache:
+    return DicomFrameCache(get_settings().dicom_frame_cache_max_size * 1024 * 1024)
+
+
 class DicomReader(AbstractReader):
     """
-    Pydicom `pixel_array` have following shape:
-    * For single frame, single sample data (rows, columns)
-    * For single frame, multi-sample data (rows, columns, planes)
-    * For multi-frame, single sample data (frames, rows, columns)
-    * For multi-frame, multi-sample data (frames, rows, columns, planes)
+    Frames are decoded one by one, only when needed, and decoded frames are
+    cached in the frame cache of the worker. A decoded frame has following shape:
+    * For single sample data (rows, columns)
+    * For multi-sample data (rows, columns, planes)
 
     NB: in DICOM world, "frame" is a z-slice and "plane" is a channel.
     """
 
-    def _array_slices(self, x_np_slice, y_np_slice, c_np_slice, z_np_slice):
-        n_channels = self.format.main_imd.n_channels
-        depth = self.format.main_imd.depth
+    def _decode_frame(self, index: int) -> np.ndarray:
+        ds = cached_dcmread(self.format)
+        decoder = get_decoder(ds.file_meta.TransferSyntaxUID)
+        frame, _ = decoder.as_array(ds, index=index)
+        return to_unsigned_int(frame)
+
+    def _frame(self, z: Optional[int]) -> np.ndarray:
+        index = z if z is not None else 0
+        return get_dicom_frame_cache().get(
+            (str(self.format.path), index), lambda: self._decode_frame(index)
+        )
 
+    def _pixel_array(self, x_np_slice, y_np_slice, c_np_slice, z):
+        frame = self._frame(z)
         x_np_slice = np.s_[:] if x_np_slice is None else x_np_slice
         y_np_slice = np.s_[:] if y_np_slice is None else y_np_slice
-        c_np_slice = np.s_[:] if c_np_slice is None else c_np_slice
-        z_np_slice = np.s_[:] if z_np_slice is None else z_np_slice
-
-        if n_channels == 1 and depth == 1:
-            return y_np_slice, x_np_slice
-        elif n_channels > 1 and depth == 1:
-            return y_np_slice, x_np_slice, c_np_slice
-        elif n_channels == 1 and depth > 1:
-            return z_np_slice, y_np_slice, x_np_slice
-        else:
-            return z_np_slice, y_np_slice, x_np_slice, c_np_slice
 
-    def _pixel_array(self, x_np_slice, y_np_slice, c_np_slice, z_np_slice):
-        slices = self._array_slices(x_np_slice, y_np_slice, c_np_slice, z_np_slice)
-        ds = cached_dcmread(self.format)
-        image = ds.pixel_array[slices]
-        return to_unsigned_int(image)
+        image = frame[y_np_slice, x_np_slice]
+        if image.ndim == 3 and c_np_slice is not None:
+            image = image[:, :, c_np_slice]
+        # Do not expose cached frames to in-place modifications
+        return np.array(image)
 
     def read_thumb(
         self, out_width, out_height, precomputed=None,
         c=None, z=None, t=None
     ):
-        return self._pixel_array(None, None, c, z)
+        image = self._pixel_array(None, None, c, z)
+        imd = self.format.main_imd
+        factor = max(1, min(imd.width // out_width, imd.height // out_height))
+        if factor == 1:
+            return image
+        # Average blocks of pixels, as shrink-on-load does in other formats,
+        # so that output is not smaller than asked.
+        return numpy_to_vips(image).shrink(factor, factor)
 
     def read_window(
         self, region, out_width, out_height,
@@ -368,6 +432,10 @@ class DicomFormat(AbstractFormat):
         super(DicomFormat, self).__init__(*args, **kwargs)
         self._enabled = True
 
+    def close(self):
+        get_dicom_frame_cache().discard(str(self.path))
+        super().close()
+
     @classmethod
     def is_spatial(cls):
         return True
@@ -36,7 +36,7 @@ from pims.formats.utils.engines.tifffile import (
     TifffileChecker, TifffileParser, cached_tifffile,
     remove_tiff_comments
 )
-from pims.formats.utils.engines.vips import VipsReader
+from pims.formats.utils.engines.vips import VipsReader, cached_vips_tiffpage
 from pims.formats.utils.histogram import DefaultHistogramReader
 from pims.formats.utils.structures.metadata import ImageChannel, ImageMetadata, MetadataStore
 from pims.formats.utils.structures.planes import PlanesInfo
@@ -542,17 +542,14 @@ class OmeTiffReader(VipsReader):
         region = region.scale_to_tier(tier)
         subifd = tier.data.get('subifd')
 
-        def read_func(path, region, page=None, subifd=None):  # noqa
-            opts = dict(page=page)
-            if subifd is not None:
-                opts['subifd'] = subifd
-            tiff_page = VIPSImage.tiffload(str(path), **opts)
+        def read_func(format, region, page=None, subifd=None):  # noqa
+            tiff_page = cached_vips_tiffpage(format, page, subifd)
             im = tiff_page.extract_area(
                 region.left, region.top, region.width, region.height
             )
             return im
 
-        return self._read(c, z, t, read_func, self.format.path, region, subifd=subifd)
+        return self._read(c, z, t, read_func, self.format, region, subifd=subifd)
 
 
 class OmeTiffConvertor(AbstractConvertor):
@@ -13,16 +13,19 @@
 #  * limitations under the License.
 from typing import List, Optional, Union
 
-from pyvips import Image as VIPSImage
-
+from pims.api.utils.mimetype import OutputExtension
 from pims.cache import cached_property
 from pims.formats import AbstractFormat
 from pims.formats.utils.abstract import CachedDataPath
-from pims.formats.utils.engines.tifffile import TIFF_FLAGS, TifffileChecker, TifffileParser
-from pims.formats.utils.engines.vips import VipsReader, VipsSpatialConvertor
+from pims.formats.utils.engines.tifffile import (
+    TIFF_FLAGS, TifffileChecker, TifffileParser, cached_tifffile_page,
+    read_raw_jpeg_tile
+)
+from pims.formats.utils.engines.vips import VipsReader, VipsSpatialConvertor, cached_vips_tiffpage
 # -----------------------------------------------------------------------------
 # PYRAMIDAL TIFF
 from pims.formats.utils.histogram import DefaultHistogramReader
+from pims.utils.iterables import ensure_list
 
 
 class PyrTiffChecker(TifffileChecker):
@@ -64,7 +67,7 @@ class PyrTiffVipsReader(VipsReader):
         region = region.scale_to_tier(tier)
 
         page = tier.data.get('page_index')
-        tiff_page = VIPSImage.tiffload(str(self.format.path), page=page)
+        tiff_page = cached_vips_tiffpage(self.format, page)
         im = tiff_page.extract_area(
             region.left, region.top, region.width, region.height
         )
@@ -75,18 +78,38 @@ class PyrTiffVipsReader(VipsReader):
     ):
         tier = tile.tier
         page = tier.data.get('page_index')
-        tiff_page = VIPSImage.tiffload(str(self.format.path), page=page)
+        tiff_page = cached_vips_tiffpage(self.format, page)
 
         # There is no direct access to underlying tiles in vips
         # But the following computation match vips implementation so that only the tile
         # that has to be read is read.
         # https://github.com/jcupitt/tilesrv/blob/master/tilesrv.c#L461
-        # TODO: is direct tile access significantly faster ?
         im = tiff_page.extract_area(
             tile.left, tile.top, tile.width, tile.height
         )
         return self._extract_channels(im, c)
 
+    def read_raw_tile(
+        self, tile, out_format, c: Optional[Union[int, List[int]]] = None, **other
+    ):
+        if out_format != OutputExtension.JPEG:
+            return None
+
+        imd = self.format.main_imd
+        if c is not None and ensure_list(c) != list(range(imd.n_channels)):
+            return None
+
+        tier = tile.tier
+        if tile.width != tier.tile_width or tile.height != tier.tile_height:
+            # Native tiles at image borders are padded
+            return None
+
+        page = cached_tifffile_page(self.format, tier.data.get('page_index'))
+        if page.tilewidth != tier.tile_width or page.tilelength != tier.tile_height \
+                or page.samplesperpixel != imd.n_samples:
+            return None
+        return read_raw_jpeg_tile(page, tile.tx, tile.ty)
+
 
 class PyrTiffFormat(AbstractFormat):
     checker_class = PyrTiffChecker
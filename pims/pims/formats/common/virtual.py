@@ -11,15 +11,20 @@
 #  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
+from __future__ import annotations
+
 import logging
-from functools import cached_property
-from typing import List, Optional, Union
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING, Tuple, Union
 import pathlib
 import numpy as np
 import orjson
 from pyvips import Image as VIPSImage
 
-from pims.api.exceptions import MetadataParsingProblem
+from pims.api.exceptions import MetadataParsingProblem, NoAppropriateRepresentationProblem
 from pims.config import get_settings
 from pims.formats import AbstractFormat
 from pims.formats.utils.abstract import CachedDataPath
@@ -40,6 +45,9 @@ from pims.utils.iterables import ensure_list
 from pims.utils.types import parse_datetime
 from pims.utils.vips import bandjoin, fix_rgb_interpretation
 
+if TYPE_CHECKING:
+    from pims.files.file import Image
+
 log = logging.getLogger("pims.formats")
 
 
@@ -60,6 +68,80 @@ def cached_json(format: Union[AbstractFormat, CachedDataPath]) -> dict:
     )
 
 
+def _mtime(path: pathlib.Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class VirtualStackMembers:
+    """
+    The spatial images of the files referenced by a virtual stack.
+
+    Formats are matched once per file, and kept (with their parsed metadata
+    and opened handles) as long as the file modification time is unchanged.
+    A replaced image is closed once it is not used by a concurrent read
+    anymore.
+
+    It is thread-safe.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._images: Dict[str, Tuple[Image, Optional[int]]] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, location: str) -> Image:
+        with self._lock:
+            entry = self._images.get(location)
+
+        if entry is not None:
+            image, mtime = entry
+            if mtime is not None and mtime == _mtime(image):
+                return image
+
+        image = self._match(location)
+        with self._lock:
+            self._images[location] = (image, _mtime(image))
+        return image
+
+    def _match(self, location: str) -> Image:
+        from pims.files.file import Path
+
+        path = Path(self.root, location)
+        image = path.get_spatial()
+        if image is None:
+            raise NoAppropriateRepresentationProblem(path, "spatial")
+        return image
+
+    def close(self):
+        with self._lock:
+            images = [image for image, _ in self._images.values()]
+            self._images.clear()
+
+        for image in images:
+            image.close()
+
+    def __len__(self):
+        return len(self._images)
+
+
+def cached_members(format: AbstractFormat) -> VirtualStackMembers:
+    return format.get_cached(
+        '_members', VirtualStackMembers, get_settings().root
+    )
+
+
+@lru_cache()
+def get_members_executor() -> Optional[ThreadPoolExecutor]:
+    n_threads = get_settings().n_threads_virtual_stack
+    if n_threads <= 1:
+        return None
+    return ThreadPoolExecutor(
+        max_workers=n_threads, thread_name_prefix="virtual-stack"
+    )
+
+
 class VirtualStackChecker(SignatureChecker):
     @classmethod
     def match(cls, pathlike: CachedDataPath) -> bool:
@@ -153,62 +235,62 @@ class VirtualStackParser(AbstractParser):
 
 
 class VirtualStackReader(AbstractReader):
-    @staticmethod
-    def _get_underlying_format(filepath):
-        from pims.formats.utils.factories import SpatialReadableFormatFactory
-        from pims.files.file import Path
-        FILE_ROOT_PATH = get_settings().root
-        return SpatialReadableFormatFactory(match_on_ext=True).match(
-            Path(FILE_ROOT_PATH, filepath).get_spatial()
-        )
-
-    def read_thumb(self, out_width: int, out_height: int, precomputed: bool = None,
-                   c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None,
-                   t: Optional[int] = None) -> RawImagePixels:
-        bands = list()
+    def _get_member(self, location: str) -> Image:
+        return cached_members(self.format).get(location)
+
+    def _read_members(
+        self, read: Callable[[AbstractFormat], RawImagePixels],
+        c: Optional[Union[int, List[int]]], z: Optional[int], t: Optional[int]
+    ) -> VIPSImage:
+        """
+        Read the files of the given channels and join them as bands. Files
+        are read concurrently, as stacks can reference tens of channels.
+        """
         if c is None:
             channels = list(range(self.format.main_imd.n_channels))
         else:
             channels = ensure_list(c)
 
-        for c in channels:
-            bands.append(
-                convert_to(
-                    self._get_underlying_format(
-                        self.format.planes_info.get(c, z, t, "location")
-                    ).reader.read_thumb(out_width, out_height, precomputed),
-                    VIPSImage
-                )
-            )
+        locations = [
+            self.format.planes_info.get(channel, z, t, "location")
+            for channel in channels
+        ]
+
+        def read_member(location: str, render: bool = False) -> VIPSImage:
+            member = self._get_member(location)
+            band = convert_to(read(member.format), VIPSImage)
+            # Pixels of lazy vips images are decoded when the joined image
+            # is rendered, one member after the other: render them here.
+            return band.copy_memory() if render else band
+
+        executor = get_members_executor()
+        if executor is None or len(locations) == 1:
+            bands = [read_member(location) for location in locations]
+        else:
+            bands = list(executor.map(
+                lambda location: read_member(location, render=True), locations
+            ))
 
         im = bandjoin(bands)
-        if c == [0, 1, 2]:
+        if channels == [0, 1, 2]:
             im = fix_rgb_interpretation(im)
         return im
 
+    def read_thumb(self, out_width: int, out_height: int, precomputed: bool = None,
+                   c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None,
+                   t: Optional[int] = None) -> RawImagePixels:
+        return self._read_members(
+            lambda format: format.reader.read_thumb(out_width, out_height, precomputed),
+            c, z, t
+        )
+
     def read_window(self, region: Region, out_width: int, out_height: int,
                     c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None,
                     t: Optional[int] = None) -> RawImagePixels:
-        bands = list()
-        if c is None:
-            channels = list(range(self.format.main_imd.n_channels))
-        else:
-            channels = ensure_list(c)
-
-        for c in channels:
-            bands.append(
-                convert_to(
-                    self._get_underlying_format(
-                        self.format.planes_info.get(c, z, t, "location")
-                    ).reader.read_window(region, out_width, out_height),
-                    VIPSImage
-                )
-            )
-
-        im = bandjoin(bands)
-        if c == [0, 1, 2]:
-            im = fix_rgb_interpretation(im)
-        return im
+        return self._read_members(
+            lambda format: format.reader.read_window(region, out_width, out_height),
+            c, z, t
+        )
 
     def read_tile(self, tile: Tile, c: Optional[Union[int, List[int]]] = None,
                   z: Optional[int] = None, t: Optional[int] = None) -> RawImagePixels:
@@ -283,6 +365,11 @@ class VirtualStackFormat(AbstractFormat):
         super(VirtualStackFormat, self).__init__(*args, **kwargs)
         self._enabled = True
 
+    def close(self):
+        if self.is_in_cache('_members'):
+            cached_members(self).close()
+        super().close()
+
     @classmethod
     def is_spatial(cls):
         return True
@@ -53,9 +53,16 @@ TIFF_FLAGS = (
 )
 
 
+# Adobe APP14 marker segment with transform flag set to 0, telling decoders
+# that JPEG components are RGB and not YCbCr.
+_JPEG_APP14_ADOBE_RGB = b'\xff\xee\x00\x0eAdobe\x00\x64\x00\x00\x00\x00\x00'
+
+
 def read_tifffile(path, silent_fail=True):
     try:
         tf = tifffile.TiffFile(path)
+        # Opened files can be shared across threads (see format pool)
+        tf.filehandle.lock = True
     except tifffile.TiffFileError as error:
         if not silent_fail:
             raise error
@@ -76,6 +83,57 @@ def cached_tifffile_baseline(format: AbstractFormat) -> TiffPage:
     return format.get_cached('_tf_baseline', tf.pages.__getitem__, 0)
 
 
+def cached_tifffile_page(format: AbstractFormat, index: int) -> TiffPage:
+    tf = cached_tifffile(format)
+    return format.get_cached(f'_tf_page_{index}', tf.pages.__getitem__, index)
+
+
+def read_raw_jpeg_tile(page: TiffPage, tx: int, ty: int) -> Optional[bytes]:
+    """
+    Get a native tile of a JPEG-compressed tiled TIFF page as a standalone
+    JPEG bitstream, without decoding it.
+
+    Shared JPEG tables are merged in the tile bitstream when needed.
+
+    Returns
+    -------
+    jpeg
+        The JPEG bytes, or None if the tile cannot be extracted as is.
+    """
+    if (not page.is_tiled or page.compression != TIFF.COMPRESSION.JPEG
+            or page.bitspersample != 8 or page.imagedepth != 1
+            or page.planarconfig != TIFF.PLANARCONFIG.CONTIG
+            or page.photometric not in (
+                TIFF.PHOTOMETRIC.MINISBLACK, TIFF.PHOTOMETRIC.RGB,
+                TIFF.PHOTOMETRIC.YCBCR
+            )):
+        return None
+
+    tiles_across = -(-page.imagewidth // page.tilewidth)
+    index = ty * tiles_across + tx
+    if not 0 <= index < len(page.dataoffsets):
+        return None
+
+    offset = page.dataoffsets[index]
+    bytecount = page.databytecounts[index]
+    if bytecount == 0:
+        return None
+
+    fh = page.parent.filehandle
+    with fh.lock:
+        fh.seek(offset)
+        data = fh.read(bytecount)
+
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    # Tables-only datastream: SOI, tables, EOI.
+    tables = page.jpegtables[2:-2] if page.jpegtables else b''
+    if page.photometric == TIFF.PHOTOMETRIC.RGB:
+        tables = _JPEG_APP14_ADOBE_RGB + tables
+    return data[:2] + tables + data[2:]
+
+
 class TifffileChecker(SignatureChecker):
     @classmethod
     def get_tifffile(cls, pathlike: CachedDataPath):
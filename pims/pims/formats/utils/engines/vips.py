@@ -45,6 +45,25 @@ def cached_vips_file(format: AbstractFormat) -> VIPSImage:
     return format.get_cached('_vips', VIPSImage.new_from_file, str(format.path))
 
 
+def cached_vips_tiffpage(
+    format: AbstractFormat, page: int, subifd: Optional[int] = None
+) -> VIPSImage:
+    """
+    Get cached vips TIFF loader for a page (and sub-IFD) of the image format.
+
+    Keeping the loader avoids to re-open and re-parse the file for every
+    read. As vips only decodes the native tiles intersecting a requested
+    area, a read matching the file tile grid decodes exactly one tile.
+    """
+    options = dict(page=page)
+    if subifd is not None:
+        options['subifd'] = subifd
+    return format.get_cached(
+        f'_vips_tiffpage_{page}_{subifd}', VIPSImage.tiffload,
+        str(format.path), **options
+    )
+
+
 def get_vips_field(
     vips_image: VIPSImage, field: str, default: Any = None
 ) -> Any:
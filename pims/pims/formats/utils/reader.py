@@ -18,6 +18,7 @@ from typing import List, Optional, TYPE_CHECKING, Tuple, Union
 
 import numpy as np
 
+from pims.api.utils.mimetype import OutputExtension
 from pims.processing.adapters import RawImagePixels
 from pims.processing.region import Region, Tile
 from pims.utils.iterables import ensure_list
@@ -180,6 +181,41 @@ class AbstractReader(ABC):
         """
         raise NotImplementedError()
 
+    def read_raw_tile(
+        self, tile: Tile, out_format: OutputExtension,
+        c: Optional[Union[int, List[int]]] = None, z: Optional[int] = None, t: Optional[int] = None
+    ) -> Optional[bytes]:
+        """
+        Get an image tile as it is encoded in the image file, if this encoding
+        matches the asked output format. It allows to send the tile without
+        decoding and re-encoding it when no processing is required.
+
+        Contrary to `read_tile`, asked channels are not best-effort: the
+        returned tile MUST have exactly the asked channels, at the tile
+        dimensions.
+
+        Parameters
+        ----------
+        tile
+            A 2D region at a given downsample (linked to a pyramid tier)
+        out_format
+            The asked output format
+        c
+            The asked channel index(es).
+            If not set, all channels are considered.
+        z
+            The asked z-slice index.
+        t
+            The asked timepoint index.
+
+        Returns
+        -------
+        raw_tile
+            The encoded tile, or None if it is not possible to get it for
+            this tile and output format.
+        """
+        return None
+
     def read_label(self, out_width: int, out_height: int) -> Optional[RawImagePixels]:
         """
         Get a precomputed image label whose output dimensions are the nearest
@@ -40,7 +40,9 @@ from pims.importer.listeners import (
     StdoutListener
 )
 from pims.processing.histograms.utils import build_histogram_file
-from pims.tasks.queue import BG_TASK_MAPPING, CELERY_TASK_MAPPING, Task, func_from_str
+from pims.tasks.queue import (
+    BG_TASK_MAPPING, CELERY_TASK_MAPPING, Task, func_from_str, send_task
+)
 from pims.utils.strings import unique_name_generator
 
 log = logging.getLogger("pims.app")
@@ -311,6 +313,9 @@ class FileImporter:
                 ImportEventType.END_SUCCESSFUL_IMPORT,
                 self.upload_path, self.original
             )
+
+            if get_settings().warm_cache_after_import:
+                send_task(Task.WARM_CACHE, args=[self.upload_path.public_filepath])
             return [self.upload_path]
         except Exception as e:
             self.notify(
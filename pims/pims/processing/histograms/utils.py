@@ -14,7 +14,8 @@
 from __future__ import annotations
 
 import shutil
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple, Union
 
 import numpy as np
 import zarr as zarr
@@ -30,10 +31,20 @@ from pims.processing.histograms.format import (
     ZHF_PER_PLANE
 )
 from pims.processing.pixels import ImagePixels
+from pims.processing.region import Region, Tile
 from pims.utils.math import max_intensity
 
 MAX_PIXELS_COMPLETE_HISTOGRAM = get_settings().max_pixels_complete_histogram
 MAX_LENGTH_COMPLETE_HISTOGRAM = get_settings().max_length_complete_histogram
+N_THREADS_COMPLETE_HISTOGRAM = get_settings().n_threads_complete_histogram
+
+# Native tiles larger than this are not read at once while streaming over
+# the full resolution image, regions of `STREAM_REGION_SIZE` are read instead.
+STREAM_TILE_MAX_SIZE = 2048
+STREAM_REGION_SIZE = 1024
+# Maximum number of bins accumulated at once by a thread (for all channels
+# processed together)
+STREAM_MAX_BINS = 2 ** 22
 
 
 def argmin_nonzero(arr, axis=-1):
@@ -130,6 +141,90 @@ def _extract_np_thumb(image):
                 yield thumb.np_array(), c, z, t, ratio
 
 
+def _extract_thumb_histograms(image, n_values):
+    for data, c_range, z, t, ratio in _extract_np_thumb(image):
+        hist = np.zeros(shape=(len(c_range), n_values), dtype=np.uint64)
+        for read in range(len(c_range)):
+            h, _ = histogram(data[:, :, read], source_range='dtype')
+            hist[read] += np.rint(h * ratio).astype(np.uint64)
+        yield hist, c_range, z, t
+
+
+def _n_stream_regions(image) -> int:
+    tier = image.pyramid.base
+    if tier.tile_width <= STREAM_TILE_MAX_SIZE and tier.tile_height <= STREAM_TILE_MAX_SIZE:
+        return tier.max_ti
+    return (
+        -(-image.width // STREAM_REGION_SIZE) * -(-image.height // STREAM_REGION_SIZE)
+    )
+
+
+def _stream_region(image, index: int) -> Union[Tile, Region]:
+    """
+    Get the region at given index, amongst regions covering the image at full
+    resolution. Regions are the native tiles of the base tier, if they are
+    small enough.
+    """
+    tier = image.pyramid.base
+    if tier.tile_width <= STREAM_TILE_MAX_SIZE and tier.tile_height <= STREAM_TILE_MAX_SIZE:
+        return tier.get_ti_tile(index)
+
+    nx = -(-image.width // STREAM_REGION_SIZE)
+    left = (index % nx) * STREAM_REGION_SIZE
+    top = (index // nx) * STREAM_REGION_SIZE
+    return Region(
+        top, left, min(STREAM_REGION_SIZE, image.width - left),
+        min(STREAM_REGION_SIZE, image.height - top)
+    )
+
+
+def _accumulate_stream_histogram(image, indexes: range, c_range, z, t, n_values) -> np.ndarray:
+    hist = np.zeros(shape=(len(c_range), n_values), dtype=np.int64)
+    for index in indexes:
+        region = _stream_region(image, index)
+        if isinstance(region, Tile):
+            pixels = image.tile(region, c=list(c_range), z=z, t=t)
+        else:
+            pixels = image.window(
+                region, region.width, region.height, c=list(c_range), z=z, t=t
+            )
+        data = ImagePixels(pixels).int_clip().np_array()
+        if data.ndim == 2:
+            data = data[:, :, np.newaxis]
+
+        for read in range(len(c_range)):
+            counts = np.bincount(data[:, :, read].ravel(), minlength=n_values)
+            hist[read] += counts[:n_values]
+            hist[read, -1] += counts[n_values:].sum()
+    return hist
+
+
+def _extract_stream_histograms(image, n_values) -> Iterator:
+    """
+    Exact histograms computed on all pixels, streaming over regions of the
+    image at full resolution. Regions are split between threads, each one
+    accumulating counts for its own regions, so that memory usage does not
+    depend on image size.
+    """
+    n_regions = _n_stream_regions(image)
+    n_threads = max(1, min(N_THREADS_COMPLETE_HISTOGRAM, n_regions))
+    c_chunk_size = max(1, STREAM_MAX_BINS // n_values)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for t in range(image.duration):
+            for z in range(image.depth):
+                for i in range(0, image.n_channels, c_chunk_size):
+                    c = range(i, min(image.n_channels, i + c_chunk_size))
+                    partial_hists = executor.map(
+                        lambda k: _accumulate_stream_histogram(
+                            image, range(k, n_regions, n_threads), c, z, t, n_values
+                        ),
+                        range(n_threads)
+                    )
+                    hist = sum(partial_hists)
+                    yield hist.astype(np.uint64), c, z, t
+
+
 def build_histogram_file(
     in_image, dest, hist_type: HistogramType,
     overwrite: bool = False
@@ -155,14 +250,13 @@ def build_histogram_file(
     n_values = 2 ** min(in_image.significant_bits, 16)
 
     if in_image.n_pixels <= MAX_PIXELS_COMPLETE_HISTOGRAM:
-        extract_fn = _extract_np_thumb
+        extract_fn = _extract_thumb_histograms
         hist_type = HistogramType.COMPLETE
     else:
         if hist_type == HistogramType.FAST:
-            extract_fn = _extract_np_thumb
+            extract_fn = _extract_thumb_histograms
         else:
-            extract_fn = in_image.tile
-            raise NotImplementedError()  # TODO
+            extract_fn = _extract_stream_histograms
 
     if not overwrite and dest.exists():
         raise FileExistsError(dest)
@@ -174,28 +268,27 @@ def build_histogram_file(
     zroot.attrs[ZHF_ATTR_FORMAT] = "PIMS-1.0"
 
     # Create the group for plane histogram
-    # TODO: usa Dask to manipulate Zarr arrays (for bounds)
-    #  so that we can fill the zarr array incrementally
-    # https://github.com/zarr-developers/zarr-python/issues/446
+    # Plane histograms are written incrementally, so that only channel
+    # histograms are kept in memory.
     shape = (in_image.duration, in_image.depth, in_image.n_channels)
     zplane = zroot.create_group(ZHF_PER_PLANE)
-    npplane_hist = np.zeros(shape=shape + (n_values,), dtype=np.uint64)
-    for data, c_range, z, t, ratio in extract_fn(in_image):
-        for read, c in enumerate(c_range):
-            h, _ = histogram(data[:, :, read], source_range='dtype')
-            npplane_hist[t, z, c, :] += np.rint(h * ratio).astype(np.uint64)
-    zplane.array(ZHF_HIST, npplane_hist)
-    zplane.array(
-        ZHF_BOUNDS,
-        np.stack(
-            (argmin_nonzero(npplane_hist),
-             argmax_nonzero(npplane_hist)), axis=-1
-        )
+    zplane_hist = zplane.zeros(
+        ZHF_HIST, shape=shape + (n_values,), chunks=(1, 1, 1, n_values),
+        dtype=np.uint64
     )
+    npplane_bounds = np.zeros(shape=shape + (2,), dtype=np.int64)
+    npchannel_hist = np.zeros(shape=(in_image.n_channels, n_values), dtype=np.uint64)
+    for hist, c_range, z, t in extract_fn(in_image, n_values):
+        c_slice = slice(c_range.start, c_range.stop)
+        zplane_hist[t, z, c_slice] = hist
+        npplane_bounds[t, z, c_slice] = np.stack(
+            (argmin_nonzero(hist), argmax_nonzero(hist)), axis=-1
+        )
+        npchannel_hist[c_slice] += hist
+    zplane.array(ZHF_BOUNDS, npplane_bounds)
 
     # Create the group for channel histogram
     zchannel = zroot.create_group(ZHF_PER_CHANNEL)
-    npchannel_hist = np.sum(npplane_hist, axis=(0, 1))
     zchannel.array(ZHF_HIST, npchannel_hist)
     zchannel.array(
         ZHF_BOUNDS,
@@ -22,6 +22,7 @@ from pims.api.utils.models import (
     AnnotationStyleMode, AssociatedName, ChannelReduction,
     Colorspace, GenericReduction, PointCross
 )
+from pims.cache.lut import get_lut_cache
 from pims.files.file import Image
 from pims.filters import AbstractFilter
 from pims.processing.adapters import RawImagePixels
@@ -198,6 +199,7 @@ class ProcessedView(MultidimImageResponse, ABC):
     def math_lut(self) -> Optional[StackedLookUpTables]:
         """
         Compute lookup table for math processing operations if any.
+        Lookup tables are shared by all responses with the same parameters.
 
         Returns
         -------
@@ -207,6 +209,22 @@ class ProcessedView(MultidimImageResponse, ABC):
         if not self.math_processing:
             return None
 
+        return get_lut_cache().get(self.math_lut_key(), self._math_lut)
+
+    def math_lut_key(self) -> tuple:
+        """All the parameters the math lookup table is computed from."""
+        intensity = self.intensity_processing
+        return (
+            'math', len(self.channels), self.in_image.max_value,
+            self.max_intensity, self.best_effort_bitdepth,
+            tuple(self.min_intensities) if intensity else None,
+            tuple(self.max_intensities) if intensity else None,
+            tuple(self.gammas) if self.gamma_processing else None,
+            self.log_processing,
+            self.threshold if self.threshold_processing else None
+        )
+
+    def _math_lut(self) -> StackedLookUpTables:
         n_channels = len(self.channels)
         lut = np.zeros((n_channels, self.in_image.max_value + 1, 1))
         if self.intensity_processing:
@@ -260,6 +278,7 @@ class ProcessedView(MultidimImageResponse, ABC):
     def colormap_lut(self) -> Optional[StackedLookUpTables]:
         """
         Compute lookup table from colormaps if any.
+        Lookup tables are shared by all responses with the same parameters.
 
         Returns
         -------
@@ -269,6 +288,18 @@ class ProcessedView(MultidimImageResponse, ABC):
         if not self.colormap_processing:
             return None
 
+        return get_lut_cache().get(self.colormap_lut_key(), self._colormap_lut)
+
+    def colormap_lut_key(self) -> tuple:
+        """All the parameters the colormap lookup table is computed from."""
+        return (
+            'colormap',
+            tuple(cm.identifier if cm else None for cm in self.colormaps),
+            self.max_intensity, self.best_effort_bitdepth,
+            self.threshold_processing
+        )
+
+    def _colormap_lut(self) -> StackedLookUpTables:
         n_components = np.max(
             [colormap.n_components() if colormap else 1
              for colormap in self.colormaps]
@@ -293,19 +324,15 @@ class ProcessedView(MultidimImageResponse, ABC):
         """
         The lookup table to apply combining all processing operations.
         """
-        math_lut = self.math_lut()
-        colormap_lut = self.colormap_lut()
+        if not self.math_processing:
+            return self.colormap_lut()
+        if not self.colormap_processing:
+            return self.math_lut()
 
-        if math_lut is None:
-            if colormap_lut is None:
-                return None
-            else:
-                return colormap_lut
-        else:
-            if colormap_lut is None:
-                return math_lut
-            else:
-                return combine_stacked_lut(math_lut, colormap_lut)
+        key = ('combined', self.math_lut_key(), self.colormap_lut_key())
+        return get_lut_cache().get(
+            key, lambda: combine_stacked_lut(self.math_lut(), self.colormap_lut())
+        )
 
     # Colorspace
 
@@ -592,6 +619,31 @@ class TileResponse(ProcessedView):
         # Tile (region)
         self.tile_region = tile_region
 
+    @property
+    def passthrough(self) -> bool:
+        """
+        Whether the tile can be sent as encoded in the image file, that is,
+        without any processing.
+        """
+        return (self.out_format == OutputExtension.JPEG
+                and not self.out_format_params
+                and self.out_width == self.tile_region.width
+                and self.out_height == self.tile_region.height
+                and self.c_reduction == ChannelReduction.ADD
+                and not self.math_processing
+                and not self.colormap_processing
+                and not self.filter_processing
+                and not self.colorspace_processing)
+
+    def get_response_buffer(self) -> bytes:
+        if self.passthrough:
+            raw_tile = self.in_image.raw_tile(
+                self.tile_region, self.out_format, *self.raw_view_planes()
+            )
+            if raw_tile is not None:
+                return raw_tile
+        return super().get_response_buffer()
+
     def raw_view(self, c: Union[int, List[int]], z: int, t: int) -> RawImagePixels:
         return self.in_image.tile(self.tile_region, c=c, z=z, t=t)
 
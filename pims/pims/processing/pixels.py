@@ -113,6 +113,14 @@ class ImagePixelsImpl(ABC):
         pass
 
 
+def _clipped_sum(arrays: List[np.ndarray], dtype: np.dtype) -> np.ndarray:
+    """Sum of unsigned integer arrays, clipped to `dtype` as a libvips cast."""
+    total = np.zeros(arrays[0].shape, dtype=np.uint32)
+    for array in arrays:
+        total += array
+    return np.minimum(total, np.iinfo(dtype).max).astype(dtype)
+
+
 class NumpyImagePixels(ImagePixelsImpl):
     def __init__(self, pixels: np.ndarray):
         super().__init__(pixels)
@@ -127,16 +135,67 @@ class NumpyImagePixels(ImagePixelsImpl):
         return self
 
     def apply_lut(self, lut: LookUpTable) -> ImagePixelsImpl:
-        # TODO
-        return self.context.transition_to(VIPSImage).apply_lut(lut)
+        """
+        Apply lookup table, with the same output than `VipsImagePixels`.
+        Pixel values out of the lookup table use its last value.
+        """
+        if not np.issubdtype(self.pixels.dtype, np.unsignedinteger):
+            return self.context.transition_to(VIPSImage).apply_lut(lut)
+
+        n_channels = self.pixels.shape[2]
+        n_components = lut.shape[1]
+        if n_components == 1:
+            self.pixels = np.take(lut[:, 0], self.pixels, mode='clip')
+        elif n_channels == 1:
+            self.pixels = np.take(lut, self.pixels[:, :, 0], axis=0, mode='clip')
+        elif n_channels == n_components:
+            self.pixels = np.dstack([
+                np.take(lut[:, i], self.pixels[:, :, i], mode='clip')
+                for i in range(n_channels)
+            ])
+        else:
+            return self.context.transition_to(VIPSImage).apply_lut(lut)
+        return self
 
     def apply_lut_stack(
         self, lut_stack: StackedLookUpTables, reduction: ChannelReduction, is_rgb: bool
     ) -> ImagePixelsImpl:
-        # TODO
-        return self.context.transition_to(
-            VIPSImage
-        ).apply_lut_stack(lut_stack, reduction, is_rgb)
+        if not np.issubdtype(self.pixels.dtype, np.unsignedinteger):
+            return self.context.transition_to(
+                VIPSImage
+            ).apply_lut_stack(lut_stack, reduction, is_rgb)
+
+        stack_size, _, n_components = lut_stack.shape
+        if stack_size == 1:
+            # As stack size is 1, reduction can be ignored.
+            return self.apply_lut(get_lut_from_stacked(lut_stack))
+        elif n_components == 1:
+            lut_stack = np.swapaxes(lut_stack, 0, 2)
+            pixels = self.apply_lut(get_lut_from_stacked(lut_stack))
+            if is_rgb:
+                return pixels
+            if reduction == ChannelReduction.ADD:
+                self.pixels = _clipped_sum(
+                    [self.pixels[:, :, i] for i in range(self.pixels.shape[2])],
+                    self.pixels.dtype
+                )
+                return self
+            if reduction in (ChannelReduction.MAX, ChannelReduction.MIN):
+                return pixels.channel_reduction(reduction)
+            # Median is computed as in libvips.
+            return self.context.transition_to(VIPSImage).channel_reduction(reduction)
+        else:
+            if reduction != ChannelReduction.ADD:
+                raise ValueError(f"{reduction} should not happen here!")
+
+            self.pixels = _clipped_sum(
+                [
+                    np.take(lut_stack[i], self.pixels[:, :, i], axis=0, mode='clip')
+                    for i in range(self.pixels.shape[2])
+                ],
+                lut_stack.dtype
+            )
+            return self
 
     def resize(self, width: int, height: int) -> ImagePixelsImpl:
         return self.context.transition_to(VIPSImage).resize(width, height)
@@ -22,6 +22,7 @@ except:  # noqa
 # ----
 
 from pims.api.exceptions import AuthenticationException
+from pims.cache.warming import run_warm_image_cache
 from pims.importer.importer import run_import as run_import_
 from pims.tasks.queue import celery_app
 
@@ -52,4 +53,9 @@ def run_import(filepath, name, prefer_copy):
 
 
 def run_import_fallback(filepath, name, prefer_copy):
-    run_import_(filepath, name, prefer_copy=prefer_copy)
\ No newline at end of file
+    run_import_(filepath, name, prefer_copy=prefer_copy)
+
+
+@celery_app.task
+def run_warm_cache(filepath):
+    run_warm_image_cache(filepath)
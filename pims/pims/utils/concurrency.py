@@ -13,6 +13,7 @@
 #  * limitations under the License.
 
 import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
 from starlette.concurrency import run_in_threadpool
 
@@ -22,4 +23,51 @@ async def exec_func_async(func, *args, **kwargs):
     if is_async:
         return await func(*args, **kwargs)
     else:
-        return await run_in_threadpool(func, *args, **kwargs)
\ No newline at end of file
+        return await run_in_threadpool(func, *args, **kwargs)
+
+class SingleFlight:
+    """
+    Deduplicate concurrent executions of an awaitable identified by a key:
+    while an execution for a key is in flight, other callers with the same
+    key wait for its result (or exception) instead of executing it again.
+
+    An execution runs in its own task: cancelling a caller, including the
+    one which started it, does not cancel the execution the others wait for.
+
+    Must be used from a single event loop.
+    """
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = dict()
+
+    async def do(
+        self, key: str, func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Execute `func` unless an execution for `key` is in flight.
+
+        Returns
+        -------
+        result
+            The result of the execution
+        shared
+            Whether the result comes from an execution started by another caller
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(func())
+        self._in_flight[key] = future
+
+        def _done(f: asyncio.Future):
+            if self._in_flight.get(key) is f:
+                del self._in_flight[key]
+            # Mark the exception as retrieved, even if nobody was waiting
+            if not f.cancelled():
+                f.exception()
+
+        future.add_done_callback(_done)
+        return await asyncio.shield(future), False
+
+    def __len__(self):
+        return len(self._in_flight)
@@ -0,0 +1,133 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import pyvips
+import tifffile
+from pyvips import Image as VIPSImage
+
+from pims.files.file import Path
+from pims_plugin_format_openslide.svs import SVSFormat
+
+APERIO_DESCRIPTION = "Aperio Image Library v12.0.0\n{width}x{height} ({tile}x{tile})|AppMag = 20|MPP = 0.5"
+
+
+def make_svs(path: str, width: int, height: int, tile_size: int = 240, n_levels: int = 3):
+    """
+    Write a synthetic multi-level slide laid out as an Aperio SVS: baseline,
+    thumbnail, lower resolutions (downsampled by 4), label and macro.
+    """
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:height, 0:width]
+    arr = np.stack([(xx // 7) % 256, (yy // 5) % 256, ((xx + yy) // 11) % 256], axis=-1)
+    arr = (arr + rng.integers(0, 20, size=arr.shape)).astype(np.uint8)
+
+    description = APERIO_DESCRIPTION.format(width=width, height=height, tile=tile_size)
+    stripped = dict(photometric='rgb', metadata=None)
+    tiled = dict(stripped, tile=(tile_size, tile_size), compression='zlib')
+    with tifffile.TiffWriter(path, bigtiff=True) as tif:
+        tif.write(arr, description=description, **tiled)
+        tif.write(arr[::32, ::32], description=description, **stripped)
+        for level in range(1, n_levels):
+            tif.write(arr[::4 ** level, ::4 ** level], description=description, **tiled)
+        tif.write(arr[:400:2, :400:2], subfiletype=1, description="label", **stripped)
+        tif.write(arr[::8, ::8], subfiletype=9, description="macro", **stripped)
+
+
+def all_tiles(format):
+    for tier in format.pyramid.tiers:
+        for ti in range(tier.max_ti):
+            yield tier.get_ti_tile(ti)
+
+
+def read_tile_per_call_openslideload(format, tile):
+    """Tile read as done before level loaders were cached in the format."""
+    level_page = VIPSImage.openslideload(str(format.path), level=tile.tier.level)
+    return level_page.extract_area(tile.left, tile.top, tile.width, tile.height).flatten()
+
+
+def read_tile_cached_loader(format, tile):
+    return format.reader.read_tile(tile)
+
+
+def read_associated_per_call_openslideload(format):
+    """Associated images read as done before they were cached in the format."""
+    for associated in ('label', 'macro'):
+        VIPSImage.openslideload(str(format.path), associated=associated).flatten() \
+            .write_to_memory()
+
+
+def read_associated_cached(format):
+    format.reader.read_label(None, None).write_to_memory()
+    format.reader.read_macro(None, None).write_to_memory()
+
+
+def bench_associated(format, read_func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        read_func(format)
+    return rounds / (time.perf_counter() - start)
+
+
+def bench(format, read_func, rounds):
+    tiles = list(all_tiles(format))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for tile in tiles:
+            read_func(format, tile).write_to_memory()
+    return len(tiles) * rounds / (time.perf_counter() - start)
+
+
+# Run me with: CONFIG_FILE=/path/to/config.env python benchmarks/bench_openslide_tiles.py
+# libvips must be built with OpenSlide support.
+if __name__ == '__main__':
+    parser = ArgumentParser(prog="Benchmark tile reads (tiles/sec) on an OpenSlide slide.")
+    parser.add_argument('--path', help="An SVS slide. If not set, a synthetic one is generated.")
+    parser.add_argument('--width', type=int, default=8192)
+    parser.add_argument('--height', type=int, default=6144)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--vips-cache-max', type=int, default=100,
+                        help="Maximum number of operations in libvips cache (PIMS default: 100). "
+                             "The benchmark is also run with a disabled cache, which is what "
+                             "happens when the shared cache is under pressure in production.")
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = params.path
+        if path is None:
+            path = f"{tmp}/synthetic.svs"
+            make_svs(path, params.width, params.height)
+
+        fmt = SVSFormat(Path(path))
+        print(f"{path}: {fmt.main_imd.width}x{fmt.main_imd.height}, "
+              f"{fmt.pyramid.n_levels} levels, "
+              f"{sum(tier.max_ti for tier in fmt.pyramid.tiers)} tiles")
+
+        for cache_max in (params.vips_cache_max, 0):
+            pyvips.cache_set_max(cache_max)
+            before = bench(fmt, read_tile_per_call_openslideload, params.rounds)
+            after = bench(fmt, read_tile_cached_loader, params.rounds)
+            print(f"libvips operation cache max = {cache_max}")
+            print(f"  Before (openslideload per tile): {before:.1f} tiles/sec")
+            print(f"  After (cached level loader): {after:.1f} tiles/sec")
+            print(f"  Speedup: x{after / before:.2f}")
+
+            before = bench_associated(fmt, read_associated_per_call_openslideload, params.rounds)
+            after = bench_associated(fmt, read_associated_cached, params.rounds)
+            print(f"  Label and macro, before: {before:.1f} reads/sec, "
+                  f"after: {after:.1f} reads/sec")
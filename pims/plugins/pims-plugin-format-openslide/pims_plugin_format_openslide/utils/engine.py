@@ -15,10 +15,11 @@ from typing import List, Optional, Union
 
 from pyvips import Image as VIPSImage
 
+from pims.config import get_settings
 from pims.formats import AbstractFormat
 from pims.formats.utils.engines.vips import VipsParser, VipsReader, get_vips_field
 from pims.formats.utils.structures.metadata import ImageMetadata, MetadataStore
-from pims.formats.utils.structures.pyramid import Pyramid
+from pims.formats.utils.structures.pyramid import Pyramid, PyramidTier
 from pims.utils import UNIT_REGISTRY
 from pims.utils.types import parse_float, parse_int
 
@@ -29,6 +30,59 @@ def cached_vips_openslide_file(format: AbstractFormat) -> VIPSImage:
     )
 
 
+def _open_openslide_level(path: str, tier: PyramidTier) -> VIPSImage:
+    level_page = VIPSImage.openslideload(path, level=tier.level).flatten()
+
+    max_tiles = get_settings().openslide_tile_cache_max_tiles
+    if max_tiles <= 0:
+        return level_page
+
+    return level_page.tilecache(
+        tile_width=tier.tile_width, tile_height=tier.tile_height,
+        max_tiles=max_tiles, threaded=True
+    )
+
+
+def cached_vips_openslide_level(
+    format: AbstractFormat, tier: PyramidTier
+) -> VIPSImage:
+    """
+    Get cached flattened vips OpenSlide loader for a pyramid level of the
+    image format.
+
+    Keeping the loader keeps the slide opened across reads, instead of
+    relying on the shared libvips operation cache. Decoded tiles of the
+    level are kept in a tile cache, sized by `openslide_tile_cache_max_tiles`,
+    so that overlapping windows and tiles not aligned on the slide grid do
+    not decode the same tiles again.
+    """
+    return format.get_cached(
+        f'_vipsos_level_{tier.level}', _open_openslide_level,
+        str(format.path), tier
+    )
+
+
+def _load_openslide_associated(path: str, associated: str) -> VIPSImage:
+    image = VIPSImage.openslideload(path, associated=associated).flatten()
+    image_bytes = image.write_to_memory()
+    return VIPSImage.new_from_memory(
+        image_bytes, image.width, image.height, image.bands, image.format
+    ).copy(interpretation=image.interpretation)
+
+
+def cached_vips_openslide_associated(
+    format: AbstractFormat, associated: str
+) -> VIPSImage:
+    """
+    Get cached flattened associated image (label, macro, thumbnail) of the
+    image format. The image is decoded once and kept in memory.
+    """
+    return format.get_cached(
+        f'_vipsos_associated_{associated}', _load_openslide_associated,
+        str(format.path), associated
+    )
+
+
 class OpenslideVipsParser(VipsParser):
     def parse_main_metadata(self) -> ImageMetadata:
         imd = super().parse_main_metadata()
@@ -108,9 +162,7 @@ class OpenslideVipsReader(VipsReader):
         if precomputed:
             imd = self.format.full_imd
             if imd.associated_thumb.exists:
-                im = VIPSImage.openslideload(
-                    str(self.format.path), associated='thumbnail'
-                ).flatten()
+                im = cached_vips_openslide_associated(self.format, 'thumbnail')
                 return self._extract_channels(im, c)
 
         return super().read_thumb(out_width, out_height, **other)
@@ -123,21 +175,17 @@ class OpenslideVipsReader(VipsReader):
         tier = self.format.pyramid.most_appropriate_tier(region, out_size)
         region = region.scale_to_tier(tier)
 
-        level_page = VIPSImage.openslideload(
-            str(self.format.path), level=tier.level
-        )
+        level_page = cached_vips_openslide_level(self.format, tier)
         im = level_page.extract_area(
             region.left, region.top, region.width, region.height
-        ).flatten()
+        )
         return self._extract_channels(im, c)
 
     def read_tile(
         self, tile, c: Optional[Union[int, List[int]]] = None, **other
     ):
         tier = tile.tier
-        level_page = VIPSImage.openslideload(
-            str(self.format.path), level=tier.level
-        )
+        level_page = cached_vips_openslide_level(self.format, tier)
 
         # There is no direct access to underlying tiles in vips
         # But the following computation match vips implementation so that only
@@ -145,21 +193,17 @@ class OpenslideVipsReader(VipsReader):
         # https://github.com/jcupitt/tilesrv/blob/master/tilesrv.c#L461
         im = level_page.extract_area(
             tile.left, tile.top, tile.width, tile.height
-        ).flatten()
+        )
         return self._extract_channels(im, c)
 
     def read_label(self, out_width, out_height, **other):
         imd = self.format.full_imd
         if imd.associated_label.exists:
-            return VIPSImage.openslideload(
-                str(self.format.path), associated='label'
-            ).flatten()
+            return cached_vips_openslide_associated(self.format, 'label')
         return None
 
     def read_macro(self, out_width, out_height, **other):
         imd = self.format.full_imd
         if imd.associated_macro.exists:
-            return VIPSImage.openslideload(
-                str(self.format.path), associated='macro'
-            ).flatten()
+            return cached_vips_openslide_associated(self.format, 'macro')
         return None
@@ -17,10 +17,15 @@ import shutil
 from contextlib import contextmanager
 from pathlib import Path
 
+import numpy as np
 import pytest
+import pyvips
 from fastapi.testclient import TestClient
 
 from pims import config
+from pims.cache.redis import (
+    CACHE_KEY_NAMESPACE_IMAGE_RESPONSE, PIMSCache, PickleCodec, all_kwargs_key_builder
+)
 
 CLEAR_AT_SHUTDOWN=False
 
@@ -137,3 +142,61 @@ def not_raises(expected_exc):
         raise AssertionError(
             f"An unexpected exception {repr(err)} raised."
         )
+
+
+@pytest.fixture
+def pyramidal_image_path(settings):
+    upload = os.path.join(settings.root, "upload-test-tiles")
+    processed = os.path.join(upload, "processed")
+    os.makedirs(processed, exist_ok=True)
+
+    x = np.arange(600, dtype=np.uint8)
+    y = np.arange(400, dtype=np.uint8)[:, np.newaxis]
+    arr = ((x + 2 * y) % 256).astype(np.uint8)
+    upload_path = os.path.join(upload, "image.tif")
+    pyvips.Image.new_from_array(arr).tiffsave(
+        upload_path, pyramid=True, tile=True, tile_width=256, tile_height=256
+    )
+    for stem in ("original", "visualisation"):
+        os.symlink(upload_path, os.path.join(processed, f"{stem}.PYRTIFF"))
+
+    yield "upload-test-tiles/image.tif"
+    shutil.rmtree(upload, ignore_errors=True)
+
+
+class FakeCacheBackend:
+    def __init__(self):
+        self.values = dict()
+        self.locks = set()
+
+    async def get_with_ttl(self, key, namespace=None):
+        return (-1, self.values[key]) if key in self.values else (-2, None)
+
+    async def get(self, key, namespace=None):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=None, namespace=None):
+        self.values[key] = value
+
+    async def acquire_lock(self, key, expire, namespace=None):
+        if key in self.locks:
+            return False
+        self.locks.add(key)
+        return True
+
+    async def release_lock(self, key, namespace=None):
+        self.locks.discard(key)
+
+    def image_responses(self):
+        return [k for k in self.values if k.startswith(CACHE_KEY_NAMESPACE_IMAGE_RESPONSE)]
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    backend = FakeCacheBackend()
+    for attr, value in (
+        ("_enabled", True), ("_backend", backend), ("_disabled_namespaces", []),
+        ("_default_codec", PickleCodec), ("_default_key_builder", all_kwargs_key_builder)
+    ):
+        monkeypatch.setattr(PIMSCache, attr, value)
+    return backend
@@ -7,3 +7,12 @@ def test_status(app, client):
 
     json = response.json()
     assert json["version"] == __version__
+
+
+def test_cache_stats(app, client):
+    response = client.get("/info/cache")
+    assert response.status_code == 200
+
+    json = response.json()
+    assert "namespaces" in json
+    assert json["format_pool"]["max_size"] >= 0
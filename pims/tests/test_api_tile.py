@@ -0,0 +1,143 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import asyncio
+
+import pytest
+
+from pims.api import tile as tile_api
+from pims.api.exceptions import BadRequestException
+from pims.files.file import Image, Path
+
+DISPLAY = {"min_intensities": [0], "max_intensities": [255], "channels": [0]}
+
+
+def parse_multipart(response):
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/mixed; boundary=")
+    boundary = content_type.split("boundary=")[1].encode()
+
+    body = response.content
+    assert body.endswith(b"--" + boundary + b"--\r\n")
+    parts = []
+    for raw in body.split(b"--" + boundary)[1:-1]:
+        head, content = raw[2:-2].split(b"\r\n\r\n", 1)
+        headers = dict(
+            line.decode().split(": ", 1) for line in head.split(b"\r\n")
+        )
+        assert int(headers["content-length"]) == len(content)
+        parts.append((headers, content))
+    return parts
+
+
+@pytest.mark.parametrize("endpoint", ["tiles", "normalized-tiles"])
+def test_tiles_batch(client, pyramidal_image_path, endpoint):
+    tiles = [{"zoom": 1, "ti": 1}, {"zoom": 1, "tx": 0, "ty": 0}, {"level": 0, "ti": 2}]
+    response = client.post(
+        f"/image/{pyramidal_image_path}/{endpoint}.png", json={"tiles": tiles, **DISPLAY}
+    )
+    assert response.status_code == 200, response.text
+
+    parts = parse_multipart(response)
+    assert [int(h["content-id"]) for h, _ in parts] == [0, 1, 2]
+    assert all(h["content-type"] == "image/png" for h, _ in parts)
+
+    single_endpoint = endpoint[:-1]
+    for tile, (_, content) in zip(tiles, parts):
+        single = client.post(
+            f"/image/{pyramidal_image_path}/{single_endpoint}.png", json={"tile": tile, **DISPLAY}
+        )
+        assert single.status_code == 200
+        assert single.content == content
+
+
+def test_tiles_batch_invalid_tile(client, pyramidal_image_path):
+    tiles = [{"zoom": 1, "ti": 0}, {"zoom": 1, "ti": 1000}]
+    response = client.post(
+        f"/image/{pyramidal_image_path}/tiles.png", json={"tiles": tiles, **DISPLAY}
+    )
+    assert response.status_code == 400
+
+
+def test_tiles_batch_too_many_tiles(client, pyramidal_image_path, settings):
+    tiles = [{"zoom": 0, "ti": 0}] * (settings.max_tiles_per_batch + 1)
+    response = client.post(
+        f"/image/{pyramidal_image_path}/tiles.png", json={"tiles": tiles, **DISPLAY}
+    )
+    assert response.status_code == 400
+
+    response = client.post(f"/image/{pyramidal_image_path}/tiles.png", json={"tiles": []})
+    assert response.status_code == 422
+
+
+def test_tiles_batch_cached_as_single_tiles(client, pyramidal_image_path, fake_cache):
+    tiles = [{"zoom": 1, "ti": 0}, {"zoom": 1, "ti": 1}]
+    response = client.post(
+        f"/image/{pyramidal_image_path}/normalized-tiles.png", json={"tiles": tiles, **DISPLAY}
+    )
+    assert response.status_code == 200
+    assert len(fake_cache.image_responses()) == 2
+
+    # Cache keys are the ones of the single tile endpoint
+    single = client.post(
+        f"/image/{pyramidal_image_path}/normalized-tile.png", json={"tile": tiles[1], **DISPLAY}
+    )
+    assert single.headers["x-pims-cache"] == "HIT"
+    assert single.content == parse_multipart(response)[1][1]
+    assert len(fake_cache.image_responses()) == 2
+
+
+def test_tiles_batch_error_waits_for_started_tiles(pyramidal_image_path, settings, monkeypatch):
+    events = []
+
+    async def show_tile(request, response, path, normalized, tile, **kwargs):
+        name = f"{tile['zoom']}/{tile['ti']}"
+        events.append(f"start {name}")
+        if name == "0/0":
+            await asyncio.sleep(0.01)
+            raise BadRequestException(detail="Invalid tile")
+        await asyncio.sleep(0.05)
+        events.append(f"end {name}")
+
+    opened = []
+    get_cached_spatial = Path.get_cached_spatial
+    image_close = Image.close
+
+    async def get_spatial(self):
+        image = await get_cached_spatial(self)
+        opened.append(image)
+        return image
+
+    def close(self):
+        if any(self is image for image in opened):
+            events.append("close")
+        image_close(self)
+
+    monkeypatch.setattr(tile_api, "_show_tile", show_tile)
+    monkeypatch.setattr(Path, "get_cached_spatial", get_spatial)
+    monkeypatch.setattr(Image, "close", close)
+    monkeypatch.setattr(settings, "n_threads_batch_tiles", 2)
+
+    async def main():
+        tiles = [
+            {"zoom": 0, "ti": 0}, {"zoom": 1, "ti": 0}, {"zoom": 1, "ti": 1}, {"zoom": 2, "ti": 0}
+        ]
+        path = Path.from_filepath(pyramidal_image_path)
+        with pytest.raises(BadRequestException):
+            await tile_api._show_tiles(None, path, True, tiles, None, None, settings)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    # Started tiles are not cancelled, the last one is never started, and
+    # the image is closed once the started tiles are finished.
+    assert events == ["start 0/0", "start 1/0", "start 1/1", "end 1/0", "end 1/1", "close"]
@@ -0,0 +1,119 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import numpy as np
+import pytest
+
+from pims.api.utils.mimetype import OutputExtension
+from pims.api.utils.models import ChannelReduction, GenericReduction
+from pims.cache.lut import LookUpTableCache
+from pims.processing import image_response
+from pims.processing.colormaps import ALL_COLORMAPS
+from pims.processing.image_response import ProcessedView
+
+
+def _lut(value, size=256):
+    return np.full((1, size, 1), value, dtype=np.uint8)
+
+
+def test_lut_cache_hit_miss():
+    cache = LookUpTableCache(max_size=1024)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return _lut(1)
+
+    lut = cache.get("a", compute)
+    assert cache.get("a", compute) is lut
+    assert len(computed) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not lut.flags.writeable
+
+
+def test_lut_cache_eviction():
+    cache = LookUpTableCache(max_size=512)
+    cache.get("a", lambda: _lut(1))
+    cache.get("b", lambda: _lut(2))
+    cache.get("a", lambda: _lut(1))
+    cache.get("c", lambda: _lut(3))
+
+    assert len(cache) == 2
+    assert cache.size == 512
+    assert cache.get("b", lambda: _lut(4))[0, 0, 0] == 4
+
+
+def test_lut_cache_too_large_or_disabled():
+    cache = LookUpTableCache(max_size=128)
+    lut = cache.get("a", lambda: _lut(1))
+    assert len(cache) == 0
+    assert lut.flags.writeable
+
+    cache = LookUpTableCache(max_size=0)
+    assert cache.get("a", lambda: None) is None
+    assert len(cache) == 0
+
+
+class FakeImage:
+    max_value = 255
+
+
+class FakeView(ProcessedView):
+    def raw_view(self, c, z, t):
+        pass
+
+
+def _view(**kwargs):
+    params = dict(
+        in_image=FakeImage(), in_channels=[0, 1],
+        in_z_slices=[0], in_timepoints=[0], out_format=OutputExtension.PNG,
+        out_width=16, out_height=16, out_bitdepth=8,
+        c_reduction=ChannelReduction.ADD, z_reduction=GenericReduction.MAX,
+        t_reduction=GenericReduction.MAX, gammas=[1.0, 1.0], filters=[],
+        colormaps=[ALL_COLORMAPS["RED"], ALL_COLORMAPS["GREEN"]],
+        min_intensities=[0, 0], max_intensities=[255, 255], log=False,
+        threshold=None
+    )
+    params.update(kwargs)
+    return FakeView(**params)
+
+
+@pytest.fixture
+def lut_cache(monkeypatch):
+    cache = LookUpTableCache(max_size=1024 * 1024)
+    monkeypatch.setattr(image_response, "get_lut_cache", lambda: cache)
+    return cache
+
+
+def test_processed_view_lut_cached(lut_cache):
+    lut = _view(min_intensities=[10, 20]).lut()
+    assert lut.shape == (2, 256, 3)
+    n_entries = len(lut_cache)
+
+    assert _view(min_intensities=[10, 20]).lut() is lut
+    assert len(lut_cache) == n_entries
+
+    other = _view(min_intensities=[10, 30]).lut()
+    assert other is not lut
+    assert not np.array_equal(other, lut)
+
+
+def test_processed_view_lut_same_as_computed(lut_cache):
+    view = _view(gammas=[0.5, 2.0], threshold=0.1)
+    assert np.array_equal(
+        view.math_lut(), view._math_lut()  # noqa
+    )
+    assert np.array_equal(
+        view.colormap_lut(), view._colormap_lut()  # noqa
+    )
+    assert _view(colormaps=[None, None]).lut() is None
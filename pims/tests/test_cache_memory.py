@@ -0,0 +1,115 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import asyncio
+
+from starlette.responses import Response
+
+from pims.cache.memory import MemoryCache
+from pims.cache.redis import PIMSCache, ResponseCodec, _pack, _unpack, stable_hash
+
+
+def test_memory_cache_get_set():
+    cache = MemoryCache(max_size=1000)
+    assert cache.get_with_ttl("a") == (-2, None)
+
+    cache.set("a", b"123", namespace="ns")
+    assert cache.get_with_ttl("a") == (-1, b"123")
+
+    cache.set("b", b"45", expire=100, namespace="ns")
+    ttl, value = cache.get_with_ttl("b")
+    assert value == b"45" and 0 < ttl <= 100
+
+    assert cache.size == 5
+    assert cache.stats() == {"ns": {"entries": 2, "size": 5}}
+
+
+def test_memory_cache_lru_size_budget():
+    cache = MemoryCache(max_size=800)
+    for key in "abc":
+        cache.set(key, bytes(100))
+    cache.get_with_ttl("a")
+    for key in "defghi":
+        cache.set(key, bytes(100))
+
+    assert cache.size <= 800
+    assert cache.get_with_ttl("a")[1] is not None
+    assert cache.get_with_ttl("b")[1] is None
+
+    # Too large for the budget
+    cache.set("large", bytes(200))
+    assert cache.get_with_ttl("large")[1] is None
+
+
+def test_memory_cache_clear():
+    cache = MemoryCache(max_size=1000)
+    cache.set("a", b"1", namespace="ns1")
+    cache.set("b", b"2", namespace="ns2")
+
+    cache.clear(namespace="ns1")
+    assert cache.get_with_ttl("a")[1] is None
+    assert cache.get_with_ttl("b")[1] == b"2"
+
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_memory_cache_disabled():
+    cache = MemoryCache(max_size=0)
+    cache.set("a", b"1")
+    assert cache.get_with_ttl("a")[1] is None
+
+
+def test_response_codec():
+    response = Response(
+        content=b"\x00\x01binary", media_type="image/png",
+        headers={"X-Test": "1"}
+    )
+    decoded = ResponseCodec.decode(ResponseCodec.encode(response))
+    assert isinstance(decoded, Response)
+    assert decoded.body == response.body
+    assert decoded.status_code == 200
+    assert decoded.headers["content-type"] == "image/png"
+    assert decoded.headers["x-test"] == "1"
+    assert decoded.headers["content-length"] == str(len(response.body))
+
+    assert ResponseCodec.decode(ResponseCodec.encode({"a": 1})) == {"a": 1}
+
+
+def test_pack_etag():
+    etag, encoded = _unpack(_pack(b"value"))
+    assert encoded == b"value"
+    assert etag == stable_hash(b"value")
+
+
+def test_coalesce_saves_when_computing_caller_cancelled(fake_cache, monkeypatch):
+    monkeypatch.setattr(PIMSCache, "_coalescing_lock_timeout", 10)
+    key = "test-coalesce-cancelled"
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "data", b"value"
+
+    async def main():
+        leader = asyncio.ensure_future(PIMSCache.coalesce(key, compute))
+        follower = asyncio.ensure_future(PIMSCache.coalesce(key, compute))
+        await asyncio.sleep(0.01)
+        assert key in fake_cache.locks
+
+        leader.cancel()
+        assert await follower == (None, b"value", None)
+        await asyncio.gather(*PIMSCache._saving)
+
+    asyncio.run(main())
+    assert fake_cache.values[key] == b"value"
+    assert key not in fake_cache.locks
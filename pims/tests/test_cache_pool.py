@@ -0,0 +1,113 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import os
+import time
+
+from pims.cache.pool import FormatPool
+
+
+class FakeFormat:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_format(tmp_path, name):
+    path = tmp_path / name
+    path.touch()
+    return FakeFormat(path)
+
+
+def test_pool_hit_miss(tmp_path):
+    pool = FormatPool(max_size=2, idle_ttl=60)
+    fmt = _fake_format(tmp_path, "a.tif")
+
+    assert pool.acquire("a") is None
+    assert pool.add("a", fmt)
+    pool.release(fmt)
+
+    assert pool.acquire("a") is fmt
+    pool.release(fmt)
+
+    stats = pool.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_pool_lru_eviction(tmp_path):
+    pool = FormatPool(max_size=2, idle_ttl=60)
+    formats = [_fake_format(tmp_path, f"{i}.tif") for i in range(3)]
+
+    for i, fmt in enumerate(formats):
+        assert pool.add(str(i), fmt)
+        pool.release(fmt)
+
+    assert len(pool) == 2
+    assert formats[0].closed
+    assert pool.acquire("0") is None
+    assert not formats[2].closed
+
+
+def test_pool_no_close_while_in_use(tmp_path):
+    pool = FormatPool(max_size=1, idle_ttl=60)
+    a = _fake_format(tmp_path, "a.tif")
+    b = _fake_format(tmp_path, "b.tif")
+
+    assert pool.add("a", a)
+    pool.clear()
+    assert not a.closed
+    pool.release(a)
+    assert a.closed
+
+    assert pool.add("b", b)
+    assert pool.acquire("b") is b
+    pool.release(b)
+    pool.release(b)
+    assert not b.closed
+
+
+def test_pool_invalidated_on_mtime_change(tmp_path):
+    pool = FormatPool(max_size=2, idle_ttl=60)
+    fmt = _fake_format(tmp_path, "a.tif")
+    assert pool.add("a", fmt)
+    pool.release(fmt)
+
+    stat = os.stat(fmt.path)
+    os.utime(fmt.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert pool.acquire("a") is None
+    assert fmt.closed
+
+
+def test_pool_idle_ttl(tmp_path):
+    pool = FormatPool(max_size=2, idle_ttl=0.01)
+    fmt = _fake_format(tmp_path, "a.tif")
+    assert pool.add("a", fmt)
+    pool.release(fmt)
+    time.sleep(0.02)
+
+    assert pool.acquire("a") is None
+    assert fmt.closed
+
+
+def test_pool_disabled(tmp_path):
+    pool = FormatPool(max_size=0, idle_ttl=60)
+    fmt = _fake_format(tmp_path, "a.tif")
+    assert not pool.add("a", fmt)
+    assert pool.acquire("a") is None
@@ -0,0 +1,80 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from pims.api.utils.models import PlaneSelectionQueryParams
+from pims.cache import warming
+from pims.cache.warming import WARM_THUMB_LENGTHS, reference_plane_params, warm_image_cache
+
+
+@pytest.fixture
+def warm_settings(monkeypatch):
+    async def _startup_cache(pims_version):  # noqa
+        pass
+
+    monkeypatch.setattr(warming, "startup_cache", _startup_cache)
+    settings = warming.get_settings()
+    monkeypatch.setattr(settings, "cache_enabled", True)
+    monkeypatch.setattr(settings, "warm_cache_n_zooms", 2)
+    return settings
+
+
+def test_warm_image_cache(client, pyramidal_image_path, fake_cache, warm_settings):
+    n_warmed = asyncio.run(warm_image_cache(pyramidal_image_path))
+
+    # Thumbnails, 1 tile at zoom 0 (150x100) and 2 tiles at zoom 1 (300x200)
+    assert n_warmed == len(WARM_THUMB_LENGTHS) + 1 + 2
+    assert len(fake_cache.image_responses()) == n_warmed
+
+    # Responses to the requests sent by Cytomine are cached with the same keys
+    plane = "z_slices=0&timepoints=0"
+    for url, accept in (
+        (f"/image/{pyramidal_image_path}/thumb?{plane}&length=128", "image/webp"),
+        (f"/image/{pyramidal_image_path}/thumb?{plane}&length=256", "image/webp"),
+        (f"/image/{pyramidal_image_path}/normalized-tile/zoom/0/tx/0/ty/0?{plane}", "image/jpeg"),
+        (f"/image/{pyramidal_image_path}/normalized-tile/zoom/1/tx/1/ty/0?{plane}", "image/jpeg"),
+    ):
+        response = client.get(url, headers={"accept": accept})
+        assert response.status_code == 200
+        assert response.headers["x-pims-cache"] == "HIT"
+
+    response = client.get(
+        f"/image/{pyramidal_image_path}/normalized-tile/zoom/2/tx/0/ty/0.jpg?{plane}"
+    )
+    assert response.headers["x-pims-cache"] == "MISS"
+
+
+def test_reference_plane_params():
+    app = FastAPI()
+
+    @app.get("/planes")
+    def planes(params: PlaneSelectionQueryParams = Depends()):
+        return params.dict() == reference_plane_params(
+            SimpleNamespace(n_concrete_channels=3, depth=5, duration=2)
+        )
+
+    # As sent by Cytomine for the reference slice
+    response = TestClient(app).get("/planes?channels=1&z_slices=2&timepoints=1")
+    assert response.json() is True
+
+
+def test_warm_image_cache_disabled(pyramidal_image_path, fake_cache, warm_settings, monkeypatch):
+    monkeypatch.setattr(warm_settings, "cache_enabled", False)
+    assert asyncio.run(warm_image_cache(pyramidal_image_path)) == 0
+    assert len(fake_cache.image_responses()) == 0
@@ -0,0 +1,77 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import numpy as np
+import pytest
+from pydicom.data import get_testdata_file
+
+from pims.files.file import Path
+from pims.formats.common.dicom import DicomFormat, DicomFrameCache, cached_dcmread
+from pims.processing.adapters import convert_to
+from pims.processing.region import Region
+from pims.utils.arrays import to_unsigned_int
+
+
+@pytest.mark.parametrize("filename", ("CT_small.dcm", "SC_rgb_rle_2frame.dcm"))
+def test_dicom_reader_frames(filename):
+    fmt = DicomFormat(Path(get_testdata_file(filename)))
+    imd = fmt.main_imd
+    expected = to_unsigned_int(cached_dcmread(fmt).pixel_array)
+    z = imd.depth - 1
+    if imd.depth > 1:
+        expected = expected[z]
+
+    window = fmt.reader.read_window(Region(2, 3, 20, 10), 20, 10, z=z)
+    assert np.array_equal(window, expected[2:12, 3:23])
+
+    width, height = imd.width // 4, imd.height // 4
+    thumb = convert_to(fmt.reader.read_thumb(width, height, z=z), np.ndarray)
+    assert thumb.shape[:2] == (height, width)
+    blocks = expected[:height * 4, :width * 4].reshape(height, 4, width, 4, -1)
+    assert np.allclose(
+        thumb.reshape(height, width, -1), blocks.mean(axis=(1, 3)), atol=1
+    )
+
+
+def test_dicom_frame_cache():
+    decoded = []
+
+    def decode(index):
+        def _decode():
+            decoded.append(index)
+            return np.zeros((10, 10), dtype=np.uint8)
+        return _decode
+
+    cache = DicomFrameCache(max_size=250)
+    for index in (0, 1, 0, 2, 0, 1):
+        cache.get(("a.dcm", index), decode(index))
+
+    assert decoded == [0, 1, 2, 1]
+    assert cache.size <= 250
+
+    # Files share the cache budget
+    cache.get(("b.dcm", 0), decode(0))
+    assert len(cache) == 2 and cache.size <= 250
+
+    cache.discard("b.dcm")
+    assert len(cache) == 1 and cache.size == 100
+
+    cache = DicomFrameCache(max_size=10)
+    cache.get(("a.dcm", 0), decode(0))
+    assert cache.get(("a.dcm", 0), decode(0)) is not None
+    assert decoded[-1] == 0 and len(decoded) == 6
+
+    cache = DicomFrameCache(max_size=0)
+    cache.get(("a.dcm", 0), decode(0))
+    cache.get(("a.dcm", 0), decode(0))
+    assert len(cache) == 0 and len(decoded) == 8
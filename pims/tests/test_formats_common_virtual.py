@@ -0,0 +1,118 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import os
+import shutil
+
+import numpy as np
+import orjson
+import pytest
+import pyvips
+from PIL import Image as PILImage
+
+from pims.files.file import Path
+from pims.formats.common import virtual
+from pims.formats.common.virtual import VirtualStackFormat, VirtualStackMembers, cached_members
+from pims.processing.adapters import convert_to
+
+N_CHANNELS = 4
+
+
+def write_member(root, i, value):
+    processed = os.path.join(root, f"upload-virtual-{i}", "processed")
+    os.makedirs(processed, exist_ok=True)
+    path = os.path.join(processed, "visualisation.PNG")
+    PILImage.fromarray(np.full((32, 48), value, dtype=np.uint8)).save(path)
+    return path
+
+
+@pytest.fixture
+def virtual_stack(settings):
+    root = settings.root
+    planes = dict()
+    for i in range(N_CHANNELS):
+        write_member(root, i, 10 * (i + 1))
+        planes[f"C{i}_Z0_T0"] = {
+            "location": f"upload-virtual-{i}/processed/visualisation.PNG"
+        }
+
+    stack = {
+        "schema": "virtual/stack",
+        "image": {
+            "width": 48, "height": 32, "depth": 1, "duration": 1,
+            "n_concrete_channels": N_CHANNELS, "n_samples": 1, "pixel_type": "uint8"
+        },
+        "channels": [{"index": i, "color": None} for i in range(N_CHANNELS)],
+        "planes": planes
+    }
+    processed = os.path.join(root, "upload-virtual", "processed")
+    os.makedirs(processed, exist_ok=True)
+    path = os.path.join(processed, "visualisation.VIRTUALSTACK")
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(stack))
+
+    yield VirtualStackFormat(Path(path))
+
+    for name in ["upload-virtual"] + [f"upload-virtual-{i}" for i in range(N_CHANNELS)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_tile(format, c=None):
+    tile = format.pyramid.base.get_ti_tile(0)
+    return convert_to(format.reader.read_tile(tile, c=c, z=0, t=0), np.ndarray)
+
+
+def test_virtual_stack_members_matched_once(virtual_stack, monkeypatch):
+    matched = []
+    match = VirtualStackMembers._match
+    monkeypatch.setattr(
+        VirtualStackMembers, "_match",
+        lambda self, location: matched.append(location) or match(self, location)
+    )
+
+    for _ in range(3):
+        pixels = read_tile(virtual_stack)
+        assert pixels.shape[-1] == N_CHANNELS
+        assert [int(pixels[0, 0, i]) for i in range(N_CHANNELS)] == [10, 20, 30, 40]
+
+    assert len(matched) == N_CHANNELS
+    assert len(cached_members(virtual_stack)) == N_CHANNELS
+
+
+def test_virtual_stack_member_modified(virtual_stack, settings):
+    # Do not get pixels of the previous file from libvips operation cache
+    cache_max = pyvips.cache_get_max()
+    pyvips.cache_set_max(0)
+
+    try:
+        assert int(read_tile(virtual_stack, c=1)[0, 0]) == 20
+        location = virtual_stack.planes_info.get(1, 0, 0, "location")
+        member = cached_members(virtual_stack).get(location)
+
+        path = write_member(settings.root, 1, 99)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert int(read_tile(virtual_stack, c=1)[0, 0]) == 99
+        assert cached_members(virtual_stack).get(location) is not member
+    finally:
+        pyvips.cache_set_max(cache_max)
+
+
+def test_virtual_stack_sequential_reads(virtual_stack, monkeypatch):
+    concurrent = read_tile(virtual_stack)
+
+    monkeypatch.setattr(virtual, "get_members_executor", lambda: None)
+    sequential = read_tile(virtual_stack)
+
+    assert np.array_equal(concurrent, sequential)
@@ -0,0 +1,62 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import numpy as np
+import pytest
+from pyvips import Image as VIPSImage
+
+from pims.api.utils.mimetype import OutputExtension
+from pims.files.file import Path
+from pims.formats.common.tiff import PyrTiffFormat
+
+
+def _pyramidal_tiff(path, compression, bands=3):
+    yy, xx = np.mgrid[0:600, 0:700]
+    arr = np.stack([xx % 256, yy % 256, (xx + yy) % 256], axis=-1)[..., :bands]
+    interpretation = "srgb" if bands == 3 else "b-w"
+    VIPSImage.new_from_array(arr.astype(np.uint8), interpretation=interpretation).tiffsave(
+        str(path), pyramid=True, tile=True, tile_width=256, tile_height=256,
+        compression=compression, Q=95
+    )
+    return PyrTiffFormat(Path(path))
+
+
+@pytest.mark.parametrize("bands", (1, 3))
+def test_read_raw_jpeg_tile(tmp_path, bands):
+    fmt = _pyramidal_tiff(tmp_path / "img.tif", "jpeg", bands)
+    tile = fmt.pyramid.tiers[0].get_ti_tile(0)
+
+    raw = fmt.reader.read_raw_tile(tile, OutputExtension.JPEG)
+    assert raw is not None and raw[:2] == b'\xff\xd8'
+
+    decoded = VIPSImage.new_from_buffer(raw, "")
+    assert (decoded.width, decoded.height, decoded.bands) == (256, 256, bands)
+
+    expected = fmt.reader.read_tile(tile).numpy()
+    diff = np.abs(decoded.numpy().astype(int) - expected.astype(int))
+    assert diff.mean() < 5
+    fmt.close()
+
+
+def test_read_raw_tile_not_available(tmp_path):
+    fmt = _pyramidal_tiff(tmp_path / "jpeg.tif", "jpeg")
+    tier = fmt.pyramid.tiers[0]
+    # Border tile, padded in the file
+    assert fmt.reader.read_raw_tile(tier.get_ti_tile(tier.max_ti - 1), OutputExtension.JPEG) is None
+    assert fmt.reader.read_raw_tile(tier.get_ti_tile(0), OutputExtension.PNG) is None
+    assert fmt.reader.read_raw_tile(tier.get_ti_tile(0), OutputExtension.JPEG, c=0) is None
+    fmt.close()
+
+    fmt = _pyramidal_tiff(tmp_path / "lzw.tif", "lzw")
+    assert fmt.reader.read_raw_tile(fmt.pyramid.tiers[0].get_ti_tile(0), OutputExtension.JPEG) is None
+    fmt.close()
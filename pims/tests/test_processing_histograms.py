@@ -0,0 +1,54 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import numpy as np
+import pytest
+import zarr
+from pyvips import Image as VIPSImage
+
+from pims.api.utils.models import HistogramType
+from pims.files.file import Image, Path
+from pims.formats.common.tiff import PyrTiffFormat
+from pims.processing.histograms import utils
+from pims.processing.histograms.format import ZHF_BOUNDS, ZHF_HIST, ZHF_PER_IMAGE
+
+
+@pytest.fixture
+def image_16bit(tmp_path):
+    rng = np.random.default_rng(0)
+    arr = rng.integers(100, 40000, size=(700, 600), dtype=np.uint16)
+    arr[0, 0] = 3
+    arr[-1, -1] = 65000
+    path = tmp_path / "image.tif"
+    VIPSImage.new_from_array(arr, interpretation="grey16").tiffsave(
+        str(path), pyramid=True, tile=True, tile_width=256, tile_height=256
+    )
+    image = Image(Path(path), format=PyrTiffFormat(Path(path)))
+    yield image, arr
+    image.close()
+
+
+@pytest.mark.parametrize("tile_max_size", (2048, 128))
+def test_complete_histogram_exact(tmp_path, monkeypatch, image_16bit, tile_max_size):
+    image, arr = image_16bit
+    monkeypatch.setattr(utils, "MAX_PIXELS_COMPLETE_HISTOGRAM", 1000)
+    monkeypatch.setattr(utils, "STREAM_TILE_MAX_SIZE", tile_max_size)
+    monkeypatch.setattr(utils, "STREAM_REGION_SIZE", 200)
+
+    dest = Path(tmp_path / "histogram")
+    utils.build_histogram_file(image, dest, HistogramType.COMPLETE)
+
+    zroot = zarr.open_group(str(dest), mode='r')
+    expected = np.bincount(arr.ravel(), minlength=2 ** 16)
+    assert np.array_equal(zroot[ZHF_PER_IMAGE][ZHF_HIST][:], expected)
+    assert list(zroot[ZHF_PER_IMAGE][ZHF_BOUNDS][:]) == [3, 65000]
@@ -0,0 +1,84 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import numpy as np
+import pytest
+from pyvips import Image as VIPSImage
+
+from pims.api.utils.models import ChannelReduction
+from pims.processing.pixels import ImagePixels, NumpyImagePixels, VipsImagePixels
+
+
+def _pixels(n_channels, dtype=np.uint8, max_value=255):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, max_value + 1, size=(24, 32, n_channels), dtype=dtype)
+
+
+def _luts(stack_size, n_components, size=256, dtype=np.uint8):
+    rng = np.random.default_rng(1)
+    max_value = np.iinfo(dtype).max
+    return rng.integers(
+        0, max_value + 1, size=(stack_size, size, n_components), dtype=dtype
+    )
+
+
+def _apply(implementation, pixels, lut_stack, reduction, is_rgb):
+    image = ImagePixels(pixels)
+    if implementation is VIPSImage:
+        image.transition_to(VIPSImage)
+    impl = image._impl  # noqa
+    image.apply_lut_stack(lut_stack, reduction, is_rgb)
+    return image, impl
+
+
+@pytest.mark.parametrize("n_channels, stack_size, n_components, reduction, is_rgb", [
+    (1, 1, 1, ChannelReduction.ADD, False),
+    (1, 1, 3, ChannelReduction.ADD, False),
+    (3, 1, 1, ChannelReduction.ADD, False),
+    (3, 3, 1, ChannelReduction.MAX, False),
+    (3, 3, 1, ChannelReduction.MIN, False),
+    (3, 3, 1, ChannelReduction.MED, False),
+    (2, 2, 1, ChannelReduction.ADD, False),
+    (3, 3, 1, ChannelReduction.ADD, True),
+    (2, 2, 3, ChannelReduction.ADD, False),
+    (4, 4, 3, ChannelReduction.ADD, False),
+])
+def test_numpy_lut_stack_as_vips(n_channels, stack_size, n_components, reduction, is_rgb):
+    pixels = _pixels(n_channels)
+    lut_stack = _luts(stack_size, n_components)
+
+    numpy_image, numpy_impl = _apply(np.ndarray, pixels, lut_stack, reduction, is_rgb)
+    vips_image, _ = _apply(VIPSImage, pixels, lut_stack, reduction, is_rgb)
+
+    assert np.array_equal(
+        np.atleast_3d(numpy_image.np_array()), np.atleast_3d(vips_image.np_array())
+    )
+    if reduction in (ChannelReduction.MAX, ChannelReduction.MIN, ChannelReduction.ADD):
+        # No round trip to libvips
+        assert isinstance(numpy_image._impl, NumpyImagePixels)  # noqa
+        assert numpy_image._impl is numpy_impl  # noqa
+
+
+def test_numpy_lut_out_of_range_as_vips():
+    pixels = _pixels(2, dtype=np.uint16, max_value=1000)
+    lut_stack = _luts(2, 3, size=256, dtype=np.uint16)
+
+    numpy_image, _ = _apply(np.ndarray, pixels, lut_stack, ChannelReduction.ADD, False)
+    vips_image, _ = _apply(VIPSImage, pixels, lut_stack, ChannelReduction.ADD, False)
+    assert np.array_equal(numpy_image.np_array(), vips_image.np_array())
+
+
+def test_numpy_lut_float_pixels_use_vips():
+    pixels = _pixels(1).astype(np.float32)
+    image, _ = _apply(np.ndarray, pixels, _luts(1, 1), ChannelReduction.ADD, False)
+    assert isinstance(image._impl, VipsImagePixels)  # noqa
@@ -0,0 +1,85 @@
+#  * Copyright (c) 2020-2022. Authors: see NOTICE file.
+#  *
+#  * Licensed under the Apache License, Version 2.0 (the "License");
+#  * you may not use this file except in compliance with the License.
+#  * You may obtain a copy of the License at
+#  *
+#  *      http://www.apache.org/licenses/LICENSE-2.0
+#  *
+#  * Unless required by applicable law or agreed to in writing, software
+#  * distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+import asyncio
+
+import pytest
+
+from pims.utils.concurrency import SingleFlight
+
+
+def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key * 2
+
+    async def main():
+        return await asyncio.gather(
+            *[single_flight.do(k, lambda k=k: compute(k)) for k in (1, 1, 1, 2)]
+        )
+
+    results = asyncio.run(main())
+    assert [r for r, _ in results] == [2, 2, 2, 4]
+    assert [shared for _, shared in results] == [False, True, True, False]
+    assert sorted(calls) == [1, 2]
+    assert len(single_flight) == 0
+
+
+def test_single_flight_exception():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError()
+
+    async def main():
+        return await asyncio.gather(
+            *[single_flight.do("k", fail) for _ in range(3)],
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(single_flight) == 0
+
+    with pytest.raises(ValueError):
+        asyncio.run(single_flight.do("k", fail))
+
+
+def test_single_flight_leader_cancelled():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(single_flight.do("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(single_flight.do("k", compute))
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == (42, True)
+    assert calls == [1]
+    assert len(single_flight) == 0
@@ -0,0 +1,80 @@
+"""Module to measure the latency of the segmentation stages."""
+
+import time
+from typing import Dict
+
+import numpy as np
+from sam2.sam2_image_predictor import SAM2ImagePredictor
+
+from app.utils.annotations import mask_to_polygon
+from app.utils.postprocess import post_process_segmentation_mask
+
+STAGES = ("encoder", "decoder", "post_process")
+
+
+def make_benchmark_image(size: int) -> np.ndarray:
+    """
+    Function to create a synthetic crop, with a bright disk over a noisy background.
+
+    Args:
+        (size: int): the size of the crop.
+
+    Returns:
+        (np.ndarray): Returns the crop, in HWC format.
+    """
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 96, size=(size, size, 3), dtype=np.uint8)
+
+    yy, xx = np.ogrid[:size, :size]
+    disk = (xx - size / 2) ** 2 + (yy - size / 2) ** 2 < (size / 4) ** 2
+    image[disk] = (220, 120, 160)
+
+    return image
+
+
+def benchmark_predictor(
+    predictor: SAM2ImagePredictor,
+    image_size: int = 1024,
+    runs: int = 3,
+    warmup: int = 1,
+) -> Dict[str, float]:
+    """
+    Function to measure the latency of each stage of the segmentation of a box.
+
+    Args:
+        (predictor: SAM2ImagePredictor): the predictor.
+        (image_size: int): the size of the synthetic crop.
+        (runs: int): the number of timed runs.
+        (warmup: int): the number of untimed runs before, e.g. to compile the model.
+
+    Returns:
+        (Dict[str, float]): Returns the median latency of each stage, in milliseconds.
+    """
+    image = make_benchmark_image(image_size)
+    box = np.array(
+        [image_size / 4, image_size / 4, image_size * 3 / 4, image_size * 3 / 4]
+    )
+
+    durations: Dict[str, list] = {stage: [] for stage in STAGES}
+    for run in range(warmup + runs):
+        start = time.perf_counter()
+        predictor.set_image(image)
+        encoded = time.perf_counter()
+
+        masks, ious, _ = predictor.predict(box=box, multimask_output=True)
+        decoded = time.perf_counter()
+
+        mask = post_process_segmentation_mask(masks[np.argmax(ious)])
+        mask_to_polygon(mask, image_size, 0, 0)
+        end = time.perf_counter()
+
+        if run < warmup:
+            continue
+
+        durations["encoder"].append(encoded - start)
+        durations["decoder"].append(decoded - encoded)
+        durations["post_process"].append(end - decoded)
+
+    predictor.reset_predictor()
+
+    return {stage: float(np.median(d)) * 1000 for stage, d in durations.items()}
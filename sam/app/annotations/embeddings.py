@@ -0,0 +1,120 @@
+"""Module to cache the image embeddings computed by the SAM image encoder."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sam2.sam2_image_predictor import SAM2ImagePredictor
+
+
+@dataclass(frozen=True)
+class ImageEmbedding:
+    """The state of a predictor after `set_image`, for one image."""
+
+    features: Dict[str, Any]
+    orig_hw: List[Tuple[int, int]]
+    size: int
+
+
+def _tensors_size(features: Dict[str, Any]) -> int:
+    tensors = [features["image_embed"], *features["high_res_feats"]]
+    return sum(t.element_size() * t.nelement() for t in tensors)
+
+
+class ImageEmbeddingCache:
+    """
+    LRU cache of image embeddings, bounded by their total size in bytes.
+
+    Images are keyed by their content and the model configuration, so that
+    refining several annotations in the same crop, or retrying one, only runs
+    the prompt decoder.
+    """
+
+    def __init__(self, max_size: int, model_key: str) -> None:
+        """
+        Args:
+            (max_size: int): the maximum total size of the embeddings, in bytes.
+            (model_key: str): the identifier of the model configuration.
+        """
+        self.max_size = max_size
+        self.model_key = model_key
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, ImageEmbedding] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, image: np.ndarray) -> str:
+        """
+        Function to compute the key of an image.
+
+        Args:
+            (image: np.ndarray): the image, in HWC format.
+
+        Returns:
+            (str): Returns the key of the image.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.model_key.encode())
+        digest.update(str(image.shape).encode())
+        digest.update(np.ascontiguousarray(image).data)
+
+        return digest.hexdigest()
+
+    def set_image(self, predictor: SAM2ImagePredictor, image: np.ndarray) -> None:
+        """
+        Function to set the image of a predictor, reusing its embedding if cached.
+
+        Args:
+            (predictor: SAM2ImagePredictor): the predictor.
+            (image: np.ndarray): the image, in HWC format.
+        """
+        key = self.key(image)
+
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if embedding is not None:
+            predictor.reset_predictor()
+            predictor._features = embedding.features
+            predictor._orig_hw = embedding.orig_hw
+            predictor._is_image_set = True
+            return
+
+        predictor.set_image(image)
+
+        features = predictor._features
+        embedding = ImageEmbedding(
+            features=features,
+            orig_hw=list(predictor._orig_hw),
+            size=_tensors_size(features),
+        )
+        self._add(key, embedding)
+
+    def _add(self, key: str, embedding: ImageEmbedding) -> None:
+        if embedding.size > self.max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+
+            self._entries[key] = embedding
+            self.size += embedding.size
+
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
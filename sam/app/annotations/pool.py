@@ -0,0 +1,109 @@
+"""Module to run the predictions on a pool of predictors."""
+
+import asyncio
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from sam2.modeling.sam2_base import SAM2Base
+from sam2.sam2_image_predictor import SAM2ImagePredictor
+
+T = TypeVar("T")
+
+# Weight of the last prediction in the average prediction duration
+DURATION_SMOOTHING = 0.2
+
+
+class PoolFullError(Exception):
+    """Raised when too many predictions are already running or waiting."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Too many segmentation requests, retry later.")
+        self.retry_after = retry_after
+
+
+class PredictorPool:
+    """
+    Pool of predictors sharing the same model weights.
+
+    Predictors hold the state of the image being segmented, so each one is
+    used by a single prediction at a time. Predictions run in worker threads,
+    one per predictor, so that the event loop stays responsive. At most
+    `max_queue` predictions wait for a predictor, others are rejected.
+    """
+
+    def __init__(self, model: SAM2Base, size: int, max_queue: int) -> None:
+        """
+        Args:
+            (model: SAM2Base): the model shared by the predictors.
+            (size: int): the number of predictors.
+            (max_queue: int): the maximum number of predictions waiting for a predictor.
+        """
+        self.size = size
+        self.max_queue = max_queue
+
+        self._predictors: queue.Queue[SAM2ImagePredictor] = queue.Queue()
+        for _ in range(size):
+            self._predictors.put(SAM2ImagePredictor(model))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=size,
+            thread_name_prefix="predictor",
+        )
+        self._slots = threading.Semaphore(size + max_queue)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._duration = 1.0
+
+    @property
+    def pending(self) -> int:
+        """Number of predictions running or waiting for a predictor."""
+        return self._pending
+
+    def retry_after(self) -> int:
+        """Estimated time before a predictor is available, in seconds."""
+        waiting = max(self._pending - self.size, 0) + 1
+        return max(1, math.ceil(self._duration * waiting / self.size))
+
+    async def run(self, func: Callable[[SAM2ImagePredictor], T]) -> T:
+        """
+        Function to run a prediction with the next available predictor.
+
+        Args:
+            (func: Callable): the prediction, given the predictor to use.
+
+        Returns:
+            (T): Returns the result of the prediction.
+
+        Raises:
+            (PoolFullError): if too many predictions are already waiting.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolFullError(self.retry_after())
+
+        with self._lock:
+            self._pending += 1
+
+        # The slot is released by the worker, even if the request is cancelled
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, func)
+
+    def _run(self, func: Callable[[SAM2ImagePredictor], T]) -> T:
+        predictor = self._predictors.get()
+        start = time.perf_counter()
+        try:
+            return func(predictor)
+        finally:
+            duration = time.perf_counter() - start
+            self._predictors.put(predictor)
+            with self._lock:
+                self._duration += DURATION_SMOOTHING * (duration - self._duration)
+                self._pending -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """Function to wait for the running predictions and stop the workers."""
+        self._executor.shutdown(wait=True)
@@ -1,17 +1,21 @@
 from math import floor
-from typing import Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import geojson
 import numpy as np
 from sam2.sam2_image_predictor import SAM2ImagePredictor
-from shapely.geometry import Polygon
+from shapely.geometry import Point, Polygon
+from shapely.geometry.base import BaseGeometry
 
+from app.annotations.embeddings import ImageEmbeddingCache
 from app.config import get_settings
-from app.utils.align_prompts import align_box_prompt
+from app.utils.align_prompts import align_box_prompt, align_point_prompt
 from app.utils.annotations import mask_to_polygon
 from app.utils.postprocess import post_process_segmentation_mask
 
 ANNOTATION_MAX_SIZE = get_settings().ANNOTATION_MAX_SIZE
+POLYGON_SIMPLIFY_TOLERANCE = get_settings().POLYGON_SIMPLIFY_TOLERANCE
+REFINE_BATCH_CHUNK_SIZE = get_settings().REFINE_BATCH_CHUNK_SIZE
 
 
 def get_roi_around_annotation(
@@ -53,19 +57,69 @@ def get_roi_around_annotation(
     return x, y
 
 
+def get_crop_scale(crop_size: int) -> Tuple[float, float]:
+    """
+    Function to get the scaling factors from the image to the crop.
+
+    Args:
+        (crop_size: int): the size of the crop.
+
+    Returns:
+        Tuple of:
+            - (float): the scaling factor along the x-axis.
+            - (float): the scaling factor along the y-axis.
+    """
+    scale_x = 1.0
+    scale_y = 1.0
+
+    if crop_size > ANNOTATION_MAX_SIZE:  # annot_width == annot_height
+        # if a dim is greater than 20000, img.window might return an error
+        # handle this situation by constraining the max_size to ANNOTATION_MAX_SIZE
+        scale = crop_size / ANNOTATION_MAX_SIZE
+
+        scale_x /= scale
+        scale_y /= scale
+
+    return scale_x, scale_y
+
+
+def set_image(
+    predictor: SAM2ImagePredictor,
+    crop_array: np.ndarray,
+    embeddings: Optional[ImageEmbeddingCache] = None,
+) -> None:
+    """
+    Function to run the image encoder on the crop, unless its embedding is cached.
+
+    Args:
+        (predictor: SAM2ImagePredictor): the predictor.
+        (crop_array: np.ndarray): the crop.
+        (embeddings: ImageEmbeddingCache, optional): the cache of image embeddings.
+    """
+    if embeddings is not None:
+        embeddings.set_image(predictor, crop_array)
+    else:
+        predictor.set_image(crop_array)
+
+
 def run_segmentation_pipeline(
     predictor: SAM2ImagePredictor,
     crop_array: np.ndarray,
     image_height: int,
     image_width: int,
     box: Polygon,
+    embeddings: Optional[ImageEmbeddingCache] = None,
 ) -> Union[geojson.Feature, None]:
     """
     Function to run the segmentation model for the incoming request and its prompts.
 
     Args:
-        (request: Request): the HTTP request.
+        (predictor: SAM2ImagePredictor): the predictor.
+        (crop_array: np.ndarray): the crop around the annotation.
+        (image_height: int): the height of the image.
+        (image_width: int): the width of the image.
         (box: Polygon): the box geometry for this image.
+        (embeddings: ImageEmbeddingCache, optional): the cache of image embeddings.
 
     Returns:
         (geojson.Feature, or None): Returns the structure as a GeoJSON.
@@ -81,20 +135,11 @@ def run_segmentation_pipeline(
         crop_size,
     )
 
-    scale_x = 1.0
-    scale_y = 1.0
-
-    if crop_size > ANNOTATION_MAX_SIZE:  # annot_width == annot_height
-        # if a dim is greater than 20000, img.window might return an error
-        # handle this situation by constraining the max_size to ANNOTATION_MAX_SIZE
-        scale = crop_size / ANNOTATION_MAX_SIZE
-
-        scale_x /= scale
-        scale_y /= scale
+    scale_x, scale_y = get_crop_scale(crop_size)
 
     box_prompt = align_box_prompt(box_prompt, x, y, image_height, scale_x, scale_y)
 
-    predictor.set_image(crop_array)
+    set_image(predictor, crop_array, embeddings)
 
     masks, ious, _ = predictor.predict(
         point_coords=None,
@@ -107,7 +152,7 @@ def run_segmentation_pipeline(
     )
 
     best_mask = masks[np.argmax(ious)]
-    output_mask = post_process_segmentation_mask(best_mask)
+    output_mask = post_process_segmentation_mask(best_mask, scale=scale_x)
 
     geometry = mask_to_polygon(
         output_mask,
@@ -116,6 +161,129 @@ def run_segmentation_pipeline(
         y,
         scale_x=scale_x,
         scale_y=scale_y,
+        simplify_tolerance=POLYGON_SIMPLIFY_TOLERANCE * scale_x,
     )
 
     return geometry
+
+
+def run_batch_segmentation_pipeline(
+    predictor: SAM2ImagePredictor,
+    crop_array: np.ndarray,
+    image_height: int,
+    image_width: int,
+    prompts: List[BaseGeometry],
+    embeddings: Optional[ImageEmbeddingCache] = None,
+) -> List[Union[geojson.Feature, None]]:
+    """
+    Function to run the segmentation model for many prompts in the same crop.
+    The image encoder runs once, and the prompt decoder once per chunk of
+    prompts of the same type.
+
+    The crop must be centered around the bounding box of all the prompts, as
+    it is centered around the annotation for a single prompt.
+
+    Args:
+        (predictor: SAM2ImagePredictor): the predictor.
+        (crop_array: np.ndarray): the crop around the prompts.
+        (image_height: int): the height of the image.
+        (image_width: int): the width of the image.
+        (prompts: List[BaseGeometry]): the prompts, points or the geometries
+                                       whose bounding box is used as box prompt.
+        (embeddings: ImageEmbeddingCache, optional): the cache of image embeddings.
+
+    Returns:
+        (List[geojson.Feature, or None]): Returns the structure of each prompt
+                                          as a GeoJSON, in the same order.
+    """
+    bounds = np.array([prompt.bounds for prompt in prompts])
+    union_box = np.array(
+        [*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0)],
+        dtype=np.int32,
+    )
+
+    crop_size = crop_array.shape[0]
+    x, y = get_roi_around_annotation(image_height, image_width, union_box, crop_size)
+    scale_x, scale_y = get_crop_scale(crop_size)
+
+    point_indices = [i for i, p in enumerate(prompts) if isinstance(p, Point)]
+    box_indices = [i for i, p in enumerate(prompts) if not isinstance(p, Point)]
+
+    set_image(predictor, crop_array, embeddings)
+
+    geometries: List[Union[geojson.Feature, None]] = [None] * len(prompts)
+
+    def to_geometries(indices: List[int], masks: np.ndarray, ious: np.ndarray) -> None:
+        for i, mask in zip(indices, _best_masks(masks, ious, len(indices))):
+            geometries[i] = mask_to_polygon(
+                post_process_segmentation_mask(mask, scale=scale_x),
+                image_height,
+                x,
+                y,
+                scale_x=scale_x,
+                scale_y=scale_y,
+                simplify_tolerance=POLYGON_SIMPLIFY_TOLERANCE * scale_x,
+            )
+
+    # The predictor returns 3 full size masks per prompt, decode the prompts by
+    # chunks to bound the memory used by the masks
+    for chunk in _chunks(box_indices, REFINE_BATCH_CHUNK_SIZE):
+        boxes = np.array(
+            [
+                align_box_prompt(
+                    np.array(prompts[i].bounds, dtype=np.int32),
+                    x,
+                    y,
+                    image_height,
+                    scale_x,
+                    scale_y,
+                )
+                for i in chunk
+            ]
+        )
+        masks, ious, _ = predictor.predict(
+            box=boxes,
+            multimask_output=True,
+            normalize_coords=True,
+        )
+        to_geometries(chunk, masks, ious)
+
+    for chunk in _chunks(point_indices, REFINE_BATCH_CHUNK_SIZE):
+        points = np.array(
+            [
+                [
+                    align_point_prompt(
+                        np.array(prompts[i].coords[0]),
+                        x,
+                        y,
+                        image_height,
+                        scale_x,
+                        scale_y,
+                    )
+                ]
+                for i in chunk
+            ]
+        )
+        masks, ious, _ = predictor.predict(
+            point_coords=points,
+            point_labels=np.ones(points.shape[:2], dtype=np.int32),
+            multimask_output=True,
+            normalize_coords=True,
+        )
+        to_geometries(chunk, masks, ious)
+
+    return geometries
+
+
+def _chunks(indices: List[int], size: int) -> List[List[int]]:
+    """Split prompt indices in chunks of at most the given size."""
+    return [indices[i : i + size] for i in range(0, len(indices), size)]
+
+
+def _best_masks(masks: np.ndarray, ious: np.ndarray, n_prompts: int) -> np.ndarray:
+    """The mask with the best predicted IoU for each prompt of a batch."""
+    # A single prompt is not batched by the predictor
+    masks = masks.reshape(n_prompts, -1, *masks.shape[-2:])
+    ious = ious.reshape(n_prompts, -1)
+
+    return masks[np.arange(n_prompts), np.argmax(ious, axis=1)]
@@ -1,14 +1,25 @@
 import io
-from typing import Annotated
+from typing import Annotated, List, Optional, Union
 
+import geojson
 import numpy as np
 from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
 from fastapi.responses import JSONResponse
 from PIL import Image
+from sam2.sam2_image_predictor import SAM2ImagePredictor
+from shapely import wkt
+from shapely.geometry import Point
 
-from app.annotations.segmentation import run_segmentation_pipeline
+from app.annotations.pool import PoolFullError
+from app.annotations.segmentation import (
+    run_batch_segmentation_pipeline,
+    run_segmentation_pipeline,
+)
+from app.config import get_settings
 from app.utils.annotations import get_bbox_from_annotation, has_positive_area
 
+REFINE_BATCH_MAX_LOCATIONS = get_settings().REFINE_BATCH_MAX_LOCATIONS
+
 router = APIRouter(prefix="/annotations")
 
 
@@ -26,22 +37,32 @@ async def refine(
             detail="Annotation must have a positive area",
         )
 
-    predictor = request.app.state.predictor
+    crop = await annotation_crop.read()
+    embeddings = request.app.state.embeddings
 
-    try:
+    def segment(predictor: SAM2ImagePredictor) -> Union[geojson.Feature, None]:
         bbox = get_bbox_from_annotation(location)
 
-        crop = await annotation_crop.read()
         image = Image.open(io.BytesIO(crop)).convert("RGB")
         crop_array = np.array(image)
 
-        geometry = run_segmentation_pipeline(
+        return run_segmentation_pipeline(
             predictor=predictor,
             crop_array=crop_array,
             image_height=image_height,
             image_width=image_width,
             box=bbox,
+            embeddings=embeddings,
         )
+
+    try:
+        geometry = await request.app.state.predictors.run(segment)
+    except PoolFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
@@ -49,3 +70,91 @@ async def refine(
         return JSONResponse(status_code=204, content={"message": "No geometry found"})
 
     return JSONResponse(status_code=200, content=geometry)
+
+
+@router.post("/refine/batch")
+async def refine_batch(
+    request: Request,
+    annotation_crops: Annotated[List[UploadFile], File(...)],
+    image_height: Annotated[int, Form(..., gt=0)],
+    image_width: Annotated[int, Form(..., gt=0)],
+    locations: Annotated[List[str], Form(...)],
+    crop_indices: Annotated[Optional[List[int]], Form()] = None,
+) -> JSONResponse:
+    """
+    Refine many annotations at once. Each location is either a point prompt or
+    an annotation whose bounding box is the box prompt, and refers to the crop
+    at the same position in `crop_indices` (the single crop by default). At
+    most `REFINE_BATCH_MAX_LOCATIONS` locations are accepted.
+
+    Each crop must be centered around the bounding box of its prompts. The
+    image encoder runs once per crop.
+    """
+    if len(locations) > REFINE_BATCH_MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {REFINE_BATCH_MAX_LOCATIONS} locations can be refined",
+        )
+
+    crop_indices = crop_indices or []
+    if not crop_indices and len(annotation_crops) == 1:
+        crop_indices = [0] * len(locations)
+
+    if len(crop_indices) != len(locations) or any(
+        not 0 <= index < len(annotation_crops) for index in crop_indices
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Each location must refer to one of the crops",
+        )
+
+    try:
+        prompts = [wkt.loads(location) for location in locations]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    if any(not isinstance(p, Point) and p.area <= 0 for p in prompts):
+        raise HTTPException(
+            status_code=400,
+            detail="Annotations must have a positive area",
+        )
+
+    crops = [await crop.read() for crop in annotation_crops]
+    embeddings = request.app.state.embeddings
+
+    def segment(predictor: SAM2ImagePredictor) -> List[geojson.Feature]:
+        features = []
+        for crop_index, crop in enumerate(crops):
+            indices = [i for i, c in enumerate(crop_indices) if c == crop_index]
+            if not indices:
+                continue
+
+            image = Image.open(io.BytesIO(crop)).convert("RGB")
+            geometries = run_batch_segmentation_pipeline(
+                predictor=predictor,
+                crop_array=np.array(image),
+                image_height=image_height,
+                image_width=image_width,
+                prompts=[prompts[i] for i in indices],
+                embeddings=embeddings,
+            )
+
+            for index, geometry in zip(indices, geometries):
+                if geometry:
+                    geometry["properties"]["index"] = index
+                    features.append(geometry)
+
+        return sorted(features, key=lambda f: f["properties"]["index"])
+
+    try:
+        features = await request.app.state.predictors.run(segment)
+    except PoolFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return JSONResponse(status_code=200, content=geojson.FeatureCollection(features))
@@ -19,12 +19,40 @@ class Settings(BaseSettings):
 
     ANNOTATION_MAX_SIZE: int = 8000
 
+    # Maximum distance between the mask contours and the polygons, in image pixels
+    POLYGON_SIMPLIFY_TOLERANCE: float = 1.0
+
     # Deep learning model
     WEIGHTS_PATH: str = "./weights"
     CHECKPOINT: str = "weights.pt"
     CONFIG: str = "./configs/sam2.1/sam2.1_hiera_b+.yaml"
     DEVICE: torch.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+    # CPU inference profile
+    # Number of threads used by PyTorch operators (0 for the PyTorch default)
+    INFERENCE_THREADS: int = 0
+    # Whether to quantize the linear layers to int8 on the fly, on CPU only
+    QUANTIZE: bool = False
+    # Whether to compile the image encoder, making the startup much slower
+    COMPILE: bool = False
+    # Number of timed runs of the stage benchmark at startup, run by every
+    # worker before serving requests (0 to disable)
+    STARTUP_BENCHMARK_RUNS: int = 0
+
+    # Number of predictions running in parallel, sharing the model weights
+    PREDICTOR_POOL_SIZE: int = 2
+    # Number of predictions waiting for a predictor before rejecting requests
+    PREDICTOR_QUEUE_SIZE: int = 8
+
+    # Maximum number of locations refined by a batch request
+    REFINE_BATCH_MAX_LOCATIONS: int = 256
+    # Number of prompts decoded together by a batch request, bounding the
+    # memory used by their masks (3 float masks of the crop size per prompt)
+    REFINE_BATCH_CHUNK_SIZE: int = 8
+
+    # Maximum size of the cached image embeddings, in MB (0 to disable)
+    EMBEDDING_CACHE_SIZE: int = 512
+
 
 @lru_cache()
 def get_settings():
@@ -4,15 +4,22 @@ import urllib.request
 from app.config import get_settings
 
 WEIGHTS = {
-    "weights.pt": "https://huggingface.co/TVM13/Cytomine-sam/resolve/main/weights.pt"
+    "weights.pt": "https://huggingface.co/TVM13/Cytomine-sam/resolve/main/weights.pt",
+    # Smaller models for CPU inference, to use with the matching Hiera config
+    "sam2.1_hiera_small.pt": "https://dl.fbaipublicfiles.com/segment_anything_2/092824/sam2.1_hiera_small.pt",
+    "sam2.1_hiera_tiny.pt": "https://dl.fbaipublicfiles.com/segment_anything_2/092824/sam2.1_hiera_tiny.pt",
 }
 
 WEIGHTS_PATH = get_settings().WEIGHTS_PATH
+CHECKPOINT = get_settings().CHECKPOINT
 
 def download_weights():
     os.makedirs(WEIGHTS_PATH, exist_ok=True)
 
     for filename, url in WEIGHTS.items():
+        if filename != CHECKPOINT:
+            continue
+
         destination = os.path.join(WEIGHTS_PATH, filename)
 
         if not os.path.exists(destination):
@@ -4,34 +4,95 @@ import os
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
+import torch
 from fastapi import FastAPI
 from sam2.build_sam import build_sam2
+from sam2.modeling.sam2_base import SAM2Base
 from sam2.sam2_image_predictor import SAM2ImagePredictor
 
 from app import __version__
+from app.annotations.benchmark import benchmark_predictor
+from app.annotations.embeddings import ImageEmbeddingCache
+from app.annotations.pool import PredictorPool
 from app.api import annotation, server
-from app.config import Settings, get_settings
+from app.config import Settings, get_settings, logger
 from app.download_weights import download_weights
 
 
-def load_predictor(settings: Settings) -> SAM2ImagePredictor:
-    """Load the weights of the model and creates a new predictor instance."""
+def load_model(settings: Settings) -> SAM2Base:
+    """Load the weights of the model, shared by all the predictors."""
+    if settings.INFERENCE_THREADS > 0:
+        torch.set_num_threads(settings.INFERENCE_THREADS)
+
     model = build_sam2(
         settings.CONFIG,
         os.path.join(settings.WEIGHTS_PATH, settings.CHECKPOINT),
         device=settings.DEVICE,
     )
 
-    return SAM2ImagePredictor(model)
+    if settings.QUANTIZE:
+        if settings.DEVICE.type == "cpu":
+            model = torch.ao.quantization.quantize_dynamic(
+                model,
+                {torch.nn.Linear},
+                dtype=torch.qint8,
+            )
+        else:
+            logger.warning("Quantization is only supported on CPU, skipping it")
+
+    if settings.COMPILE:
+        # Compile the forward function only, the mask decoder gets a varying
+        # number of prompts
+        model.image_encoder.forward = torch.compile(
+            model.image_encoder.forward,
+            dynamic=False,
+        )
+
+    return model
+
+
+def log_benchmark(model: SAM2Base, settings: Settings) -> None:
+    """Log the latency of the segmentation stages with the loaded model."""
+    # The first call fills the position encoding cache, recompiling the encoder
+    warmup = 2 if settings.COMPILE else 1
+    latencies = benchmark_predictor(
+        SAM2ImagePredictor(model),
+        runs=settings.STARTUP_BENCHMARK_RUNS,
+        warmup=warmup,
+    )
+
+    logger.info(
+        "Segmentation latency with %s (%d threads, quantize=%s, compile=%s): %s",
+        os.path.basename(settings.CONFIG),
+        torch.get_num_threads(),
+        settings.QUANTIZE,
+        settings.COMPILE,
+        ", ".join(f"{stage} {latency:.0f} ms" for stage, latency in latencies.items()),
+    )
 
 
 @asynccontextmanager
 async def lifespan(local_app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifespan of the app."""
 
-    local_app.state.predictor = load_predictor(get_settings())
+    settings = get_settings()
+    model = load_model(settings)
+    if settings.STARTUP_BENCHMARK_RUNS > 0:
+        log_benchmark(model, settings)
+
+    local_app.state.predictors = PredictorPool(
+        model,
+        size=settings.PREDICTOR_POOL_SIZE,
+        max_queue=settings.PREDICTOR_QUEUE_SIZE,
+    )
+    local_app.state.embeddings = ImageEmbeddingCache(
+        max_size=settings.EMBEDDING_CACHE_SIZE * 1024 * 1024,
+        model_key=f"{settings.CONFIG}:{settings.CHECKPOINT}:{settings.QUANTIZE}",
+    )
     yield
 
+    local_app.state.predictors.shutdown()
+
 
 download_weights()
 
@@ -38,3 +38,35 @@ def align_box_prompt(
     new_y_max = (y_max_flipped - y_tl) * scale_y
 
     return np.array([new_x_min, new_y_min, new_x_max, new_y_max], dtype=np.int32)
+
+
+def align_point_prompt(
+    point: np.ndarray,
+    x_tl: int,
+    y_tl: int,
+    img_height: int,
+    scale_x: float,
+    scale_y: float,
+) -> np.ndarray:
+    """
+    Align the point prompt with the extracted window
+    (the coordinates of the point prompt must be relative to the window
+    and not to the WSI, this function performs this transformation).
+
+    Args:
+        (point: np.ndarray): the point prompt with format: [x, y].
+        (x_tl: int): the offset along the x-axis.
+        (y_tl: int): the offset along the y-axis.
+        (img_height: int): the height of the image.
+        (scale_x: float): the scaling factor to apply to x coordinates.
+        (scale_y: float): the scaling factor to apply to y coordinates.
+
+    Returns:
+        (np.ndarray): Returns the transformed point prompt.
+    """
+    x, y = point  # bottom left referential
+
+    new_x = (x - x_tl) * scale_x
+    new_y = (img_height - y - y_tl) * scale_y
+
+    return np.array([new_x, new_y], dtype=np.int32)
@@ -36,6 +36,7 @@ def mask_to_polygon(
     offset_y: int,
     scale_x: float = 1.0,
     scale_y: float = 1.0,
+    simplify_tolerance: float = 0.0,
 ) -> Union[geojson.Feature, None]:
     """
     Function to convert the mask to a GeoJSON taking into account the offset due
@@ -48,6 +49,8 @@ def mask_to_polygon(
         (offset_y: int): the offset along the y-axis.
         (scale_x: float): the scaling factor to apply to x coordinates.
         (scale_y: float): the scaling factor to apply to y coordinates.
+        (simplify_tolerance: float): the maximum distance between the contours and
+                                     the simplified polygons, in mask pixels.
 
     Returns:
         (geojson.Feature, or None): Returns the structure as a GeoJSON.
@@ -55,6 +58,12 @@ def mask_to_polygon(
     mask = (mask > 0).astype(np.uint8)
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
+    if simplify_tolerance > 0:
+        contours = [
+            cv2.approxPolyDP(contour, simplify_tolerance, closed=True)
+            for contour in contours
+        ]
+
     if not contours:
         return None
 
@@ -10,6 +10,7 @@ def post_process_segmentation_mask(
     closing_kernel_size: int = 20,
     blur_size: int = 21,
     do_gaussian_blur: bool = False,
+    scale: float = 1.0,
 ) -> np.ndarray:
     """
     Postprocesses the mask by performing an opening followed by a closing,
@@ -22,6 +23,8 @@ def post_process_segmentation_mask(
         (closing_kernel_size: int): the size of the kernel used for the closing.
         (blur_size: int): the size of the kernel used for the Gaussian blur.
         (do_gaussian_blur: bool): whether to apply Gaussian blur
+        (scale: float): the downsampling factor of the mask with respect to the image,
+                        the kernel sizes are given in image pixels.
 
     Returns:
         (np.ndarray): Returns the postprocessed mask.
@@ -29,6 +32,10 @@ def post_process_segmentation_mask(
     if mask.dtype != np.uint8:
         mask = (mask * 255).astype(np.uint8)
 
+    opening_kernel_size = _scale_kernel_size(opening_kernel_size, scale)
+    closing_kernel_size = _scale_kernel_size(closing_kernel_size, scale)
+    blur_size = _scale_kernel_size(blur_size, scale, odd=True)
+
     opening_kernel = np.ones((opening_kernel_size, opening_kernel_size), np.uint8)
     opened_mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, opening_kernel)
 
@@ -65,9 +72,7 @@ def filter_mask_by_size(
     Returns:
         (np.ndarray): Returns the filtered mask.
     """
-    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
-        mask, connectivity=8
-    )
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
     areas = stats[:, cv2.CC_STAT_AREA]
 
     if len(areas) <= 1:  # there is just background here, empty mask
@@ -76,9 +81,32 @@ def filter_mask_by_size(
     max_area = np.max(areas[1:])  # max area is the principal mask
     min_area = area_thresh_percentage * max_area  # min area that an element should have
 
+    kept = np.flatnonzero(areas >= min_area)
+    kept = kept[kept != 0]
+
+    # Few large components are usually kept, so they are only compared with
+    # the labels within their bounding box. Otherwise, all the labels are
+    # mapped to their value in the filtered mask in a single lookup.
+    widths = stats[kept, cv2.CC_STAT_WIDTH].astype(np.int64)
+    heights = stats[kept, cv2.CC_STAT_HEIGHT].astype(np.int64)
+    if np.sum(widths * heights) > mask.size:
+        keep_table = np.zeros(len(areas), dtype=mask.dtype)
+        keep_table[kept] = 255
+        return keep_table[labels]
+
     filtered_mask = np.zeros_like(mask)
-    for label in range(1, num_labels):
-        if areas[label] >= min_area:
-            filtered_mask[labels == label] = 255
+    for label in kept:
+        x, y, w, h = stats[label, : cv2.CC_STAT_AREA]
+        box = (slice(y, y + h), slice(x, x + w))
+        filtered_mask[box][labels[box] == label] = 255
 
     return filtered_mask
+
+
+def _scale_kernel_size(size: int, scale: float, odd: bool = False) -> int:
+    """Scales a kernel size given in image pixels to the mask resolution."""
+    scaled = max(1, round(size * scale))
+    if odd and scaled % 2 == 0:
+        scaled += 1
+
+    return scaled
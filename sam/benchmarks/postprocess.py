@@ -0,0 +1,128 @@
+"""
+Micro-benchmark of the mask post-processing on large synthetic masks.
+
+Compares the filtering of the connected components by size, label by label on
+the whole mask (as done before) and as currently done, on noisy masks up to
+8000 pixels wide, and on fragmented masks where many components are kept.
+
+Run me with: python -m benchmarks.postprocess
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from app.utils.annotations import mask_to_polygon
+from app.utils.postprocess import filter_mask_by_size, post_process_segmentation_mask
+
+
+def filter_mask_by_size_per_label(
+    mask: np.ndarray,
+    area_thresh_percentage: float = 0.1,
+) -> np.ndarray:
+    """The previous implementation, with one pass over the mask per label."""
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
+        mask, connectivity=8
+    )
+    areas = stats[:, cv2.CC_STAT_AREA]
+
+    if len(areas) <= 1:
+        return np.zeros_like(mask)
+
+    min_area = area_thresh_percentage * np.max(areas[1:])
+
+    filtered_mask = np.zeros_like(mask)
+    for label in range(1, num_labels):
+        if areas[label] >= min_area:
+            filtered_mask[labels == label] = 255
+
+    return filtered_mask
+
+
+def make_mask(size: int, noise: float, fragmented: bool = False) -> np.ndarray:
+    """
+    A large disk, or a grid of similar blobs if fragmented, with salt noise
+    creating many small components.
+    """
+    yy, xx = np.ogrid[:size, :size]
+    if fragmented:
+        mask = (xx % 64 < 48) & (yy % 64 < 48)
+    else:
+        mask = (xx - size / 2) ** 2 + (yy - size / 2) ** 2 < (size / 3) ** 2
+    mask |= np.random.default_rng(0).random((size, size)) < noise
+
+    return mask.astype(np.uint8) * 255
+
+
+def measure(func: Callable[[], object], rounds: int) -> float:
+    """Median duration of a function, in milliseconds."""
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(durations))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 4096, 8000])
+    parser.add_argument("--noise", type=float, default=0.001)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--max-labels",
+        type=int,
+        default=3000,
+        help="Skip the per-label filtering above this number of components.",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mask':>10} {'size':>6} {'components':>11} "
+        f"{'before (ms)':>12} {'filter (ms)':>12} {'post-process (ms)':>18} "
+        f"{'vertices':>9} {'simplified':>11}"
+    )
+    cases = [(size, fragmented) for fragmented in (False, True) for size in args.sizes]
+    for size, fragmented in cases:
+        mask = make_mask(size, args.noise, fragmented)
+        n_labels = cv2.connectedComponents(mask, connectivity=8)[0]
+
+        after = measure(lambda: filter_mask_by_size(mask), args.rounds)
+        if n_labels <= args.max_labels:
+            before = f"{measure(lambda: filter_mask_by_size_per_label(mask), 1):.1f}"
+            expected = filter_mask_by_size_per_label(mask)
+            assert np.array_equal(filter_mask_by_size(mask), expected)
+        else:
+            before = "skipped"
+
+        scale = min(1.0, 8000 / size)
+        processed = post_process_segmentation_mask(mask, scale=scale)
+        total = measure(
+            lambda: post_process_segmentation_mask(mask, scale=scale), args.rounds
+        )
+
+        exact = mask_to_polygon(processed, size, 0, 0)
+        simplified = mask_to_polygon(processed, size, 0, 0, simplify_tolerance=1.0)
+
+        print(
+            f"{'fragmented' if fragmented else 'disk':>10} {size:>6} "
+            f"{n_labels - 1:>11} {before:>12} {after:>12.1f} {total:>18.1f} "
+            f"{_n_vertices(exact):>9} {_n_vertices(simplified):>11}"
+        )
+
+
+def _n_vertices(feature) -> int:
+    if feature is None:
+        return 0
+    geometry = feature["geometry"]
+    if geometry["type"] == "Polygon":
+        return len(geometry["coordinates"][0])
+    return sum(len(polygon[0]) for polygon in geometry["coordinates"])
+
+
+if __name__ == "__main__":
+    main()
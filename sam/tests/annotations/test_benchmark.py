@@ -0,0 +1,18 @@
+from app.annotations.benchmark import STAGES, benchmark_predictor
+from tests.conftest import FakePredictor
+
+
+def test_benchmark_predictor() -> None:
+    predictor = FakePredictor()
+
+    latencies = benchmark_predictor(
+        predictor,  # type: ignore
+        image_size=256,
+        runs=3,
+        warmup=2,
+    )
+
+    assert predictor.encoded == 5
+    assert predictor.is_reset
+    assert tuple(latencies) == STAGES
+    assert all(latency >= 0 for latency in latencies.values())
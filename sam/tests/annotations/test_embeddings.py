@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.annotations.embeddings import ImageEmbeddingCache
+from tests.conftest import FakePredictor
+
+
+def test_embedding_reused_for_same_image() -> None:
+    cache = ImageEmbeddingCache(max_size=1024, model_key="model")
+    predictor = FakePredictor()
+    image = np.full((8, 8, 3), 7, dtype=np.uint8)
+
+    cache.set_image(predictor, image)
+    predictor.reset_predictor()
+    cache.set_image(predictor, image.copy())
+
+    assert predictor.encoded == 1
+    assert predictor._is_image_set
+    assert predictor._orig_hw == [(8, 8)]
+    assert predictor._features["image_embed"][0, 0] == 7
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_embedding_cache_eviction() -> None:
+    # Each embedding takes 32 bytes
+    cache = ImageEmbeddingCache(max_size=64, model_key="model")
+    predictor = FakePredictor()
+    images = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(3)]
+
+    for image in images:
+        cache.set_image(predictor, image)
+
+    assert len(cache) == 2
+    assert cache.size == 64
+
+    cache.set_image(predictor, images[0])
+    assert predictor.encoded == 4
+
+
+def test_embedding_key_depends_on_model() -> None:
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    assert ImageEmbeddingCache(1, "a").key(image) != ImageEmbeddingCache(1, "b").key(
+        image
+    )
+    assert ImageEmbeddingCache(1, "a").key(image) != ImageEmbeddingCache(1, "a").key(
+        image.reshape(4, 16, 3)
+    )
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.annotations import pool as pool_module
+from app.annotations.pool import PoolFullError, PredictorPool
+from tests.conftest import FakePredictor
+
+
+def test_pool_rejects_when_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pool_module, "SAM2ImagePredictor", FakePredictor)
+    pool = PredictorPool(model=object(), size=1, max_queue=1)
+    release = threading.Event()
+
+    def predict(predictor: FakePredictor) -> FakePredictor:
+        release.wait()
+        return predictor
+
+    async def run() -> None:
+        running = [asyncio.ensure_future(pool.run(predict)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+
+        with pytest.raises(PoolFullError) as e:
+            await pool.run(predict)
+        assert e.value.retry_after >= 1
+
+        release.set()
+        predictors = await asyncio.gather(*running)
+        assert predictors[0] is predictors[1]
+        assert pool.pending == 0
+
+    asyncio.run(run())
+    pool.shutdown()
+
+
+def test_pool_releases_slot_on_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pool_module, "SAM2ImagePredictor", FakePredictor)
+    pool = PredictorPool(model=object(), size=1, max_queue=0)
+
+    def fail(_: FakePredictor) -> None:
+        raise ValueError("Invalid crop")
+
+    async def run() -> None:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await pool.run(fail)
+
+    asyncio.run(run())
+    assert pool.pending == 0
+    pool.shutdown()
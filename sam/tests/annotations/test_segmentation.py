@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from shapely.geometry import Point, box
+
+from app.annotations import segmentation
+from app.annotations.segmentation import run_batch_segmentation_pipeline
+from tests.conftest import FakePredictor
+
+
+def test_batch_segmentation_runs_encoder_once() -> None:
+    predictor = FakePredictor()
+    crop = np.zeros((200, 200, 3), dtype=np.uint8)
+    prompts = [
+        box(1000, 1000, 1040, 1040),
+        Point(1100, 1100),
+        box(1060, 1060, 1100, 1100),
+    ]
+
+    features = run_batch_segmentation_pipeline(
+        predictor,  # type: ignore
+        crop,
+        image_height=4000,
+        image_width=4000,
+        prompts=prompts,
+    )
+
+    assert predictor.encoded == 1
+    assert [len(prompts) for prompts in predictor.calls] == [2, 1]
+    assert len(features) == 3
+    assert all(feature is not None for feature in features)
+
+    # Masks are mapped back to the image, up to the morphological operations
+    coords = np.array(features[0]["geometry"]["coordinates"][0])
+    assert coords.min(axis=0) == pytest.approx([1000, 1000], abs=3)
+    assert coords.max(axis=0) == pytest.approx([1040, 1040], abs=3)
+
+
+def test_batch_segmentation_decodes_prompts_by_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(segmentation, "REFINE_BATCH_CHUNK_SIZE", 2)
+    predictor = FakePredictor()
+    crop = np.zeros((200, 200, 3), dtype=np.uint8)
+    prompts = [box(1000 + 10 * i, 1000, 1040 + 10 * i, 1040) for i in range(5)]
+
+    features = run_batch_segmentation_pipeline(
+        predictor,  # type: ignore
+        crop,
+        image_height=4000,
+        image_width=4000,
+        prompts=prompts,
+    )
+
+    assert predictor.encoded == 1
+    assert [len(prompts) for prompts in predictor.calls] == [2, 2, 1]
+    assert all(feature is not None for feature in features)
+    xs = [np.array(f["geometry"]["coordinates"][0])[:, 0].min() for f in features]
+    assert xs == pytest.approx([1000 + 10 * i for i in range(5)], abs=3)
@@ -0,0 +1,60 @@
+from typing import Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import annotation
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    # Prompts are validated before any prediction, the model is not loaded
+    return TestClient(app)
+
+
+def refine_batch(client: TestClient, n_crops: int, data: Dict[str, List]):
+    files = [
+        ("annotation_crops", (f"crop{i}.png", b"", "image/png")) for i in range(n_crops)
+    ]
+    return client.post(
+        "/annotations/refine/batch",
+        files=files,
+        data={"image_height": 1000, "image_width": 1000, **data},
+    )
+
+
+@pytest.mark.parametrize(
+    "n_crops, crop_indices",
+    [
+        (1, [0, 1]),
+        (2, [0, -1]),
+        (1, [0]),
+        (2, [0, 1, 1]),
+        (2, []),
+    ],
+)
+def test_refine_batch_invalid_crop_indices(
+    client: TestClient, n_crops: int, crop_indices: List[int]
+) -> None:
+    response = refine_batch(
+        client,
+        n_crops,
+        {"locations": ["POINT (10 10)", "POINT (20 20)"], "crop_indices": crop_indices},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Each location must refer to one of the crops"
+
+
+def test_refine_batch_too_many_locations(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(annotation, "REFINE_BATCH_MAX_LOCATIONS", 2)
+
+    response = refine_batch(
+        client, 1, {"locations": ["POINT (10 10)", "POINT (20 20)", "POINT (30 30)"]}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "At most 2 locations can be refined"
@@ -1,6 +1,8 @@
-from typing import Generator
+from typing import Generator, Optional
 
+import numpy as np
 import pytest
+import torch
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -10,3 +12,57 @@ from app.main import app
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
         yield c
+
+
+class FakePredictor:
+    """A predictor without model, segmenting a square at each prompt."""
+
+    def __init__(self, model: object = None) -> None:
+        self.model = model
+        self.encoded = 0
+        self.calls: list = []
+        self.is_reset = False
+        self._features = None
+        self._orig_hw = None
+        self._is_image_set = False
+
+    def reset_predictor(self) -> None:
+        self.is_reset = True
+        self._features = None
+        self._orig_hw = None
+        self._is_image_set = False
+
+    def set_image(self, image: np.ndarray) -> None:
+        self.encoded += 1
+        self.shape = image.shape[:2]
+        self._features = {
+            "image_embed": torch.full((1, 4), float(image.mean())),
+            "high_res_feats": [torch.zeros((1, 4))],
+        }
+        self._orig_hw = [image.shape[:2]]
+        self._is_image_set = True
+
+    def predict(
+        self,
+        point_coords: Optional[np.ndarray] = None,
+        point_labels: Optional[np.ndarray] = None,
+        box: Optional[np.ndarray] = None,
+        **kwargs,
+    ):
+        prompts = box if box is not None else point_coords
+        self.calls.append(prompts)
+        batched = prompts.ndim > 1 + (box is None)
+        if not batched:
+            prompts = prompts[np.newaxis]
+
+        # The predictor returns 3 masks per prompt, the second one is the best
+        masks = np.zeros((len(prompts), 3, *self.shape), dtype=bool)
+        for i, prompt in enumerate(prompts.astype(int)):
+            x, y = prompt.reshape(-1)[:2]
+            masks[i, 1, y : y + 40, x : x + 40] = True
+        ious = np.tile([0.1, 0.9, 0.2], (len(prompts), 1))
+
+        if not batched or len(prompts) == 1:  # a single prompt is not batched
+            return masks[0], ious[0], None
+
+        return masks, ious, None
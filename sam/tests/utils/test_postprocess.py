@@ -0,0 +1,49 @@
+import numpy as np
+
+from app.utils.annotations import mask_to_polygon
+from app.utils.postprocess import filter_mask_by_size, post_process_segmentation_mask
+
+
+def test_filter_mask_by_size() -> None:
+    mask = np.zeros((100, 100), dtype=np.uint8)
+    mask[10:60, 10:60] = 255  # main component, 2500 px
+    mask[70:90, 70:90] = 255  # 400 px, kept
+    mask[5:8, 80:83] = 255  # 9 px, removed
+
+    filtered = filter_mask_by_size(mask, area_thresh_percentage=0.1)
+
+    assert filtered.dtype == np.uint8
+    assert set(np.unique(filtered)) == {0, 255}
+    assert np.count_nonzero(filtered) == 2500 + 400
+    assert filtered[6, 81] == 0
+
+
+def test_filter_empty_mask() -> None:
+    mask = np.zeros((10, 10), dtype=np.uint8)
+
+    assert not filter_mask_by_size(mask).any()
+
+
+def test_post_process_kernels_scale_with_mask() -> None:
+    # A 6px wide bridge between two squares, removed by the 10px opening
+    mask = np.zeros((200, 200), dtype=bool)
+    mask[20:80, 20:80] = True
+    mask[20:80, 120:180] = True
+    mask[45:51, 80:120] = True
+
+    assert not post_process_segmentation_mask(mask)[48, 100]
+
+    # On a mask downsampled 4 times, the opening is 3px wide and keeps the bridge
+    assert post_process_segmentation_mask(mask, scale=0.25)[48, 100]
+
+
+def test_mask_to_polygon_simplify() -> None:
+    yy, xx = np.mgrid[:200, :200]
+    mask = ((xx - 100) ** 2 + (yy - 100) ** 2 < 80**2).astype(np.uint8)
+
+    exact = mask_to_polygon(mask, 1000, 0, 0)
+    simplified = mask_to_polygon(mask, 1000, 0, 0, simplify_tolerance=1.0)
+
+    n_exact = len(exact["geometry"]["coordinates"][0])
+    n_simplified = len(simplified["geometry"]["coordinates"][0])
+    assert 4 <= n_simplified < n_exact / 2